@@ -2,6 +2,7 @@ import json
 import logging
 import os
 import random
+import sys
 from dataclasses import dataclass, field
 from enum import Enum
 from pathlib import Path
@@ -17,15 +18,24 @@ from livekit.agents import (
     cli,
     tokenize,
     function_tool,
+    metrics,
     RunContext,
     ToolError
 )
+from livekit.agents.llm import StopResponse
 from livekit.plugins import murf, deepgram, google
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "types of agent"))
+from answer_grader import AnswerGrader, FastPathStats
+from mastery_store import LearnerMastery, MasteryStore
+
 # Set up logging
 logger = logging.getLogger("active_recall_coach")
 load_dotenv(".env.local")
 
+# A concept at or above this mastery is not offered again as a weak spot
+MASTERED = 0.8
+
 # Define learning modes as an Enum for better type safety and autocompletion
 class LearningMode(str, Enum):
     LEARN = "learn"
@@ -41,6 +51,7 @@ class Concept:
     sample_question: str
     mastery_level: float = 0.0  # 0.0 to 1.0
     last_practiced: Optional[float] = None
+    rubric: Dict[str, List[dict]] = field(default_factory=dict)  # key points for local grading
 
 @dataclass
 class UserState:
@@ -50,9 +61,10 @@ class UserState:
     concept_mastery: Dict[str, float] = field(default_factory=dict)
 
 class ActiveRecallCoach(Agent):
-    def __init__(self, concepts_file: str) -> None:
+    def __init__(self, concepts_file: str, learner: Optional[LearnerMastery] = None) -> None:
         """
         Initialize the Active Recall Coach with concepts from the provided JSON file.
+        learner carries the student's mastery from earlier sessions, if known.
         """
         super().__init__(
             instructions="""You are an AI tutor that helps students learn through active recall. 
@@ -63,11 +75,22 @@ class ActiveRecallCoach(Agent):
             
             Always be encouraging, patient, and adapt to the student's level. 
             Keep explanations clear and concise. In teach-back mode, provide gentle 
-            corrections and ask follow-up questions to deepen understanding."""
+            corrections and ask follow-up questions to deepen understanding.
+            
+            A plain "I don't know", and an answer that clearly makes every key point 
+            about the right thing, are graded before they reach you. Every other answer 
+            comes with a "Local grader" note of the key points it touches and misses; 
+            judge it yourself, checking each point is said about the right thing, and 
+            call provide_feedback."""
         )
         
         # Load concepts from JSON file
         self.concepts = self._load_concepts(concepts_file)
+        self.learner = learner
+        self.grader = AnswerGrader.from_concepts({"id": c.id, "rubric": c.rubric} for c in self.concepts)
+        self.grading_stats = FastPathStats()
+        # The (concept id, mode) the student's next reply answers
+        self.pending_answer: Optional[Tuple[str, str]] = None
         
         # Initialize voices for different modes
         self.voices = {
@@ -87,7 +110,8 @@ class ActiveRecallCoach(Agent):
                     id=concept["id"],
                     title=concept["title"],
                     summary=concept["summary"],
-                    sample_question=concept["sample_question"]
+                    sample_question=concept["sample_question"],
+                    rubric=concept.get("rubric", {})
                 )
                 for concept in concepts_data
             ]
@@ -108,6 +132,16 @@ class ActiveRecallCoach(Agent):
             return None
         return random.choice(self.concepts)
     
+    def get_weakest_concept(self) -> Optional[Concept]:
+        """Get the concept the student scored lowest on in earlier sessions, if any is below MASTERED."""
+        if not self.learner:
+            return None
+        for concept_id, score in self.learner.weakest(3):
+            concept = self.get_concept_by_id(concept_id)
+            if concept and score < MASTERED:
+                return concept
+        return None
+    
     @function_tool
     async def set_learning_mode(
         self,
@@ -125,11 +159,7 @@ class ActiveRecallCoach(Agent):
         Returns:
             Confirmation message about the mode and concept
         """
-        # Initialize user state if it doesn't exist
-        if not hasattr(context.user_data, 'state'):
-            context.user_data.state = UserState()
-        
-        state = context.user_data.state
+        state = context.userdata
         
         # Validate and set the learning mode
         try:
@@ -139,14 +169,14 @@ class ActiveRecallCoach(Agent):
         
         state.learning_mode = learning_mode
         
-        # Set the concept if provided, otherwise keep the current one or pick a random one
+        # Set the concept if provided, otherwise keep the current one or pick the weakest (or a random) one
         if concept_id:
             concept = self.get_concept_by_id(concept_id)
             if not concept:
                 return f"Could not find concept with ID: {concept_id}"
             state.current_concept = concept
         elif not state.current_concept:
-            state.current_concept = self.get_random_concept()
+            state.current_concept = self.get_weakest_concept() or self.get_random_concept()
             if not state.current_concept:
                 return "No concepts available. Please check the content file."
         
@@ -154,6 +184,10 @@ class ActiveRecallCoach(Agent):
         if state.current_concept:
             state.concept_history.append((state.current_concept.id, learning_mode))
         
+        # The student's next reply answers the quiz question or teach-back prompt
+        if learning_mode != LearningMode.LEARN:
+            self.pending_answer = (state.current_concept.id, learning_mode.value)
+        
         # Get the appropriate response based on the mode
         if learning_mode == LearningMode.LEARN:
             return self._get_learn_response(state.current_concept)
@@ -174,6 +208,35 @@ class ActiveRecallCoach(Agent):
         """Generate a response for teach-back mode."""
         return f"Now it's your turn to teach me about {concept.title}. Please explain it to me as if I'm learning it for the first time. I'll listen carefully and provide feedback afterward."
     
+    async def on_user_turn_completed(self, turn_ctx, new_message):
+        """Grade clear passes and plain "I don't know"s locally; every other answer is left for the LLM, with the grader's note."""
+        pending, self.pending_answer = self.pending_answer, None
+        if pending is None:
+            return
+        concept_id, mode = pending
+        result = self.grader.grade(concept_id, mode, new_message.text_content)
+        self.grading_stats.record(result)
+        if not result.is_clear:
+            turn_ctx.add_message(role="system", content=result.summary())
+            return
+        concept = self.get_concept_by_id(concept_id)
+        self._record_result(self.session.userdata, concept_id, result.verdict == "pass")
+        logger.info(f"Graded {mode} answer for {concept_id} locally: {result.verdict} in {result.elapsed_ms:.2f} ms")
+        self.session.say(result.feedback(concept.title))
+        raise StopResponse()
+    
+    def _record_result(self, state: UserState, concept_id: str, is_correct: bool):
+        """Update mastery level based on correctness and save it in the background."""
+        if is_correct:
+            state.concept_mastery[concept_id] = min(1.0, state.concept_mastery.get(concept_id, 0) + 0.2)
+        else:
+            state.concept_mastery[concept_id] = max(0.0, state.concept_mastery.get(concept_id, 0) - 0.1)
+        
+        # Grading ends the student's turn: save the new mastery in the background
+        if self.learner:
+            self.learner.update(concept_id, score=state.concept_mastery[concept_id])
+            self.learner.flush_soon()
+    
     @function_tool
     async def list_concepts(self, context: RunContext) -> str:
         """List all available concepts with their IDs and titles."""
@@ -205,26 +268,19 @@ class ActiveRecallCoach(Agent):
         Returns:
             A response acknowledging the feedback
         """
-        if not hasattr(context.user_data, 'state') or not context.user_data.state.current_concept:
+        if not context.userdata.current_concept:
             return "I'm not sure which concept we're working on. Please select a concept first."
         
         concept = self.get_concept_by_id(concept_id)
         if not concept:
             return f"Could not find concept with ID: {concept_id}"
         
-        # Update mastery level based on correctness
-        state = context.user_data.state
-        if is_correct:
-            state.concept_mastery[concept_id] = min(1.0, state.concept_mastery.get(concept_id, 0) + 0.2)
-        else:
-            state.concept_mastery[concept_id] = max(0.0, state.concept_mastery.get(concept_id, 0) - 0.1)
-        
+        self._record_result(context.userdata, concept_id, is_correct)
         return feedback
 
 def prewarm(proc: JobProcess):
     """Preload any necessary models or resources."""
-    # No specific prewarming needed for this agent
-    pass
+    proc.userdata["mastery_store"] = MasteryStore()
 
 async def entrypoint(ctx: JobContext):
     """Entry point for the worker."""
@@ -233,12 +289,25 @@ async def entrypoint(ctx: JobContext):
         "room": ctx.room.name,
     }
 
-    # Initialize the agent with voice pipeline
-    session = AgentSession(
+    # Get the path to the concepts file
+    concepts_file = os.path.join(
+        os.path.dirname(os.path.abspath(__file__)),
+        "shared-data",
+        "day4_tutor_content.json"
+    )
+    
+    # Load the student's mastery from earlier sessions before the first turn
+    await ctx.connect()
+    participant = await ctx.wait_for_participant()
+    learner = await LearnerMastery.open(ctx.proc.userdata["mastery_store"], participant.identity)
+    
+    # Initialize the agent with voice pipeline; the student's state is the session's userdata
+    session = AgentSession[UserState](
+        userdata=UserState(concept_mastery=learner.scores()),
         stt=deepgram.STT(model="nova-3"),
         llm=google.LLM(model="gemini-2.5-flash"),
         tts=murf.TTS(
-            voice="en-US-matthew",  # Default voice, will be overridden based on mode
+            voice="en-US-matthew",
             style="Conversation",
             tokenizer=tokenize.basic.SentenceTokenizer(min_sentence_len=2),
             text_pacing=True
@@ -246,45 +315,33 @@ async def entrypoint(ctx: JobContext):
         preemptive_generation=True,
     )
     
-    # Get the path to the concepts file
-    concepts_file = os.path.join(
-        os.path.dirname(os.path.abspath(__file__)),
-        "shared-data",
-        "day4_tutor_content.json"
-    )
-    
     # Create and set up the active recall coach
-    agent = ActiveRecallCoach(concepts_file=concepts_file)
+    agent = ActiveRecallCoach(concepts_file=concepts_file, learner=learner)
     
-    # Set up the agent session
-    await agent.start(
-        ctx.room,
-        ctx.chat_ctx,
-        stt_ctx=session.stt_ctx,
-        tts_ctx=session.tts_ctx,
-        preemptive_generation=session.preemptive_generation,
-    )
+    @session.on("metrics_collected")
+    def _on_metrics_collected(ev):
+        # What a locally graded answer saves is roughly one LLM reply's time to first token
+        if isinstance(ev.metrics, metrics.LLMMetrics):
+            agent.grading_stats.observe_llm(ev.metrics.ttft)
+    
+    async def on_shutdown():
+        logger.info(f"Answers graded without the LLM: {agent.grading_stats.report()}")
+        await learner.close()
+    
+    ctx.add_shutdown_callback(on_shutdown)
+    
+    # Start the agent session
+    await session.start(agent=agent, room=ctx.room)
     
     # Initial greeting
-    await agent.chat(
-        "Hello! I'm your Active Recall Coach. I can help you learn through three modes:\n"
-        "1. Learn mode - I'll explain concepts to you\n"
-        "2. Quiz mode - I'll test your knowledge with questions\n"
-        "3. Teach-back mode - You'll explain concepts back to me\n\n"
-        "You can say things like:\n"
-        "- 'Let's learn about variables'\n"
-        "- 'Quiz me on loops'\n"
-        "- 'I want to teach you about functions'\n"
-        "- 'List available concepts'\n\n"
-        "What would you like to do first?",
-        voice="en-US-matthew"
+    session.say(
+        "Hello! I'm your Active Recall Coach. I can help you learn through three modes: "
+        "learn mode, where I explain concepts to you; quiz mode, where I test your knowledge "
+        "with questions; and teach-back mode, where you explain concepts back to me. "
+        "You can say things like 'Let's learn about variables', 'Quiz me on loops', "
+        "'I want to teach you about functions' or 'List available concepts'. "
+        "What would you like to do first?"
     )
-    
-    # Keep the agent running
-    try:
-        await agent.wait_for_completion()
-    finally:
-        await agent.shutdown()
 
 if __name__ == "__main__":
     cli.run_app(WorkerOptions(entrypoint_fnc=entrypoint, prewarm_fnc=prewarm))
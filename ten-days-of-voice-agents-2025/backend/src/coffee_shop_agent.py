@@ -4,10 +4,7 @@ import os
 from dataclasses import dataclass, asdict
 from datetime import datetime
 from typing import List, Optional, Literal
-<<<<<<< HEAD
 
-=======
->>>>>>> dbd3176c29c6123b9f99665b77648ee690cb4847
 from dotenv import load_dotenv
 from livekit.agents import (
     Agent,
@@ -24,6 +21,8 @@ from livekit.agents import (
 from livekit.plugins import murf, deepgram, google
 from livekit.plugins.turn_detector.multilingual import MultilingualModel
 
+from order_ids import new_order_id
+
 logger = logging.getLogger("coffee_shop_agent")
 load_dotenv(".env.local")
 
@@ -124,7 +123,7 @@ class CoffeeShopAgent(Agent):
         os.makedirs("orders", exist_ok=True)
         
         # Save order to a file
-        filename = f"orders/order_{order.name.lower().replace(' ', '_')}_{int(datetime.now().timestamp())}.json"
+        filename = f"orders/order_{order.name.lower().replace(' ', '_')}_{new_order_id('ORD')}.json"
         with open(filename, 'w') as f:
             json.dump(order_dict, f, indent=2)
         
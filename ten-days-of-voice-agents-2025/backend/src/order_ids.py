@@ -0,0 +1,100 @@
+# Same module as types of agent/order_ids.py and Agent type/Coeffe/order_ids.py: the backend is built into its own
+# image and the Coeffe agents run from their own folder, so each keeps a copy. Change all three together.
+import os
+import threading
+import time
+import weakref
+from datetime import datetime, timezone
+from typing import Optional
+
+# Layout, most significant first: 42 bits of milliseconds since EPOCH_MS, 8 bits
+# of node id, 22 bits of process id and 12 bits of per-millisecond sequence.
+# Linux never hands out pids above 2**22, so the pid field keeps live processes
+# on one host apart; ORDER_ID_NODE keeps hosts apart. IDs are rendered as fixed
+# width hex so string order matches creation order.
+EPOCH_MS = 1735689600000  # 2025-01-01T00:00:00Z
+NODE_BITS = 8
+PID_BITS = 22
+SEQUENCE_BITS = 12
+MAX_NODE_ID = (1 << NODE_BITS) - 1
+PID_MASK = (1 << PID_BITS) - 1
+SEQUENCE_MASK = (1 << SEQUENCE_BITS) - 1
+WORKER_BITS = NODE_BITS + PID_BITS
+TIMESTAMP_SHIFT = WORKER_BITS + SEQUENCE_BITS
+ID_HEX_WIDTH = 21
+NODE_ENV_VAR = "ORDER_ID_NODE"
+
+_generators = weakref.WeakSet()
+
+
+def default_node_id() -> int:
+    """Returns the node id configured in ORDER_ID_NODE (0 when unset)."""
+    node_id = int(os.environ.get(NODE_ENV_VAR, "0"))
+    if not 0 <= node_id <= MAX_NODE_ID:
+        raise ValueError(f"{NODE_ENV_VAR} must be between 0 and {MAX_NODE_ID}")
+    return node_id
+
+
+class OrderIdGenerator:
+    """Generates unique, monotonic, time-sortable order IDs."""
+
+    def __init__(self, node_id: Optional[int] = None, epoch_ms: int = EPOCH_MS):
+        if node_id is not None and not 0 <= node_id <= MAX_NODE_ID:
+            raise ValueError(f"node_id must be between 0 and {MAX_NODE_ID}")
+        self.node_id = default_node_id() if node_id is None else node_id
+        self.epoch_ms = epoch_ms
+        self._reset()
+        _generators.add(self)
+
+    def _reset(self):
+        self._lock = threading.Lock()
+        self.worker_id = (self.node_id << PID_BITS) | (os.getpid() & PID_MASK)
+        self._last_ms = -1
+        self._sequence = 0
+
+    def next_int(self) -> int:
+        """Returns the next ID as an integer."""
+        with self._lock:
+            now_ms = time.time_ns() // 1_000_000 - self.epoch_ms
+            if now_ms > self._last_ms:
+                self._last_ms = now_ms
+                self._sequence = 0
+            else:
+                # Same millisecond or the clock stepped back: keep counting from the last
+                # issued timestamp, borrowing the next millisecond when the sequence is full.
+                self._sequence = (self._sequence + 1) & SEQUENCE_MASK
+                if self._sequence == 0:
+                    self._last_ms += 1
+            return (self._last_ms << TIMESTAMP_SHIFT) | (self.worker_id << SEQUENCE_BITS) | self._sequence
+
+    def next_id(self, prefix: str = "ORD") -> str:
+        """Returns the next ID as a sortable string such as 'ORD-034cd6908840001d0c000'."""
+        return f"{prefix}-{self.next_int():0{ID_HEX_WIDTH}x}"
+
+    def timestamp_of(self, order_id) -> datetime:
+        """Returns the creation time encoded in an ID produced by this generator."""
+        value = order_id if isinstance(order_id, int) else int(order_id.rsplit("-", 1)[-1], 16)
+        ms = (value >> TIMESTAMP_SHIFT) + self.epoch_ms
+        return datetime.fromtimestamp(ms / 1000, tz=timezone.utc)
+
+
+def _reset_after_fork():
+    # A forked child must not replay the parent's pid bits and sequence.
+    for generator in list(_generators):
+        generator._reset()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+_default_generator = OrderIdGenerator()
+
+
+def new_order_id(prefix: str = "ORD") -> str:
+    """Returns a new order ID from the process-wide generator."""
+    return _default_generator.next_id(prefix)
+
+
+def order_id_timestamp(order_id) -> datetime:
+    """Returns the creation time encoded in an order ID."""
+    return _default_generator.timestamp_of(order_id)
@@ -0,0 +1,54 @@
+import threading
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from order_ids import (
+    MAX_NODE_ID,
+    OrderIdGenerator,
+    new_order_id,
+    order_id_timestamp,
+)
+
+
+def test_ids_are_unique_and_sorted() -> None:
+    generator = OrderIdGenerator(node_id=1)
+    ids = [generator.next_id() for _ in range(10_000)]
+
+    assert len(set(ids)) == len(ids)
+    assert ids == sorted(ids)
+
+
+def test_ids_are_unique_across_threads() -> None:
+    generator = OrderIdGenerator(node_id=2)
+    ids = []
+
+    def issue() -> None:
+        ids.extend(generator.next_id() for _ in range(2_000))
+
+    threads = [threading.Thread(target=issue) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(set(ids)) == 8_000
+
+
+def test_nodes_never_collide() -> None:
+    first = OrderIdGenerator(node_id=3)
+    second = OrderIdGenerator(node_id=4)
+
+    assert not {first.next_id() for _ in range(1_000)} & {second.next_id() for _ in range(1_000)}
+
+
+def test_timestamp_round_trip() -> None:
+    order_id = new_order_id("ORD")
+
+    assert order_id.startswith("ORD-")
+    assert abs(order_id_timestamp(order_id) - datetime.now(timezone.utc)) < timedelta(seconds=5)
+
+
+def test_rejects_out_of_range_node() -> None:
+    with pytest.raises(ValueError):
+        OrderIdGenerator(node_id=MAX_NODE_ID + 1)
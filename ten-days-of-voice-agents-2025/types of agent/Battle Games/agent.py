@@ -1,7 +1,9 @@
+import asyncio
+import json
 import logging
-import random
 import os
-from typing import Dict, Any
+import sys
+from typing import Optional
 
 from dotenv import load_dotenv
 from livekit.agents import (
@@ -17,42 +19,59 @@ from livekit.agents import (
     function_tool,
     RunContext,
 )
+from livekit import rtc
 from livekit.plugins import murf, silero, google, deepgram
 from livekit.plugins.turn_detector.multilingual import MultilingualModel
 
+from improv_room import ImprovRoom
+from scenario_bank import ScenarioBank
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOM_COSTS_FILE = os.path.join(SCRIPT_DIR, "room_costs.jsonl")
+
+sys.path.insert(0, os.path.dirname(SCRIPT_DIR))
+from jsonl_sink import JsonlSink
+
 logger = logging.getLogger("agent")
 
 load_dotenv(".env.local")
 
-# Predefined improv scenarios
-IMPROV_SCENARIOS = [
-    "You are a restaurant waiter who must calmly tell a customer that their order has escaped the kitchen.",
-    "You are a customer trying to return an obviously cursed object to a very skeptical shop owner.",
-    "You are a barista who has to tell a customer that their latte is actually a portal to another dimension.",
-    "You are a weather reporter who must deliver the forecast while being attacked by increasingly aggressive pigeons.",
-    "You are a museum tour guide showing a group of aliens around an art gallery, but you don't realize they're aliens.",
-    "You are a job interviewer who just discovered the candidate is your evil twin from a parallel universe.",
-    "You are a flight attendant making an announcement about turbulence, but you're actually on a spaceship.",
-    "You are a librarian who must whisper-yell at a patron whose phone volume is stuck on maximum opera.",
-    "You are a fitness instructor leading a class, but every exercise you demonstrate accidentally breaks the laws of physics.",
-    "You are a medieval knight who keeps confusing your helmet's visor with a video call filter during an important council meeting.",
-    "You are a pet store employee trying to convince a customer that the ordinary hamster they're looking at is actually a master criminal in disguise.",
-    "You are a police officer writing a ticket for a car that is illegally parked... directly on the moon.",
-    "You are a zookeeper trying to explain to a group of confused children why the pandas are on strike and demanding better bamboo contracts.",
-    "You are a scientist giving a lecture on your new invention, a time machine that can only travel 10 seconds into the past.",
-    "You are an auctioneer selling common household items, but you treat each one like a priceless, legendary artifact.",
-    "You are a construction worker whose hard hat is secretly broadcasting an embarrassing romantic comedy plot to everyone on the site.",
-    "You are a psychic who has to admit to your client that the only future you can see is the next five minutes of their life.",
-]
+ROUNDS_PER_PLAYER = int(os.getenv("IMPROV_ROUNDS_PER_PLAYER", "3"))
+VOTE_WINDOW_SECONDS = 20
+VOTE_TOPIC = "improv-vote"
+STATE_TOPIC = "improv-state"
 
 
+def pipeline_cost(summary, players: int, turns: int) -> dict:
+    """Flattens a usage summary into totals and per-player figures for one room."""
+    totals = {
+        "llm_prompt_tokens": getattr(summary, "llm_prompt_tokens", 0),
+        "llm_completion_tokens": getattr(summary, "llm_completion_tokens", 0),
+        "tts_characters": getattr(summary, "tts_characters_count", 0),
+        "tts_audio_seconds": round(getattr(summary, "tts_audio_duration", 0.0), 2),
+        "stt_audio_seconds": round(getattr(summary, "stt_audio_duration", 0.0), 2),
+    }
+    divisor = max(players, 1)
+    return {
+        "players": players,
+        "turns": turns,
+        **totals,
+        "per_player": {key: round(value / divisor, 2) for key, value in totals.items()},
+    }
+
 class ImprovHost(Agent):
-    def __init__(self, improv_state: Dict[str, Any]) -> None:
-        self.improv_state = improv_state
+    def __init__(self, room: ImprovRoom, scenario_bank: ScenarioBank) -> None:
+        self.room = room
+        self.scenario_bank = scenario_bank
+        # Participant whose microphone currently feeds the session
+        self.linked_identity: Optional[str] = None
+        self._votes_in = asyncio.Event()
+        self._voting_task: Optional[asyncio.Task] = None
+        self._state_listeners = []
         super().__init__(
-            instructions="""You are the host of a TV improv show called "Improv Battle". 
+            instructions=f"""You are the host of a TV improv show called "Improv Battle". One or more players share the stage in the same room.
 
-CRITICAL FIRST MESSAGE: When you first join a room, you MUST immediately speak first and welcome the player. Do NOT wait for them to speak. Start with: "Welcome, welcome, welcome to Improv Battle! I'm your host..."
+CRITICAL FIRST MESSAGE: When you first join a room, you MUST immediately speak first and welcome the players. Do NOT wait for them to speak. Start with: "Welcome, welcome, welcome to Improv Battle! I'm your host..."
 
 Your role and style:
 - High-energy, witty, and clear about rules
@@ -64,214 +83,284 @@ Your responses are concise, natural, and conversational. No emojis, asterisks, o
 
 CRITICAL: You MUST always respond to user input. When a user speaks (like "Hello"), you MUST respond immediately. Do not ignore user messages. Always acknowledge and respond to what the user says.
 
-Game structure - follow this flow EXACTLY - NO EXCEPTIONS:
+How turns work:
+- Players take turns. Only the current performer's microphone reaches you, so address players by name and tell them whose turn it is.
+- Each player performs {room.rounds_per_player} scenes. start_new_round always picks the next performer for you; never choose the performer yourself.
+- When more than one player is in the room, the others are the audience. After you react to a scene, they vote 1 to 5 in the app. Voting closes by itself and you will be told the result.
 
-MANDATORY SEQUENCE: Round 1 → Round 2 → Round 3 → Closing Summary
+Game structure - follow this flow EXACTLY:
 
 1. PHASE: intro
-   - IMPORTANT: As soon as you join the room, immediately welcome the player enthusiastically
-   - Start speaking right away - don't wait for the user to speak first
-   - Welcome them: "Welcome, welcome, welcome to Improv Battle! I'm your host..."
-   - Ask for their name if not provided
-   - Explain the rules: "I'll give you a scenario, you improvise it, then I'll react. We'll do 3 rounds."
-   - Use set_player_name tool if they give their name
-   - Then call start_new_round to begin round 1
-
-2. PHASE: awaiting_improv (for each round)
-   - Announce the scenario clearly: "Round X of 3. Here's your scenario: [scenario from start_new_round]"
-   - Tell them to start: "Alright, let's see what you've got. Start whenever you're ready!"
-   - Wait for them to perform
+   - Welcome everyone enthusiastically, then call get_current_state to see who is here
+   - If get_current_state lists players without a name, ask them one at a time for their stage name and call set_player_name; it tells you whose name to ask for next
+   - Explain the rules: "I'll give each of you a scenario, you improvise it, then I'll react and the audience votes."
+   - Then call start_new_round to begin the first turn
+   - If a player asks for a theme (like sci-fi, fantasy or animals) or a difficulty (easy, medium, hard), pass it to start_new_round
+
+2. PHASE: awaiting_improv (each turn)
+   - Announce the turn exactly as start_new_round tells you, including the performer's name and scenario
+   - Wait for the performer to perform
    - If they say "end scene", "done", "that's it", or pause for a while, move to reacting
 
-3. PHASE: reacting (after each scene) - CRITICAL WORKFLOW:
-   
-   AFTER ROUND 1:
+3. PHASE: reacting (after each scene)
    - Give your reaction (2-3 sentences max)
    - Call complete_round with your reaction
-   - Call check_if_done → it will return "no" (because only 1 round is done)
-   - You MUST call start_new_round to begin Round 2
-   - Announce Round 2 scenario
-   
-   AFTER ROUND 2:
-   - Give your reaction (2-3 sentences max)
-   - Call complete_round with your reaction
-   - Call check_if_done → it will return "no" (because only 2 rounds are done, Round 3 is still needed)
-   - CRITICAL: You MUST call start_new_round to begin Round 3 - DO NOT skip Round 3
-   - Announce Round 3 scenario: "Round 3 of 3. Here's your scenario: [scenario]"
-   - Wait for Round 3 performance
-   
-   AFTER ROUND 3:
-   - Give your reaction (2-3 sentences max)
-   - Call complete_round with your reaction
-   - Call check_if_done → it will return "yes" (because all 3 rounds are done)
-   - NOW you can give the closing summary
+   - If complete_round says voting is open, invite the audience to vote and WAIT. Do NOT call start_new_round until you are told the voting result.
+   - Otherwise call check_if_done:
+     - "no" = more turns needed → You MUST call start_new_round
+     - "yes" = every player has performed all their scenes → give the closing summary
 
 4. PHASE: done (closing)
-   - Only enter this phase after Round 3 is complete and check_if_done returns "yes"
-   - Summarize their improv style (character work, absurdity, emotional range, etc.)
-   - Mention 1-2 specific moments that stood out
-   - Thank them warmly and close the show
-
-CRITICAL WORKFLOW RULES - ABSOLUTE REQUIREMENTS:
-
-THE MANDATORY SEQUENCE (DO NOT DEVIATE):
-Round 1 → React → complete_round → check_if_done ("no") → start_new_round → Round 2
-Round 2 → React → complete_round → check_if_done ("no") → start_new_round → Round 3  
-Round 3 → React → complete_round → check_if_done ("yes") → Closing Summary
-
-AFTER EVERY ROUND COMPLETION:
-1. Call complete_round with your reaction
-2. Call check_if_done immediately
-3. READ the check_if_done result:
-   - "no" = More rounds needed → You MUST call start_new_round. Do NOT give closing summary.
-   - "yes" = All rounds done → Only then give closing summary.
+   - Only after check_if_done returns "yes"
+   - Call get_leaderboard and announce the standings when there is more than one player
+   - Summarize each player's improv style and mention 1-2 moments that stood out
+   - Thank everyone warmly and close the show
 
 ABSOLUTE PROHIBITIONS:
-- ❌ NEVER give closing summary after Round 1
-- ❌ NEVER give closing summary after Round 2
-- ❌ NEVER skip Round 3 - Round 3 is MANDATORY
+- ❌ NEVER give the closing summary before check_if_done returns "yes"
 - ❌ NEVER skip calling start_new_round when check_if_done returns "no"
-- ❌ NEVER end the game before Round 3 is complete
-- ❌ NEVER assume all rounds are done if you've only done 1 or 2 rounds
-- ✅ ONLY give closing summary after Round 3 is complete AND check_if_done returns "yes"
+- ❌ NEVER call start_new_round while voting is open
 
-ROUND TRACKING - EXACT SEQUENCE:
-- After Round 1 completes: check_if_done returns "no" (1/3 done) → MUST call start_new_round → Round 2
-- After Round 2 completes: check_if_done returns "no" (2/3 done) → MUST call start_new_round → Round 3
-- After Round 3 completes: check_if_done returns "yes" (3/3 done) → NOW give closing summary
-
-CRITICAL: You MUST complete Round 1, then Round 2, then Round 3. You cannot skip Round 3.
-If check_if_done returns "no", it means you have NOT completed all 3 rounds yet - you MUST continue.
+If a player says "stop", "end game", "quit", call end_game_early and gracefully wrap up.""",
+        )
 
-If the player says "stop", "end game", "quit", call end_game_early and gracefully wrap up.""",
+    # --------------------------
+    #       ROOM PLUMBING
+    # --------------------------
+
+    def add_state_listener(self, listener):
+        """Registers a callback that receives a dict snapshot whenever the phase or performer changes."""
+        self._state_listeners.append(listener)
+
+    def _publish_state(self):
+        performer = self.room.players.get(self.room.performer) if self.room.performer else None
+        snapshot = {
+            "phase": self.room.phase,
+            "turn": self.room.turn_number,
+            "total_turns": self.room.total_turns(),
+            "performer": performer.identity if performer else None,
+            "performer_name": performer.display_name if performer else None,
+            "scenario": self.room.current_scenario,
+        }
+        for listener in self._state_listeners:
+            try:
+                listener(snapshot)
+            except Exception as e:
+                logger.error(f"State listener failed: {e}")
+
+    def link_participant(self, identity: str):
+        """Routes the session's audio input to one participant, so only the performer is heard."""
+        if identity == self.linked_identity:
+            return
+        try:
+            self.session.room_io.set_participant(identity)
+        except Exception as e:
+            logger.warning(f"Could not switch audio input to {identity}: {e}")
+            return
+        self.linked_identity = identity
+        logger.info(f"🎤 Listening to {identity}")
+
+    def relink(self):
+        """Links whoever the host should be hearing now.
+
+        The performer during a scene. Otherwise a player still without a stage
+        name, so set_player_name can go round the room one player at a time,
+        then the linked player if still here, then the earliest to join.
+        """
+        active = self.room.active_players()
+        current = self.room.players.get(self.linked_identity) if self.linked_identity else None
+        if current is not None and not current.active:
+            current = None
+        unnamed = [p for p in active if not p.name]
+        if self.room.phase == "awaiting_improv" and self.room.performer:
+            target = self.room.performer
+        elif current is not None and not current.name:
+            target = current.identity
+        elif unnamed:
+            target = unnamed[0].identity
+        elif current is not None:
+            target = current.identity
+        elif active:
+            target = active[0].identity
+        else:
+            # Nobody left to hear; the next player to join gets linked
+            self.linked_identity = None
+            return
+        self.link_participant(target)
+
+    def on_participant_left(self, identity: str):
+        was_performing = self.room.leave(identity)
+        self.relink()
+        if was_performing:
+            logger.info(f"Performer {identity} left mid-scene")
+            self._publish_state()
+            self.session.generate_reply(
+                instructions=f"{identity} left the room in the middle of their scene. Briefly acknowledge it, then call check_if_done and continue."
+            )
+        elif self.room.phase == "voting" and self.room.all_votes_in():
+            self._votes_in.set()
+
+    def handle_vote(self, voter: str, score: int) -> Optional[str]:
+        error = self.room.cast_vote(voter, score)
+        if error:
+            logger.info(f"Rejected vote from {voter}: {error}")
+            return error
+        logger.info(f"🗳️ Vote from {voter}: {score}")
+        if self.room.all_votes_in():
+            self._votes_in.set()
+        return None
+
+    async def _run_vote_window(self):
+        try:
+            await asyncio.wait_for(self._votes_in.wait(), timeout=VOTE_WINDOW_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+        round_data = self.room.close_voting()
+        self._publish_state()
+        performer = self.room.players.get(self.room.performer)
+        name = performer.display_name if performer else "the performer"
+        if round_data.get("audience_score") is None:
+            result = f"Nobody voted on {name}'s scene."
+        else:
+            result = f"The audience gave {name} an average of {round_data['audience_score']} out of 5 from {len(round_data['votes'])} vote(s)."
+        logger.info(f"Voting closed: {result}")
+        self.session.generate_reply(
+            instructions=f"Voting is closed. {result} Announce the result in one sentence, then call check_if_done and continue the game."
         )
 
+    # --------------------------
+    #       TOOLS
+    # --------------------------
+
     @function_tool
     async def get_current_state(self, context: RunContext) -> str:
-        """Get the current game state information."""
-        completed = len(self.improv_state["rounds"])
-        current = self.improv_state["current_round"]
-        max_rounds = self.improv_state["max_rounds"]
-        return f"Phase: {self.improv_state['phase']}, Current Round: {current}/{max_rounds}, Completed Rounds: {completed}/{max_rounds}, Player: {self.improv_state.get('player_name', 'Unknown')}"
+        """Get the current game state: phase, turn, performer and every player's progress and score."""
+        unnamed = [p.identity for p in self.room.active_players() if not p.name]
+        state = self.room.describe()
+        if unnamed:
+            state += f". Players without a stage name: {', '.join(unnamed)}"
+        return state
 
     @function_tool
     async def set_player_name(self, context: RunContext, name: str) -> str:
-        """Set the player's name from their response."""
-        if not self.improv_state.get("player_name"):
-            self.improv_state["player_name"] = name
-            logger.info(f"Player name set to: {name}")
-            return f"Player name set to {name}"
-        return "Player name already set"
+        """Set the stage name of the player you are currently talking to."""
+        if not self.linked_identity:
+            return "No player is connected yet"
+        player = self.room.set_name(self.linked_identity, name)
+        logger.info(f"Player {player.identity} set name to: {name}")
+        self._publish_state()
+        # Move on to the next player without a stage name, if any
+        self.relink()
+        nxt = self.room.players.get(self.linked_identity) if self.linked_identity else None
+        if nxt is not None and not nxt.name:
+            return f"Player name set to {name}. You are now hearing {nxt.identity}: ask them for their stage name."
+        return f"Player name set to {name}"
 
     @function_tool
-    async def start_new_round(self, context: RunContext) -> str:
-        """Start a new improv round. Returns the scenario for this round.
-        
-        CRITICAL: This MUST be called in sequence: Round 1 → Round 2 → Round 3.
-        You cannot skip rounds. This increments the round counter and selects a new scenario.
-        Call this after completing a round when check_if_done returns "no".
+    async def start_new_round(self, context: RunContext, theme: Optional[str] = None, difficulty: Optional[str] = None) -> str:
+        """Start the next performer's turn. Returns who performs and their scenario.
+
+        The performer is chosen for you: the player with the fewest completed scenes goes next.
+        Call this after check_if_done returns "no". Never call it while voting is open.
+        Only pass theme or difficulty if the player asked for one.
         """
-        completed_rounds = len(self.improv_state["rounds"])
-        max_rounds = self.improv_state["max_rounds"]
-        current_round = self.improv_state["current_round"]
-        
-        if completed_rounds >= max_rounds:
-            logger.warning("Attempted to start new round but all rounds are already completed")
-            return "ERROR: All rounds already completed. Do NOT call start_new_round. Give the closing summary instead."
-        
-        if current_round >= max_rounds:
-            logger.warning(f"Current round {current_round} already at max {max_rounds}")
-            return f"ERROR: Already at round {current_round}. All rounds should be complete. Call check_if_done to verify, then give closing summary."
-        
-        self.improv_state["current_round"] += 1
-        self.improv_state["phase"] = "awaiting_improv"
-        new_round_num = self.improv_state["current_round"]
-        
-        # Select a random scenario (avoid repeating the last one if possible)
-        last_scenario = self.improv_state.get("current_scenario")
-        available_scenarios = [s for s in IMPROV_SCENARIOS if s != last_scenario] or IMPROV_SCENARIOS
-        scenario = random.choice(available_scenarios)
-        self.improv_state["current_scenario"] = scenario
-        
-        logger.info(f"✅ Starting round {new_round_num} of {max_rounds} with scenario: {scenario}")
-        return f"Round {new_round_num} of {max_rounds} started. Scenario: {scenario}. You MUST announce this to the player: 'Round {new_round_num} of 3. Here's your scenario: {scenario}. Alright, let's see what you've got. Start whenever you're ready!'"
+        if self.room.phase == "voting":
+            return "ERROR: Voting is still open. Wait for the voting result before starting the next turn."
+        if self.room.phase == "awaiting_improv":
+            return "ERROR: The current scene has not been completed. React to it and call complete_round first."
+
+        player = self.room.next_performer()
+        if player is None:
+            logger.warning("Attempted to start new round but every player has finished")
+            return "ERROR: All turns already completed. Do NOT call start_new_round. Give the closing summary instead."
+
+        # Next card from the performer's deck; scenarios already played in this room are skipped
+        picked = self.scenario_bank.draw(
+            player.name or player.identity,
+            theme=theme,
+            difficulty=difficulty,
+            exclude=self.room.scenario_ids,
+        )
+        if picked is None:
+            themes = ", ".join(self.scenario_bank.themes())
+            difficulties = ", ".join(self.scenario_bank.difficulties())
+            return f"No scenarios match theme '{theme}' and difficulty '{difficulty}'. Available themes: {themes}. Difficulties: {difficulties}. Call start_new_round again with one of these, or with no theme."
+
+        self.room.start_turn(player, picked)
+        self.link_participant(player.identity)
+        self._publish_state()
+        scene = len(player.rounds) + 1
+        turn = self.room.turn_number
+        total = self.room.total_turns()
+        logger.info(f"✅ Turn {turn}/{total}: {player.display_name} scene {scene} with scenario: {picked['text']}")
+        return (
+            f"Turn {turn} of {total} started. Performer: {player.display_name} (scene {scene} of {self.room.rounds_per_player}). "
+            f"Scenario: {picked['text']}. You MUST announce this: '{player.display_name}, you're up! Here's your scenario: {picked['text']}. "
+            f"Alright, let's see what you've got. Start whenever you're ready!'"
+        )
 
     @function_tool
     async def complete_round(self, context: RunContext, reaction: str) -> str:
-        """Complete the current round and store the host's reaction.
-        
-        CRITICAL: After calling this, you MUST:
-        1. Call check_if_done immediately
-        2. If check_if_done returns 'no', you MUST call start_new_round
-        3. If check_if_done returns 'yes', give the closing summary
-        
-        DO NOT skip calling start_new_round after check_if_done returns 'no'.
+        """Complete the current scene and store the host's reaction.
+
+        If voting opens, wait for the result. Otherwise call check_if_done next.
         """
-        current_round_num = self.improv_state["current_round"]
-        round_data = {
-            "round": current_round_num,
-            "scenario": self.improv_state.get("current_scenario", ""),
-            "host_reaction": reaction,
-        }
-        self.improv_state["rounds"].append(round_data)
-        self.improv_state["phase"] = "reacting"
-        completed = len(self.improv_state["rounds"])
-        max_rounds = self.improv_state["max_rounds"]
-        logger.info(f"Round {current_round_num} completed. Total completed: {completed}/{max_rounds}")
-        
-        if completed < max_rounds:
-            return f"Round {current_round_num} completed. You have completed {completed} out of {max_rounds} rounds. You MUST call check_if_done now, and if it returns 'no', you MUST call start_new_round to continue."
-        else:
-            return f"Round {current_round_num} completed. You have completed all {max_rounds} rounds. Call check_if_done to confirm, then give the closing summary."
+        if self.room.phase != "awaiting_improv" or not self.room.performer:
+            return "ERROR: No scene is in progress. Call check_if_done, then start_new_round if it returns 'no'."
+        round_data = self.room.complete_turn(reaction)
+        performer = self.room.players[self.room.performer]
+        logger.info(f"Turn {round_data['turn']} completed by {performer.display_name}")
+        if self.room.phase == "voting":
+            self._votes_in.clear()
+            self._voting_task = asyncio.create_task(self._run_vote_window())
+            self._publish_state()
+            audience = ", ".join(p.display_name for p in self.room.audience())
+            return f"Scene recorded. Voting is now open for {VOTE_WINDOW_SECONDS} seconds for: {audience}. Invite them to vote 1 to 5 in the app, then WAIT. You will be told the result. Do NOT call start_new_round or check_if_done yet."
+        self._publish_state()
+        return f"Scene recorded for {performer.display_name}. You MUST call check_if_done now, and if it returns 'no', you MUST call start_new_round."
 
     @function_tool
     async def check_if_done(self, context: RunContext) -> str:
-        """Check if all rounds are complete. Returns 'yes' if all rounds are done, 'no' if more rounds remain.
-        
-        CRITICAL: This checks the number of COMPLETED rounds in the rounds array. 
-        - You need EXACTLY 3 completed rounds before this returns 'yes'.
-        - After Round 1: returns 'no' (1 completed, need 2 more) → MUST call start_new_round for Round 2
-        - After Round 2: returns 'no' (2 completed, need 1 more) → MUST call start_new_round for Round 3  
-        - After Round 3: returns 'yes' (3 completed, all done) → give closing summary
-        
-        DO NOT end the game unless this returns 'yes'. DO NOT skip rounds. You MUST do Round 1, Round 2, AND Round 3.
+        """Check if every player has performed all their scenes. Returns 'yes' or 'no'.
+
+        DO NOT end the game unless this returns 'yes'.
         """
-        # Check if we've completed all rounds by comparing completed rounds count
-        completed_rounds = len(self.improv_state["rounds"])
-        max_rounds = self.improv_state["max_rounds"]
-        current_round = self.improv_state["current_round"]
-        
-        logger.info(f"Checking if done: {completed_rounds} completed out of {max_rounds} max rounds (current_round={current_round})")
-        
-        # CRITICAL: Only return 'yes' if we have EXACTLY 3 completed rounds
-        # This means: completed_rounds must be exactly 3, not 1, not 2, but 3
-        if completed_rounds == max_rounds:
-            self.improv_state["phase"] = "done"
-            logger.info(f"✅ All rounds complete - game is done ({completed_rounds}/{max_rounds})")
-            return "yes - all 3 rounds complete, you can now give the closing summary"
-        
-        # If we have less than 3 rounds completed, we MUST continue
-        remaining = max_rounds - completed_rounds
-        next_round = completed_rounds + 1
-        
-        # Special check: If we're at Round 2 and trying to end, force Round 3
-        if completed_rounds == 2 and current_round == 2:
-            logger.warning(f"⚠️ Round 2 completed but Round 3 not started! Forcing Round 3.")
-            return f"no - CRITICAL: You have completed 2 rounds but Round 3 is missing! You MUST call start_new_round to start Round 3. DO NOT give closing summary - you must complete Round 3 first."
-        
-        logger.info(f"❌ Not done yet - need {remaining} more round(s). Current round: {current_round}. Next round should be: Round {next_round}. You MUST call start_new_round now.")
-        return f"no - you have completed {completed_rounds} out of {max_rounds} rounds. You need {remaining} more round(s). You MUST call start_new_round to start Round {next_round}. DO NOT give closing summary yet - you must complete Round {next_round} first."
+        if self.room.phase == "voting":
+            return "no - voting is still open. Wait for the voting result."
+        if self.room.is_done():
+            self.room.phase = "done"
+            self._publish_state()
+            logger.info(f"✅ All turns complete - game is done ({self.room.turn_number} turns)")
+            return "yes - every player has finished, you can now give the closing summary"
+        player = self.room.next_performer()
+        remaining = self.room.total_turns() - sum(len(p.rounds) for p in self.room.players.values())
+        logger.info(f"❌ Not done yet - {remaining} turn(s) left, next performer {player.display_name if player else 'none'}")
+        return f"no - {remaining} turn(s) left. You MUST call start_new_round now. DO NOT give closing summary yet."
+
+    @function_tool
+    async def get_leaderboard(self, context: RunContext) -> str:
+        """Get every player's audience score and scenes, best first."""
+        lines = []
+        for rank, player in enumerate(self.room.leaderboard(), start=1):
+            scores = [r["audience_score"] for r in player.rounds if r.get("audience_score") is not None]
+            lines.append(f"{rank}. {player.display_name}: total {player.score:g} over {len(player.rounds)} scene(s), votes per scene {scores}")
+        return "\n".join(lines) or "No players yet"
 
     @function_tool
     async def end_game_early(self, context: RunContext) -> str:
-        """End the game early if the player wants to stop."""
-        self.improv_state["phase"] = "done"
+        """End the game early if the players want to stop."""
+        self.room.phase = "done"
+        if self._voting_task:
+            self._voting_task.cancel()
+        self._publish_state()
         logger.info("Game ended early by player request")
         return "Game ended"
 
 
 def prewarm(proc: JobProcess):
     proc.userdata["vad"] = silero.VAD.load()
+    proc.userdata["scenario_bank"] = ScenarioBank()
+    proc.userdata["room_costs"] = JsonlSink(ROOM_COSTS_FILE)
 
 
 async def entrypoint(ctx: JobContext):
@@ -284,15 +373,8 @@ async def entrypoint(ctx: JobContext):
     logger.info(f"🚀 AGENT ENTRYPOINT CALLED FOR ROOM: {ctx.room.name}")
     logger.info("=" * 80)
 
-    # Initialize game state
-    improv_state: Dict[str, Any] = {
-        "player_name": None,
-        "current_round": 0,
-        "max_rounds": 3,
-        "rounds": [],
-        "phase": "intro",
-        "current_scenario": None,
-    }
+    # Initialize game state shared by every player in the room
+    improv_room = ImprovRoom(rounds_per_player=ROUNDS_PER_PLAYER)
 
     # Check for Google API key
     google_api_key = os.getenv("GOOGLE_API_KEY")
@@ -368,14 +450,62 @@ async def entrypoint(ctx: JobContext):
         logger.error(traceback.format_exc())
 
 
+    room_costs = ctx.proc.userdata["room_costs"]
+
     async def log_usage():
         summary = usage_collector.get_summary()
         logger.info(f"Usage: {summary}")
+        # One pipeline serves the whole room, so cost per player should fall as rooms grow
+        cost = pipeline_cost(summary, len(improv_room.players), improv_room.turn_number)
+        logger.info(f"Pipeline cost for {cost['players']} player(s): {cost['per_player']} per player")
+        room_costs.write({"room": ctx.room.name, **cost})
+        await room_costs.flush()
 
     ctx.add_shutdown_callback(log_usage)
 
+    scenario_bank = ctx.proc.userdata["scenario_bank"]
+
+    async def save_decks():
+        await scenario_bank.save()
+
+    ctx.add_shutdown_callback(save_decks)
+
     # Create the improv host agent
-    agent = ImprovHost(improv_state)
+    agent = ImprovHost(improv_room, scenario_bank)
+
+    def _publish_state(snapshot: dict):
+        payload = json.dumps(snapshot).encode()
+        asyncio.create_task(ctx.room.local_participant.publish_data(payload, reliable=True, topic=STATE_TOPIC))
+
+    agent.add_state_listener(_publish_state)
+
+    def _register(participant: rtc.RemoteParticipant):
+        if participant.kind == rtc.ParticipantKind.PARTICIPANT_KIND_AGENT:
+            return
+        improv_room.join(participant.identity, participant.name)
+        logger.info(f"👋 {participant.identity} joined ({len(improv_room.active_players())} player(s))")
+        agent.relink()
+
+    @ctx.room.on("participant_connected")
+    def _on_participant_connected(participant: rtc.RemoteParticipant):
+        _register(participant)
+
+    @ctx.room.on("participant_disconnected")
+    def _on_participant_disconnected(participant: rtc.RemoteParticipant):
+        logger.info(f"{participant.identity} left the room")
+        agent.on_participant_left(participant.identity)
+
+    # Audience votes arrive as data messages, e.g. {"score": 4}
+    @ctx.room.on("data_received")
+    def _on_data_received(packet: rtc.DataPacket):
+        if packet.topic != VOTE_TOPIC or packet.participant is None:
+            return
+        try:
+            score = int(json.loads(packet.data.decode()).get("score"))
+        except (ValueError, TypeError, AttributeError):
+            logger.warning(f"Ignoring malformed vote from {packet.participant.identity}")
+            return
+        agent.handle_vote(packet.participant.identity, score)
 
     # Start the session
     # Note: Noise cancellation (BVC) requires LiveKit Cloud, so we skip it for local dev
@@ -388,6 +518,8 @@ async def entrypoint(ctx: JobContext):
     logger.info(f"Connecting to room: {ctx.room.name}")
     try:
         await ctx.connect()
+        for participant in ctx.room.remote_participants.values():
+            _register(participant)
         logger.info("✅ Agent successfully connected to room!")
         logger.info("Agent is ready to listen and respond to voice input.")
         logger.info("The agent will respond when the user speaks or speak first based on instructions.")
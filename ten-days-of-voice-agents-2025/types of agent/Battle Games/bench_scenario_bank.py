@@ -0,0 +1,77 @@
+"""Benchmark scenario draws against the old filter-and-choose approach.
+
+Builds a synthetic pack, then times draws for many players and checks that
+no player sees a repeat before their deck is exhausted.
+
+Usage: python bench_scenario_bank.py [num_scenarios] [num_players] [draws_per_player]
+"""
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+from scenario_bank import ScenarioBank
+
+THEMES = ["food", "fantasy", "sci-fi", "animals", "everyday", "workplace"]
+DIFFICULTIES = ["easy", "medium", "hard"]
+
+
+def main():
+    num_scenarios = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000
+    num_players = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    draws = int(sys.argv[3]) if len(sys.argv) > 3 else 200
+    rng = random.Random(3)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        packs_dir = os.path.join(tmp, "packs")
+        os.makedirs(packs_dir)
+        scenarios = [
+            {"id": f"s{i}", "text": f"Scenario {i}", "theme": rng.choice(THEMES), "difficulty": rng.choice(DIFFICULTIES)}
+            for i in range(num_scenarios)
+        ]
+        with open(os.path.join(packs_dir, "synthetic.json"), "w") as f:
+            json.dump({"pack": "synthetic", "scenarios": scenarios}, f)
+
+        start = time.perf_counter()
+        bank = ScenarioBank(packs_dir, os.path.join(tmp, "decks"), seed=1)
+        print(f"Loaded {num_scenarios:,} scenarios in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+        repeats = 0
+        start = time.perf_counter()
+        for p in range(num_players):
+            seen = set()
+            for _ in range(min(draws, num_scenarios)):
+                scenario_id = bank.draw(f"player {p}")["id"]
+                repeats += scenario_id in seen
+                seen.add(scenario_id)
+        elapsed = time.perf_counter() - start
+        total = num_players * min(draws, num_scenarios)
+        print(f"Deck draws: {total:,} in {elapsed:.3f}s  ({elapsed / total * 1e6:.2f} us/draw), repeats: {repeats}")
+
+        theme_total = 10_000
+        start = time.perf_counter()
+        for _ in range(theme_total):
+            bank.draw("player 0", theme="sci-fi", difficulty="hard")
+        elapsed = time.perf_counter() - start
+        print(f"Filtered draws: {elapsed / theme_total * 1e6:.2f} us/draw")
+
+        # Previous approach: rebuild a filtered list on every call and pick at random.
+        texts = [s["text"] for s in scenarios]
+        last = None
+        start = time.perf_counter()
+        for _ in range(2_000):
+            available = [s for s in texts if s != last] or texts
+            last = random.choice(available)
+        elapsed = time.perf_counter() - start
+        print(f"Filter-and-choose: {elapsed / 2_000 * 1e6:.2f} us/draw")
+
+        start = time.perf_counter()
+        asyncio.run(bank.save())
+        print(f"Saved {num_players} players' decks in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
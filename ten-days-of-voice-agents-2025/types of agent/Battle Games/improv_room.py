@@ -0,0 +1,187 @@
+"""Shared state for an Improv Battle room with several participants.
+
+One agent session hosts everyone in the room. Players take turns
+performing; while one performs the others are the audience, and they vote
+1-5 on each scene once the host has reacted.
+"""
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+MIN_VOTE = 1
+MAX_VOTE = 5
+
+
+@dataclass
+class PlayerState:
+    identity: str
+    name: Optional[str] = None
+    rounds: List[dict] = field(default_factory=list)
+    active: bool = True
+    joined_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def display_name(self) -> str:
+        return self.name or self.identity
+
+    @property
+    def score(self) -> float:
+        """Sum of the audience averages for this player's scenes."""
+        return sum(r["audience_score"] for r in self.rounds if r.get("audience_score") is not None)
+
+
+class ImprovRoom:
+    """Turn arbitration, per-player rounds and audience voting for one room.
+
+    Phases: intro -> awaiting_improv -> (voting) -> reacting -> ... -> done.
+    Each active player performs rounds_per_player scenes; the next performer
+    is always an active player with the fewest completed scenes, ties going
+    to whoever joined first.
+    """
+
+    def __init__(self, rounds_per_player: int = 3):
+        self.rounds_per_player = rounds_per_player
+        self.players: Dict[str, PlayerState] = {}
+        self.phase = "intro"
+        self.performer: Optional[str] = None
+        self.current_scenario: Optional[str] = None
+        self.scenario_ids: List[str] = []
+        self.turn_number = 0
+        self.votes: Dict[str, int] = {}
+        self._pending_round: Optional[dict] = None
+
+    # --------------------------
+    #       PARTICIPANTS
+    # --------------------------
+
+    def join(self, identity: str, name: Optional[str] = None) -> PlayerState:
+        player = self.players.get(identity)
+        if player is None:
+            player = self.players[identity] = PlayerState(identity=identity, name=name or None)
+        else:
+            player.active = True
+            player.name = player.name or name or None
+        return player
+
+    def leave(self, identity: str) -> bool:
+        """Marks a player inactive. Returns True if they were the current performer."""
+        player = self.players.get(identity)
+        if player is None:
+            return False
+        player.active = False
+        self.votes.pop(identity, None)
+        if identity == self.performer and self.phase == "awaiting_improv":
+            # The abandoned scene does not count as a turn
+            self.turn_number -= 1
+            self.performer = None
+            self.current_scenario = None
+            self.phase = "reacting"
+            return True
+        return False
+
+    def set_name(self, identity: str, name: str) -> PlayerState:
+        player = self.join(identity)
+        player.name = name
+        return player
+
+    def active_players(self) -> List[PlayerState]:
+        return [p for p in self.players.values() if p.active]
+
+    def audience(self) -> List[PlayerState]:
+        return [p for p in self.active_players() if p.identity != self.performer]
+
+    # --------------------------
+    #       TURNS
+    # --------------------------
+
+    def total_turns(self) -> int:
+        return sum(len(p.rounds) for p in self.players.values()) + sum(
+            max(0, self.rounds_per_player - len(p.rounds)) for p in self.active_players()
+        )
+
+    def next_performer(self) -> Optional[PlayerState]:
+        waiting = [p for p in self.active_players() if len(p.rounds) < self.rounds_per_player]
+        if not waiting:
+            return None
+        return min(waiting, key=lambda p: (len(p.rounds), p.joined_at))
+
+    def start_turn(self, player: PlayerState, scenario: dict):
+        self.turn_number += 1
+        self.performer = player.identity
+        self.current_scenario = scenario["text"]
+        self.scenario_ids.append(scenario["id"])
+        self.votes = {}
+        self.phase = "awaiting_improv"
+
+    def complete_turn(self, reaction: str) -> dict:
+        """Records the host's reaction. Opens voting when there is an audience."""
+        player = self.players[self.performer]
+        self._pending_round = {
+            "round": len(player.rounds) + 1,
+            "turn": self.turn_number,
+            "scenario": self.current_scenario or "",
+            "host_reaction": reaction,
+            "votes": {},
+            "audience_score": None,
+        }
+        if self.audience():
+            self.phase = "voting"
+        else:
+            self._finish_round()
+        return self._pending_round
+
+    def cast_vote(self, voter: str, score: int) -> Optional[str]:
+        """Records one audience vote. Returns an error message, or None if accepted."""
+        if self.phase != "voting":
+            return "Voting is not open"
+        if voter == self.performer:
+            return "Performers cannot vote on their own scene"
+        player = self.players.get(voter)
+        if player is None or not player.active:
+            return "Only players in the room can vote"
+        if not MIN_VOTE <= score <= MAX_VOTE:
+            return f"Votes must be between {MIN_VOTE} and {MAX_VOTE}"
+        self.votes[voter] = score
+        return None
+
+    def all_votes_in(self) -> bool:
+        return all(p.identity in self.votes for p in self.audience())
+
+    def close_voting(self) -> dict:
+        """Tallies the votes into the performer's round and returns it."""
+        if self.phase == "voting":
+            self._finish_round()
+        return self._pending_round or {}
+
+    def _finish_round(self):
+        round_data = self._pending_round
+        if self.votes:
+            round_data["votes"] = {self.players[v].display_name: s for v, s in self.votes.items()}
+            round_data["audience_score"] = round(sum(self.votes.values()) / len(self.votes), 2)
+        player = self.players.get(self.performer)
+        if player is not None:
+            player.rounds.append(round_data)
+        self.votes = {}
+        self.phase = "reacting"
+
+    def is_done(self) -> bool:
+        return self.turn_number > 0 and self.next_performer() is None and self.phase != "voting"
+
+    # --------------------------
+    #       REPORTING
+    # --------------------------
+
+    def leaderboard(self) -> List[PlayerState]:
+        return sorted(self.players.values(), key=lambda p: (-p.score, p.joined_at))
+
+    def describe(self) -> str:
+        performer = self.players.get(self.performer) if self.performer else None
+        standings = ", ".join(
+            f"{p.display_name}: {len(p.rounds)}/{self.rounds_per_player} scenes, score {p.score:g}"
+            + ("" if p.active else " (left)")
+            for p in self.leaderboard()
+        )
+        return (
+            f"Phase: {self.phase}, Turn: {self.turn_number}/{self.total_turns()}, "
+            f"Performer: {performer.display_name if performer else 'none'}, Players: {standings or 'none yet'}"
+        )
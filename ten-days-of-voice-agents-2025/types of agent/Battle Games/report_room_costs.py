@@ -0,0 +1,41 @@
+"""Summarizes pipeline cost per player by room size from room_costs.jsonl.
+
+Every finished game appends one record (see pipeline_cost in agent.py).
+
+Usage: python report_room_costs.py [room_costs.jsonl]
+"""
+import json
+import os
+import sys
+from collections import defaultdict
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+FIELDS = ("llm_prompt_tokens", "llm_completion_tokens", "tts_characters", "tts_audio_seconds", "stt_audio_seconds")
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(SCRIPT_DIR, "room_costs.jsonl")
+    by_size = defaultdict(list)
+    with open(path, "r") as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                if record.get("players"):
+                    by_size[record["players"]].append(record)
+
+    print(f"{'players':>7} {'rooms':>5} " + " ".join(f"{field:>22}" for field in FIELDS))
+    baseline = None
+    for size in sorted(by_size):
+        records = by_size[size]
+        means = [sum(r["per_player"][field] for r in records) / len(records) for field in FIELDS]
+        baseline = baseline or means
+        cells = [
+            f"{mean:>12,.1f} ({mean / base:>4.0%})" if base else f"{mean:>22,.1f}"
+            for mean, base in zip(means, baseline)
+        ]
+        print(f"{size:>7} {len(records):>5} " + " ".join(f"{cell:>22}" for cell in cells))
+    print("Per-player means; percentages are relative to the smallest room size.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""Improv scenario bank backed by on-disk scenario packs.
+
+Packs are JSON files in scenario_packs/, either a bare list of scenarios or
+{"pack": name, "scenarios": [...]}. Each scenario has a "text" and may carry
+an "id", "theme" and "difficulty".
+
+Every player gets a shuffled deck per (theme, difficulty) pool, so nobody
+sees a scenario twice until they have been through the whole pool. Decks
+are saved to player_decks/<player>.json and picked up in the next game.
+"""
+import asyncio
+import glob
+import json
+import logging
+import os
+import random
+import re
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger("scenario-bank")
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PACKS_DIR = os.path.join(SCRIPT_DIR, "scenario_packs")
+DECKS_DIR = os.path.join(SCRIPT_DIR, "player_decks")
+
+ANY = "*"
+DEFAULT_THEME = "general"
+DEFAULT_DIFFICULTY = "medium"
+
+
+def player_key(name: Optional[str]) -> str:
+    """File-safe key for a player name, e.g. 'Mary Jane!' -> 'mary-jane'."""
+    return re.sub(r"[^a-z0-9]+", "-", (name or "").lower()).strip("-") or "guest"
+
+
+class ScenarioDeck:
+    """Lazily shuffled deck over a pool of scenario indices.
+
+    draw() performs a single Fisher-Yates step, so each draw is O(1) and the
+    order is never rebuilt. When the pool runs out a new pass starts, and its
+    first card is never the one that ended the previous pass.
+    """
+
+    def __init__(self, pool: Sequence[int], drawn: Sequence[int] = (), passes: int = 0):
+        drawn_set = set(drawn)
+        # Already-drawn cards sit before pos; the rest follow in pool order.
+        self.order = list(drawn) + [i for i in pool if i not in drawn_set]
+        self.pos = len(drawn)
+        self.passes = passes
+
+    def draw(self, rng: random.Random) -> int:
+        order = self.order
+        n = len(order)
+        low = self.pos
+        high = n
+        if low >= n:
+            self.pos = low = 0
+            self.passes += 1
+            if n > 1:
+                high = n - 1  # order[-1] was the last card of the previous pass
+        j = rng.randrange(low, high)
+        order[low], order[j] = order[j], order[low]
+        self.pos += 1
+        return order[low]
+
+    def drawn(self) -> List[int]:
+        return self.order[: self.pos]
+
+
+class ScenarioBank:
+    def __init__(self, packs_dir: str = PACKS_DIR, decks_dir: Optional[str] = DECKS_DIR, seed: Optional[int] = None):
+        self.packs_dir = packs_dir
+        self.decks_dir = decks_dir
+        self._rng = random.Random(seed)
+        self.scenarios: List[dict] = []
+        self._index_by_id: Dict[str, int] = {}
+        # (theme or ANY, difficulty or ANY) -> scenario indices; built once at load.
+        self._pools: Dict[Tuple[str, str], List[int]] = {}
+        # player key -> pool key -> deck
+        self._decks: Dict[str, Dict[str, ScenarioDeck]] = {}
+        self._dirty = set()
+        self.load_packs()
+
+    # --------------------------
+    #       PACKS
+    # --------------------------
+
+    def load_packs(self):
+        scenarios = []
+        seen_ids = set()
+        for path in sorted(glob.glob(os.path.join(self.packs_dir, "*.json"))):
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            pack = os.path.splitext(os.path.basename(path))[0]
+            entries = data if isinstance(data, list) else data.get("scenarios", [])
+            if isinstance(data, dict):
+                pack = data.get("pack", pack)
+            for n, entry in enumerate(entries, start=1):
+                if isinstance(entry, str):
+                    entry = {"text": entry}
+                text = (entry.get("text") or "").strip()
+                if not text:
+                    continue
+                scenario_id = entry.get("id") or f"{pack}-{n}"
+                if scenario_id in seen_ids:
+                    logger.warning(f"Skipping duplicate scenario id {scenario_id} in {path}")
+                    continue
+                seen_ids.add(scenario_id)
+                scenarios.append({
+                    "id": scenario_id,
+                    "text": text,
+                    "theme": (entry.get("theme") or DEFAULT_THEME).lower(),
+                    "difficulty": (entry.get("difficulty") or DEFAULT_DIFFICULTY).lower(),
+                    "pack": pack,
+                })
+        if not scenarios:
+            raise ValueError(f"No improv scenarios found in {self.packs_dir}")
+
+        self.scenarios = scenarios
+        self._index_by_id = {s["id"]: i for i, s in enumerate(scenarios)}
+        pools: Dict[Tuple[str, str], List[int]] = {}
+        for i, s in enumerate(scenarios):
+            for key in ((ANY, ANY), (s["theme"], ANY), (ANY, s["difficulty"]), (s["theme"], s["difficulty"])):
+                pools.setdefault(key, []).append(i)
+        self._pools = pools
+        # Decks index into the old scenario list, so they are rebuilt from saved ids on next use.
+        self._decks.clear()
+        logger.info(f"Loaded {len(scenarios)} improv scenarios from {self.packs_dir}")
+
+    def themes(self) -> List[str]:
+        return sorted(theme for theme, difficulty in self._pools if theme != ANY and difficulty == ANY)
+
+    def difficulties(self) -> List[str]:
+        return sorted(difficulty for theme, difficulty in self._pools if theme == ANY and difficulty != ANY)
+
+    # --------------------------
+    #       DRAWS
+    # --------------------------
+
+    def draw(
+        self,
+        player: Optional[str],
+        theme: Optional[str] = None,
+        difficulty: Optional[str] = None,
+        exclude: Iterable[str] = (),
+    ) -> Optional[dict]:
+        """Draws the player's next scenario from the matching pool.
+
+        Returns None when no scenario matches the theme and difficulty.
+        Scenario ids in exclude (e.g. earlier rounds of this game) are
+        skipped when the pool has anything else left.
+        """
+        pool_key = ((theme or ANY).lower(), (difficulty or ANY).lower())
+        pool = self._pools.get(pool_key)
+        if not pool:
+            return None
+        key = player_key(player)
+        deck = self._player_decks(key).get("|".join(pool_key))
+        if deck is None:
+            deck = self._decks[key]["|".join(pool_key)] = ScenarioDeck(pool)
+        exclude = set(exclude)
+        index = deck.draw(self._rng)
+        for _ in range(min(len(exclude), len(pool) - 1)):
+            if self.scenarios[index]["id"] not in exclude:
+                break
+            index = deck.draw(self._rng)
+        self._dirty.add(key)
+        return dict(self.scenarios[index])
+
+    # --------------------------
+    #       PERSISTENCE
+    # --------------------------
+
+    def _deck_path(self, key: str) -> str:
+        return os.path.join(self.decks_dir, f"{key}.json")
+
+    def _player_decks(self, key: str) -> Dict[str, ScenarioDeck]:
+        decks = self._decks.get(key)
+        if decks is None:
+            decks = self._decks[key] = self._read_player(key)
+        return decks
+
+    def _read_player(self, key: str) -> Dict[str, ScenarioDeck]:
+        if not self.decks_dir or not os.path.exists(self._deck_path(key)):
+            return {}
+        try:
+            with open(self._deck_path(key), "r", encoding="utf-8") as f:
+                saved = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.error(f"Could not read scenario decks for {key}: {e}")
+            return {}
+        decks = {}
+        for pool_name, state in saved.get("decks", {}).items():
+            pool = self._pools.get(tuple(pool_name.split("|", 1)))
+            if not pool:
+                continue
+            # Scenarios removed from the packs since the last game are dropped.
+            pool_set = set(pool)
+            drawn = [self._index_by_id[i] for i in state.get("drawn", []) if self._index_by_id.get(i) in pool_set]
+            decks[pool_name] = ScenarioDeck(pool, drawn, state.get("passes", 0))
+        return decks
+
+    def _write_player(self, key: str, payload: dict):
+        os.makedirs(self.decks_dir, exist_ok=True)
+        path = self._deck_path(key)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(payload, f)
+        os.replace(tmp_path, path)
+
+    async def save(self):
+        """Writes decks of players who drew since the last save, off the event loop."""
+        if not self.decks_dir:
+            return
+        dirty, self._dirty = self._dirty, set()
+        for key in dirty:
+            payload = {
+                "decks": {
+                    pool_name: {"drawn": [self.scenarios[i]["id"] for i in deck.drawn()], "passes": deck.passes}
+                    for pool_name, deck in self._decks.get(key, {}).items()
+                }
+            }
+            try:
+                await asyncio.to_thread(self._write_player, key, payload)
+            except OSError as e:
+                self._dirty.add(key)
+                logger.error(f"Could not save scenario decks for {key}: {e}")
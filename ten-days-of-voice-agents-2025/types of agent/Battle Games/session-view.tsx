@@ -3,6 +3,7 @@
 import { useEffect, useRef, useState } from 'react';
 import { motion } from 'framer-motion'; // Using framer-motion to avoid errors
 import { useRoomContext, useRemoteParticipants } from '@livekit/components-react';
+import { RoomEvent } from 'livekit-client';
 import {
   MicrophoneIcon,
   MicrophoneSlashIcon,
@@ -15,6 +16,17 @@ import { useDebugMode } from '@/hooks/useDebug';
 import { cn } from '@/lib/utils';
 
 const IN_DEVELOPMENT = process.env.NODE_ENV !== 'production';
+const STATE_TOPIC = 'improv-state';
+const VOTE_TOPIC = 'improv-vote';
+
+interface RoomState {
+  phase: string;
+  turn: number;
+  total_turns: number;
+  performer: string | null;
+  performer_name: string | null;
+  scenario: string | null;
+}
 
 interface SessionViewProps {
   appConfig: AppConfig;
@@ -35,6 +47,34 @@ export const SessionView = ({ appConfig, onAnimationComplete }: SessionViewProps
   const [maxRounds] = useState(3);
   const [currentScenario, setCurrentScenario] = useState<string | null>(null);
   const [isHostSpeaking, setIsHostSpeaking] = useState(false);
+  const [roomState, setRoomState] = useState<RoomState | null>(null);
+  const [myVote, setMyVote] = useState<number | null>(null);
+
+  // Authoritative game state published by the host agent
+  useEffect(() => {
+    const decoder = new TextDecoder();
+    const onData = (payload: Uint8Array, _participant?: unknown, _kind?: unknown, topic?: string) => {
+      if (topic !== STATE_TOPIC) return;
+      const state = JSON.parse(decoder.decode(payload)) as RoomState;
+      setRoomState((previous) => {
+        if (!previous || previous.turn !== state.turn) setMyVote(null);
+        return state;
+      });
+    };
+    room.on(RoomEvent.DataReceived, onData);
+    return () => {
+      room.off(RoomEvent.DataReceived, onData);
+    };
+  }, [room]);
+
+  const canVote =
+    roomState?.phase === 'voting' && roomState.performer !== room.localParticipant.identity && myVote === null;
+
+  const castVote = async (score: number) => {
+    const payload = new TextEncoder().encode(JSON.stringify({ score }));
+    await room.localParticipant.publishData(payload, { reliable: true, topic: VOTE_TOPIC });
+    setMyVote(score);
+  };
 
   // Check if host is speaking (agent participant)
   const agentParticipant = participants.find((p) => p.isAgent);
@@ -134,7 +174,11 @@ export const SessionView = ({ appConfig, onAnimationComplete }: SessionViewProps
                   <span className="text-sm font-medium text-white/60">{getPhaseLabel()}</span>
                 </div>
                 <h2 className="mb-1 text-2xl font-bold text-white">
-                  {currentRound > 0 ? `Round ${currentRound} of ${maxRounds}` : 'Improv Battle'}
+                  {roomState && roomState.turn > 0
+                    ? `Turn ${roomState.turn} of ${roomState.total_turns}: ${roomState.performer_name}`
+                    : currentRound > 0
+                    ? `Round ${currentRound} of ${maxRounds}`
+                    : 'Improv Battle'}
                 </h2>
                 {currentScenario && (
                   <p className="text-sm text-white/80 line-clamp-2">{currentScenario}</p>
@@ -214,6 +258,27 @@ export const SessionView = ({ appConfig, onAnimationComplete }: SessionViewProps
                 <div className="rounded-full bg-white/10 px-4 py-2">
                   <span className="text-xs font-medium text-white/80">{getPhaseLabel()}</span>
                 </div>
+
+                {/* Audience vote */}
+                {canVote && (
+                  <div className="flex items-center gap-2">
+                    <span className="text-xs font-medium text-white/60">Rate the scene</span>
+                    {[1, 2, 3, 4, 5].map((score) => (
+                      <motion.button
+                        key={score}
+                        whileHover={{ scale: 1.05 }}
+                        whileTap={{ scale: 0.95 }}
+                        onClick={() => castVote(score)}
+                        className="flex h-9 w-9 items-center justify-center rounded-full bg-orange-500/20 text-sm font-semibold text-orange-300 hover:bg-orange-500/30"
+                      >
+                        {score}
+                      </motion.button>
+                    ))}
+                  </div>
+                )}
+                {myVote !== null && roomState?.phase === 'voting' && (
+                  <span className="text-xs font-medium text-white/60">You voted {myVote}</span>
+                )}
               </div>
 
               <div className="flex items-center gap-3">
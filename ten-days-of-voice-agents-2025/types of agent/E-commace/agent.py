@@ -4,6 +4,7 @@ import json
 import logging
 import os
 import asyncio
+import sys
 import uuid
 from dataclasses import dataclass, field
 from datetime import datetime
@@ -37,6 +38,9 @@ logger.addHandler(handler)
 
 load_dotenv(".env.local")
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from order_ids import new_order_id
+
 # -------------------------
 # Simple Product Catalog (Yogi)
 # -------------------------
@@ -551,7 +555,7 @@ def create_order_object(line_items: List[Dict], currency: str = "INR") -> Dict:
             "attrs": li.get("attrs", {}),
         })
     order = {
-        "id": f"order-{str(uuid.uuid4())[:8]}",
+        "id": new_order_id("order"),
         "items": items,
         "total": total,
         "currency": currency,
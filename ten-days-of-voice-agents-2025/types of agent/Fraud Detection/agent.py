@@ -1,6 +1,9 @@
 import logging
+import os
+import sys
 
 from dotenv import load_dotenv
+from livekit import api
 from livekit.agents import (
     Agent,
     AgentSession,
@@ -19,303 +22,26 @@ from livekit.plugins import murf, silero, google, deepgram, noise_cancellation
 from livekit.plugins.turn_detector.multilingual import MultilingualModel
 
 import json
-from typing import Literal
+from typing import Literal, Optional
 
-logger = logging.getLogger("agent")
+from campaign_dispatch import campaign_agent_name
+from case_store import MIN_NAME_MATCH_SCORE, FraudCaseStore, normalize_name
+from name_matching import name_similarity
 
-load_dotenv(".env.local")
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+OUTCOME_LOG_FILE = os.path.join(SCRIPT_DIR, "logger.json")
+# Outbound SIP trunk the campaign's calls are placed through
+SIP_OUTBOUND_TRUNK_ID = os.getenv("SIP_OUTBOUND_TRUNK_ID", "")
+
+sys.path.insert(0, os.path.dirname(SCRIPT_DIR))
+from jsonl_sink import JsonlSink
 
-# MOCK DATABASE: Multiple Fraud Cases (Total 20)
-# Key is normalized to lowercase first name for simple lookup.
-FRAUD_CASES = {
-    # Existing Cases (Shadow, Luna, Ravi)
-    "shadow": { 
-        "case_id": "FRD-9876",
-        "customer_name": "Shadow",
-        "security_identifier": "ID-421A",
-        "masked_card": "**** 9012",
-        "transaction_amount": "452.99",
-        "merchant_name": "ElectroGadget Inc.",
-        "location": "New Delhi, India",
-        "timestamp": "Nov 26, 2025, 2:30 PM IST",
-        "security_question": "What city were you born in?",
-        "security_answer": "surat", 
-        "status": "pending_review",
-        "outcome_note": ""
-    },
-    "luna": {
-        "case_id": "FRD-1024",
-        "customer_name": "Luna",
-        "security_identifier": "ID-555B",
-        "masked_card": "**** 4321",
-        "transaction_amount": "1,200.00",
-        "merchant_name": "SkyTravel Agency",
-        "location": "New York, USA",
-        "timestamp": "Nov 26, 2025, 8:00 AM EST",
-        "security_question": "What is the name of your first pet?",
-        "security_answer": "mittens", 
-        "status": "pending_review",
-        "outcome_note": ""
-    },
-    "ravi": {
-        "case_id": "FRD-7777",
-        "customer_name": "Ravi Sharma",
-        "security_identifier": "ID-300C",
-        "masked_card": "**** 6789",
-        "transaction_amount": "150.50",
-        "merchant_name": "Local Grocery Store",
-        "location": "Mumbai, India",
-        "timestamp": "Nov 25, 2025, 7:15 PM IST",
-        "security_question": "What is the last four digits of your registered phone number?",
-        "security_answer": "5432", 
-        "status": "pending_review",
-        "outcome_note": ""
-    },
-    # Existing Cases (Gambit to Isagi)
-    "gambit": { 
-        "case_id": "FRD-3333",
-        "customer_name": "Gambit LeBeau",
-        "security_identifier": "ID-123G",
-        "masked_card": "**** 2222",
-        "transaction_amount": "250.00",
-        "merchant_name": "Rare Card Emporium",
-        "location": "New Orleans, USA",
-        "timestamp": "Nov 26, 2025, 1:00 PM CST",
-        "security_question": "What is your favorite color?",
-        "security_answer": "black", 
-        "status": "pending_review",
-        "outcome_note": ""
-    },
-    "dark": { 
-        "case_id": "FRD-4444",
-        "customer_name": "Dark Schneider",
-        "security_identifier": "ID-456D",
-        "masked_card": "**** 1111",
-        "transaction_amount": "8000.00",
-        "merchant_name": "Magical Artifacts Ltd.",
-        "location": "Tokyo, Japan",
-        "timestamp": "Nov 26, 2025, 10:00 AM JST",
-        "security_question": "What is your birth month?",
-        "security_answer": "august", 
-        "status": "pending_review",
-        "outcome_note": ""
-    },
-    "naruto": { 
-        "case_id": "FRD-5555",
-        "customer_name": "Naruto Uzumaki",
-        "security_identifier": "ID-789N",
-        "masked_card": "**** 5555",
-        "transaction_amount": "14.99",
-        "merchant_name": "Ramen Shop Konoha",
-        "location": "Los Angeles, USA",
-        "timestamp": "Nov 26, 2025, 9:00 PM PST",
-        "security_question": "What is your favorite food?",
-        "security_answer": "ramen", 
-        "status": "pending_review",
-        "outcome_note": ""
-    },
-    "jinwoo": { 
-        "case_id": "FRD-6666",
-        "customer_name": "Jinwoo Sung",
-        "security_identifier": "ID-012J",
-        "masked_card": "**** 6666",
-        "transaction_amount": "5000.00",
-        "merchant_name": "Hunter Association Gear",
-        "location": "Seoul, South Korea",
-        "timestamp": "Nov 26, 2025, 3:30 PM KST",
-        "security_question": "What is your rank?",
-        "security_answer": "s", 
-        "status": "pending_review",
-        "outcome_note": ""
-    },
-    "rimaru": { 
-        "case_id": "FRD-7778",
-        "customer_name": "Rimaru Tempest",
-        "security_identifier": "ID-345R",
-        "masked_card": "**** 7777",
-        "transaction_amount": "1500.00",
-        "merchant_name": "Slime Labs Research",
-        "location": "Singapore",
-        "timestamp": "Nov 26, 2025, 5:00 PM SGT",
-        "security_question": "What is your original name?",
-        "security_answer": "satoru", 
-        "status": "pending_review",
-        "outcome_note": ""
-    },
-    "noir": { 
-        "case_id": "FRD-8888",
-        "customer_name": "Noir",
-        "security_identifier": "ID-678N",
-        "masked_card": "**** 8888",
-        "transaction_amount": "100.00",
-        "merchant_name": "Assassin's Guild Supplies",
-        "location": "London, UK",
-        "timestamp": "Nov 26, 2025, 11:00 AM GMT",
-        "security_question": "What is the last four digits of your social security number?",
-        "security_answer": "9876", 
-        "status": "pending_review",
-        "outcome_note": ""
-    },
-    "diablo": { 
-        "case_id": "FRD-9999",
-        "customer_name": "Diablo",
-        "security_identifier": "ID-901D",
-        "masked_card": "**** 9999",
-        "transaction_amount": "666.00",
-        "merchant_name": "Demonic Investments Corp",
-        "location": "Frankfurt, Germany",
-        "timestamp": "Nov 26, 2025, 2:00 PM CET",
-        "security_question": "What is your true title?",
-        "security_answer": "demon", 
-        "status": "pending_review",
-        "outcome_note": ""
-    },
-    "luffy": { 
-        "case_id": "FRD-1111",
-        "customer_name": "Monkey D. Luffy",
-        "security_identifier": "ID-234L",
-        "masked_card": "**** 1010",
-        "transaction_amount": "10.00",
-        "merchant_name": "Meat Market Paradise",
-        "location": "Paris, France",
-        "timestamp": "Nov 26, 2025, 1:30 PM CET",
-        "security_question": "What is your main goal?",
-        "security_answer": "pirate king", 
-        "status": "pending_review",
-        "outcome_note": ""
-    },
-    "goku": { 
-        "case_id": "FRD-2222",
-        "customer_name": "Son Goku",
-        "security_identifier": "ID-567G",
-        "masked_card": "**** 2020",
-        "transaction_amount": "20.00",
-        "merchant_name": "World Martial Arts",
-        "location": "Toronto, Canada",
-        "timestamp": "Nov 26, 2025, 4:00 PM EST",
-        "security_question": "What is your first martial arts teacher's name?",
-        "security_answer": "roshi", 
-        "status": "pending_review",
-        "outcome_note": ""
-    },
-    "ichigo": { 
-        "case_id": "FRD-3334",
-        "customer_name": "Ichigo Kurosaki",
-        "security_identifier": "ID-890I",
-        "masked_card": "**** 3030",
-        "transaction_amount": "300.00",
-        "merchant_name": "Soul Society Gear",
-        "location": "New York, USA",
-        "timestamp": "Nov 26, 2025, 12:00 PM EST",
-        "security_question": "What is your favorite drink?",
-        "security_answer": "orange soda", 
-        "status": "pending_review",
-        "outcome_note": ""
-    },
-    "hetvi": { 
-        "case_id": "FRD-4445",
-        "customer_name": "Hetvi",
-        "security_identifier": "ID-112A",
-        "masked_card": "**** 4040",
-        "transaction_amount": "5.00",
-        "merchant_name": "Clovers General Store",
-        "location": "jaipur,Rajsthan",
-        "timestamp": "Nov 26, 2025, 10:00 AM CET",
-        "security_question": "What is the color of your cloak?",
-        "security_answer": "black", 
-        "status": "pending_review",
-        "outcome_note": ""
-    },
-    "aryan": { 
-        "case_id": "FRD-5556",
-        "customer_name": "Aryan",
-        "security_identifier": "ID-334Y",
-        "masked_card": "**** 5050",
-        "transaction_amount": "50.00",
-        "merchant_name": "Blue Lock Football",
-        "location": "Berlin, Germany",
-        "timestamp": "Nov 26, 2025, 3:00 PM CET",
-        "security_question": "What is your primary weapon?",
-        "security_answer": "ego", 
-        "status": "pending_review",
-        "outcome_note": ""
-    },
-    # New Female Character Cases
-    "hinata": { 
-        "case_id": "FRD-6060",
-        "customer_name": "Hinata Hyuga",
-        "security_identifier": "ID-6060H",
-        "masked_card": "**** 6060",
-        "transaction_amount": "55.00",
-        "merchant_name": "Ninja Tool Shop",
-        "location": "Konoha, Japan",
-        "timestamp": "Nov 26, 2025, 6:00 AM JST",
-        "security_question": "What is your clan symbol?",
-        "security_answer": "byakugan", 
-        "status": "pending_review",
-        "outcome_note": ""
-    },
-    "shinobu": { 
-        "case_id": "FRD-7070",
-        "customer_name": "Shinobu Kocho",
-        "security_identifier": "ID-7070S",
-        "masked_card": "**** 7070",
-        "transaction_amount": "150.00",
-        "merchant_name": "Wisteria Pharmaceuticals",
-        "location": "Kyoto, Japan",
-        "timestamp": "Nov 26, 2025, 1:00 PM JST",
-        "security_question": "What color is your hair?",
-        "security_answer": "black", 
-        "status": "pending_review",
-        "outcome_note": ""
-    },
-    "mitsuri": { 
-        "case_id": "FRD-8080",
-        "customer_name": "Mitsuri Kanroji",
-        "security_identifier": "ID-8080M",
-        "masked_card": "**** 8080",
-        "transaction_amount": "25.00",
-        "merchant_name": "Sweets and Tea House",
-        "location": "Paris, France",
-        "timestamp": "Nov 26, 2025, 4:00 PM CET",
-        "security_question": "What is your favorite food?",
-        "security_answer": "sakura mochi", 
-        "status": "pending_review",
-        "outcome_note": ""
-    },
-    "makima": { 
-        "case_id": "FRD-9090",
-        "customer_name": "Makima",
-        "security_identifier": "ID-9090K",
-        "masked_card": "**** 9090",
-        "transaction_amount": "900.00",
-        "merchant_name": "Public Safety HQ",
-        "location": "Berlin, Germany",
-        "timestamp": "Nov 26, 2025, 11:00 AM CET",
-        "security_question": "What is your true identity?",
-        "security_answer": "control devil", 
-        "status": "pending_review",
-        "outcome_note": ""
-    },
-    "mikasa": { 
-        "case_id": "FRD-1313",
-        "customer_name": "Mikasa Ackerman",
-        "security_identifier": "ID-1313A",
-        "masked_card": "**** 1313",
-        "transaction_amount": "300.00",
-        "merchant_name": "ODM Gear Maintenance",
-        "location": "London, UK",
-        "timestamp": "Nov 26, 2025, 9:00 AM GMT",
-        "security_question": "What is the color of your scarf?",
-        "security_answer": "red", 
-        "status": "pending_review",
-        "outcome_note": ""
-    },
-}
+logger = logging.getLogger("agent")
 
+load_dotenv(".env.local")
 
 class Assistant(Agent):
-    def __init__(self) -> None:
+    def __init__(self, case_store: FraudCaseStore, outcome_sink: JsonlSink, dialed_case: Optional[dict] = None) -> None:
         super().__init__(
             instructions="""You are an extremely precise and professional Fraud Detection Representative for OmniBank. Your single purpose is to resolve a single suspicious transaction with the customer.
             The user is interacting with you via voice.
@@ -336,6 +62,10 @@ class Assistant(Agent):
         # FIX: Initializing a state dictionary directly on the Assistant instance (self)
         # to bypass the RunContext.run_state attribute error.
         self.user_session_data = {}
+        self.case_store = case_store
+        self.outcome_sink = outcome_sink
+        # Set on campaign calls: the case this call was placed for
+        self.dialed_case = dialed_case
 
     @function_tool
     async def load_fraud_case(self, context: RunContext, username: str) -> str:
@@ -349,24 +79,19 @@ class Assistant(Agent):
         Returns:
             A JSON string containing the case details and the security question, or an error message.
         """
-        # Normalize and split all input words from the transcription for robust lookup
-        input_words = [word.strip() for word in username.lower().split() if word.strip()]
-        
-        found_key = None
-        # Check if any word in the user's spoken name matches a key in the database
-        for word in input_words:
-            if word in FRAUD_CASES:
-                found_key = word
-                break
+        if self.dialed_case:
+            # A campaign call is about one case: the name only has to confirm we reached its customer
+            score = name_similarity(normalize_name(username), self.dialed_case["name_key"])
+            case = self.case_store.get(self.dialed_case["case_id"]) if score >= MIN_NAME_MATCH_SCORE else None
+        else:
+            # Exact full name first, then the phonetic index absorbs STT misspellings ('Ravee', 'Mikassa')
+            case = self.case_store.find_by_name(username)
         
-        if found_key:
-            user_key = found_key
-            
-            # We fetch the specific case for the user
-            case = FRAUD_CASES[user_key].copy()
-            
+        if case:
             # FIX: Storing state on the Assistant instance (self.user_session_data)
-            self.user_session_data["current_user_key"] = user_key
+            self.user_session_data["current_case_id"] = case["case_id"]
+            # Version seen at load time; the final status update only applies if nobody changed the case since
+            self.user_session_data["current_case_version"] = case["version"]
             
             # Prepare data to be visible to the LLM for conversation framing
             details = {
@@ -403,14 +128,14 @@ class Assistant(Agent):
             A string indicating if verification passed or failed, and the transaction details if passed.
         """
         # FIX: Getting state from the Assistant instance
-        user_key = self.user_session_data.get("current_user_key")
+        case_id = self.user_session_data.get("current_case_id")
+        case_details = self.case_store.get(case_id) if case_id else None
         
-        if not user_key or user_key not in FRAUD_CASES:
+        if not case_details:
             # FIX: Setting state on the Assistant instance
             self.user_session_data["verification_failed"] = True
             return "Internal Error: Unable to verify account details."
             
-        case_details = FRAUD_CASES[user_key]
         # We store the security answer in the database in lowercase, so we normalize the user's response for comparison
         expected_answer = case_details["security_answer"].strip().lower()
 
@@ -433,7 +158,7 @@ class Assistant(Agent):
     @function_tool
     async def confirm_transaction(self, context: RunContext, is_legitimate: Literal["yes", "no"]) -> str:
         """
-        Updates the fraud case status in the mock database and provides the final action to read back to the user.
+        Updates the fraud case status in the case store and provides the final action to read back to the user.
         The agent MUST call this tool after the user confirms or denies the transaction.
 
         Args:
@@ -443,11 +168,11 @@ class Assistant(Agent):
             A string describing the final action taken.
         """
         # FIX: Getting state from the Assistant instance
-        user_key = self.user_session_data.get("current_user_key")
-        if not user_key or user_key not in FRAUD_CASES:
+        case_id = self.user_session_data.get("current_case_id")
+        case = self.case_store.get(case_id) if case_id else None
+        if not case:
             return "I'm sorry, an issue occurred with your case details. Please call our main fraud line for assistance."
             
-        case_id = FRAUD_CASES[user_key]["case_id"]
         status_to_update = "processing_error"
         outcome_note_to_update = "Processing failed."
         action_taken_message = "I'm sorry, an issue occurred while processing your request. Please call our main fraud line for assistance."
@@ -461,31 +186,38 @@ class Assistant(Agent):
             outcome_note_to_update = "Customer denied transaction. Card blocked and dispute raised (mock)."
             action_taken_message = "Thank you for confirming. The transaction has been marked as fraudulent. We have immediately blocked your card and initiated a dispute. A new card will be sent to you in 3-5 business days."
         
-        # Mock database update
-        FRAUD_CASES[user_key]["status"] = status_to_update
-        FRAUD_CASES[user_key]["outcome_note"] = outcome_note_to_update
-        logger.info(f"Updated Fraud Case {case_id} ({user_key}): Status: {status_to_update}, Note: {outcome_note_to_update}")
+        # Persist the outcome so every worker process sees it (compare-and-set on the loaded version)
+        updated = self.case_store.transition(
+            case_id,
+            self.user_session_data.get("current_case_version", case["version"]),
+            status_to_update,
+            outcome_note_to_update,
+        )
+        if not updated:
+            if case["status"] == status_to_update:
+                # A retried confirmation with the same answer: already recorded, don't log it twice
+                logger.info(f"Fraud Case {case_id} already {status_to_update}; skipping duplicate update")
+                return action_taken_message
+            logger.warning(f"Fraud Case {case_id} changed concurrently (now {case['status']}); update to {status_to_update} rejected")
+            return "I'm sorry, this case has already been updated by another agent. Please call our main fraud line to review it."
+        logger.info(f"Updated Fraud Case {case_id} ({case['customer_name']}): Status: {status_to_update}, Note: {outcome_note_to_update}")
         
         # --- START: JSON Logging Block ---
         log_entry = {
             "case_id": case_id,
-            "customer_name": FRAUD_CASES[user_key]["customer_name"],
-            "security_identifier": FRAUD_CASES[user_key]["security_identifier"],
-            "transaction_amount": FRAUD_CASES[user_key]["transaction_amount"],
-            "merchant_name": FRAUD_CASES[user_key]["merchant_name"],
-            "location": FRAUD_CASES[user_key]["location"],
-            "timestamp": FRAUD_CASES[user_key]["timestamp"],
+            "customer_name": case["customer_name"],
+            "security_identifier": case["security_identifier"],
+            "transaction_amount": case["transaction_amount"],
+            "merchant_name": case["merchant_name"],
+            "location": case["location"],
+            "timestamp": case["timestamp"],
             "final_status": status_to_update,
             "outcome_note": outcome_note_to_update,
         }
 
-        try:
-            with open("logger.json", "a") as f:
-                # Write the JSON log entry followed by a newline for JSON Lines format
-                f.write(json.dumps(log_entry) + "\n")
-            logger.info(f"Successfully logged Case {case_id} outcome to logger.json")
-        except Exception as e:
-            logger.error(f"Error writing to logger.json: {e}")
+        # Queued in memory; the sink batches JSON Lines writes off the event loop
+        self.outcome_sink.write(log_entry)
+        logger.info(f"Queued Case {case_id} outcome for logger.json")
         # --- END: JSON Logging Block ---
 
         # The LLM is instructed to read this message back and end the call.
@@ -499,6 +231,10 @@ class Assistant(Agent):
 
 def prewarm(proc: JobProcess):
     proc.userdata["vad"] = silero.VAD.load()
+    # Risk scores (which of a customer's pending cases is discussed first) are written by
+    # campaign.py or `python risk_scoring.py`, not by every worker on start.
+    proc.userdata["case_store"] = FraudCaseStore()
+    proc.userdata["outcome_sink"] = JsonlSink(OUTCOME_LOG_FILE)
 
 
 async def entrypoint(ctx: JobContext):
@@ -508,6 +244,18 @@ async def entrypoint(ctx: JobContext):
         "room": ctx.room.name,
     }
 
+    # Campaign dispatches (campaign.py) carry the case to call about; other jobs wait for an inbound caller
+    case_store = ctx.proc.userdata["case_store"]
+    job = json.loads(ctx.job.metadata or "{}")
+    dialed_case = case_store.get(job["case_id"]) if job.get("case_id") else None
+    phone_number = job.get("phone_number") or (dialed_case or {}).get("phone_number")
+    if job.get("case_id"):
+        if not dialed_case or dialed_case["status"] != "pending_review" or not phone_number:
+            logger.warning(f"Not calling about case {job['case_id']}: missing, already resolved or no phone number")
+            ctx.shutdown(reason="case not callable")
+            return
+        ctx.log_context_fields["case_id"] = dialed_case["case_id"]
+
     # Set up a voice AI pipeline using the Gemini LLM
     session = AgentSession(
         # Speech-to-text (STT) is your agent's ears
@@ -541,11 +289,18 @@ async def entrypoint(ctx: JobContext):
         summary = usage_collector.get_summary()
         logger.info(f"Usage: {summary}")
 
+    outcome_sink = ctx.proc.userdata["outcome_sink"]
+
+    async def flush_outcomes():
+        await outcome_sink.flush()
+        logger.info(f"Outcome sink: {outcome_sink.metrics()}")
+
     ctx.add_shutdown_callback(log_usage)
+    ctx.add_shutdown_callback(flush_outcomes)
 
     # Start the session
     await session.start(
-        agent=Assistant(),
+        agent=Assistant(case_store=case_store, outcome_sink=outcome_sink, dialed_case=dialed_case),
         room=ctx.room,
         room_input_options=RoomInputOptions(
             noise_cancellation=noise_cancellation.BVC(),
@@ -555,6 +310,43 @@ async def entrypoint(ctx: JobContext):
     # Join the room and connect to the user
     await ctx.connect()
 
+    if dialed_case:
+        await dial_customer(ctx, phone_number)
+
+
+async def dial_customer(ctx: JobContext, phone_number: str):
+    """Calls the customer into the room; the job, and with it the room, ends when they hang up.
+
+    The campaign holds the case's concurrency slot until the room is gone.
+    """
+    async def delete_room():
+        await ctx.api.room.delete_room(api.DeleteRoomRequest(room=ctx.room.name))
+
+    ctx.add_shutdown_callback(delete_room)
+
+    @ctx.room.on("participant_disconnected")
+    def _on_participant_disconnected(participant):
+        if participant.identity == phone_number:
+            ctx.shutdown(reason="customer hung up")
+
+    try:
+        await ctx.api.sip.create_sip_participant(
+            api.CreateSIPParticipantRequest(
+                room_name=ctx.room.name,
+                sip_trunk_id=SIP_OUTBOUND_TRUNK_ID,
+                sip_call_to=phone_number,
+                participant_identity=phone_number,
+                wait_until_answered=True,
+            )
+        )
+    except api.TwirpError as e:
+        logger.error(f"Could not reach {phone_number}: {e.message} ({e.metadata.get('sip_status_code')})")
+        ctx.shutdown(reason="call not answered")
+        return
+    await ctx.wait_for_participant(identity=phone_number)
+
 
 if __name__ == "__main__":
-    cli.run_app(WorkerOptions(entrypoint_fnc=entrypoint, prewarm_fnc=prewarm))
\ No newline at end of file
+    # Only the campaign's worker registers by name (explicit dispatch only); the default worker keeps
+    # automatic dispatch so inbound and web calls still reach it
+    cli.run_app(WorkerOptions(entrypoint_fnc=entrypoint, prewarm_fnc=prewarm, agent_name=campaign_agent_name()))
\ No newline at end of file
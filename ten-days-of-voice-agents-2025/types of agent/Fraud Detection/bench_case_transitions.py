@@ -0,0 +1,68 @@
+"""Benchmark compare-and-set case transitions from concurrent worker processes.
+
+Every worker repeatedly loads a random case and tries to resolve it with the
+version it read, the way two calls for the same customer would race. At the
+end each case must have been resolved exactly once.
+
+Usage: python bench_case_transitions.py [num_cases] [workers] [attempts_per_worker]
+"""
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+
+from case_store import FraudCaseStore
+
+
+def worker(args):
+    db_path, num_cases, attempts, seed = args
+    rng = random.Random(seed)
+    store = FraudCaseStore(db_path, seed_path=None)
+    won = lost = 0
+    start = time.perf_counter()
+    for _ in range(attempts):
+        case = store.get(f"BENCH-{rng.randrange(num_cases)}")
+        status = rng.choice(("confirmed_safe", "confirmed_fraud"))
+        if store.transition(case["case_id"], case["version"], status, "benchmark"):
+            won += 1
+        else:
+            lost += 1
+    elapsed = time.perf_counter() - start
+    store.close()
+    return won, lost, elapsed
+
+
+def main():
+    num_cases = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    attempts = int(sys.argv[3]) if len(sys.argv) > 3 else 10_000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        store = FraudCaseStore(db_path, seed_path=None)
+        store.add_cases(
+            {"case_id": f"BENCH-{i}", "customer_name": f"Customer {i}", "security_identifier": f"SID-{i}"}
+            for i in range(num_cases)
+        )
+
+        start = time.perf_counter()
+        with multiprocessing.Pool(workers) as pool:
+            results = pool.map(worker, [(db_path, num_cases, attempts, seed) for seed in range(workers)])
+        wall = time.perf_counter() - start
+
+        won = sum(r[0] for r in results)
+        lost = sum(r[1] for r in results)
+        resolved = store.conn.execute("SELECT COUNT(*) FROM fraud_cases WHERE status != 'pending_review'").fetchone()[0]
+        bumped = store.conn.execute("SELECT COUNT(*) FROM fraud_cases WHERE version > 1").fetchone()[0]
+        store.close()
+
+    print(f"Workers: {workers}  attempts: {workers * attempts}  cases: {num_cases}")
+    print(f"Applied: {won}  rejected (stale or already resolved): {lost}")
+    print(f"Throughput: {(won + lost) / wall:,.0f} attempts/s  {won / wall:,.0f} transitions/s")
+    print(f"Consistent: {won == resolved and bumped == 0} (resolved cases {resolved}, double-applied {bumped})")
+
+
+if __name__ == "__main__":
+    main()
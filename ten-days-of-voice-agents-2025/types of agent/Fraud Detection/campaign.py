@@ -0,0 +1,319 @@
+"""Outbound fraud-call campaign scheduler.
+
+Scans the case store for pending_review cases and dispatches one agent job
+per case, highest risk score first (see risk_scoring.py) with the transaction
+amount breaking ties and ordering unscored cases, under a global concurrency cap,
+per-lane concurrency caps and a token-bucket rate limit. Lanes are dispatch
+loops inside this process; their caps split the campaign's own calls, and do
+not limit the LiveKit agent workers that take the calls. Failed dispatches
+are retried with exponential backoff. A dispatch holds its concurrency slots
+until the call's room has closed, so the caps bound calls in progress rather
+than API requests.
+
+Live dispatches go to the agent name in FRAUD_CAMPAIGN_AGENT_NAME (see
+campaign_dispatch.py), which a fraud agent worker has to be running under.
+
+Usage: python campaign.py [--local] [--rescore] [--rate 2] [--burst 5] [--lanes 2] [--per-lane 3] [--global-concurrency 5]
+"""
+import argparse
+import asyncio
+import heapq
+import itertools
+import json
+import logging
+import random
+import time
+from typing import Callable, List, Optional
+
+from campaign_dispatch import AGENT_NAME_ENV, campaign_agent_name
+from case_store import FraudCaseStore
+from risk_scoring import parse_amount, score_pending
+
+logger = logging.getLogger("fraud-campaign")
+
+
+class TokenBucket:
+    """Async token bucket: `rate` tokens per second, up to `burst` banked."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+# --------------------------
+#       DISPATCHERS
+# --------------------------
+
+class LiveKitDispatcher:
+    """Dispatches the fraud agent into a fresh room per case through the LiveKit API.
+
+    The agent reads the case id and phone number from the job metadata and
+    dials the customer. dispatch() returns once the room has closed, or
+    after max_call_seconds.
+    """
+
+    def __init__(
+        self,
+        agent_name: Optional[str] = None,
+        poll_interval: float = 2.0,
+        join_timeout: float = 60.0,
+        max_call_seconds: float = 900.0,
+    ):
+        self.agent_name = agent_name or campaign_agent_name()
+        if not self.agent_name:
+            raise ValueError(f"set {AGENT_NAME_ENV} to the agent name the campaign's fraud agent worker runs under")
+        self.poll_interval = poll_interval
+        self.join_timeout = join_timeout
+        self.max_call_seconds = max_call_seconds
+        self._api = None
+
+    async def dispatch(self, case: dict):
+        if not case.get("phone_number"):
+            raise ValueError(f"case {case['case_id']} has no phone_number to call")
+        from livekit import api
+
+        if self._api is None:
+            self._api = api.LiveKitAPI()
+        room = f"fraud-{case['case_id']}"
+        await self._api.agent_dispatch.create_dispatch(
+            api.CreateAgentDispatchRequest(
+                agent_name=self.agent_name,
+                room=room,
+                metadata=json.dumps({"case_id": case["case_id"], "phone_number": case["phone_number"]}),
+            )
+        )
+        await self._wait_for_room_closed(room)
+
+    async def _wait_for_room_closed(self, room: str):
+        from livekit import api
+
+        started = time.monotonic()
+        seen = False
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            rooms = await self._api.room.list_rooms(api.ListRoomsRequest(names=[room]))
+            elapsed = time.monotonic() - started
+            if rooms.rooms:
+                seen = True
+            elif seen or elapsed > self.join_timeout:
+                return
+            if elapsed > self.max_call_seconds:
+                logger.warning(f"Room {room} still open after {elapsed:.0f}s; releasing its slot")
+                return
+
+    async def aclose(self):
+        if self._api is not None:
+            await self._api.aclose()
+
+
+class LocalDispatcher:
+    """In-process stand-in for tests and dry runs: records cases and simulates call time."""
+
+    def __init__(self, call_seconds: float = 0.0, failure_rate: float = 0.0, on_dispatch: Optional[Callable] = None):
+        self.call_seconds = call_seconds
+        self.failure_rate = failure_rate
+        self.on_dispatch = on_dispatch
+        self.dispatched: List[str] = []
+
+    async def dispatch(self, case: dict):
+        if self.failure_rate and random.random() < self.failure_rate:
+            raise ConnectionError(f"simulated dispatch failure for {case['case_id']}")
+        self.dispatched.append(case["case_id"])
+        if self.on_dispatch:
+            self.on_dispatch(case)
+        if self.call_seconds:
+            await asyncio.sleep(self.call_seconds)
+
+    async def aclose(self):
+        pass
+
+
+# --------------------------
+#       SCHEDULER
+# --------------------------
+
+class CampaignScheduler:
+    def __init__(
+        self,
+        store: FraudCaseStore,
+        dispatcher,
+        lanes: int = 2,
+        per_lane_concurrency: int = 3,
+        global_concurrency: int = 5,
+        rate_per_second: float = 2.0,
+        burst: int = 5,
+        max_attempts: int = 4,
+        base_backoff: float = 0.5,
+        max_backoff: float = 30.0,
+    ):
+        self.store = store
+        self.dispatcher = dispatcher
+        self.lanes = lanes
+        self.per_lane_concurrency = per_lane_concurrency
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self._global = asyncio.Semaphore(global_concurrency)
+        self._bucket = TokenBucket(rate_per_second, burst)
+
+        # Max-heap on (risk, amount) via negation; the counter keeps FIFO order within ties.
+        self._queue = []
+        self._seq = itertools.count()
+        self._queued_ids = set()
+        self._not_empty = asyncio.Event()
+        self._waiting_retries = 0
+
+        self.dispatched = 0
+        self.failed = 0
+        self.retries = 0
+        self._queue_ages = []
+        self._started_at = None
+
+    def enqueue_pending(self, limit: Optional[int] = None) -> int:
+        """Queues pending_review cases that are not already queued. Returns how many were added."""
+        added = 0
+        now = time.monotonic()
+        for case in self.store.iter_by_status("pending_review", limit, by_risk=True):
+            if case["case_id"] in self._queued_ids:
+                continue
+            risk = case["risk_score"] if case["risk_score"] is not None else -1.0
+            self._push(case["case_id"], risk, parse_amount(case["transaction_amount"]), attempt=1, enqueued_at=now)
+            added += 1
+        return added
+
+    def _push(self, case_id: str, risk: float, amount: float, attempt: int, enqueued_at: float):
+        self._queued_ids.add(case_id)
+        heapq.heappush(self._queue, (-risk, -amount, next(self._seq), case_id, attempt, enqueued_at))
+        self._not_empty.set()
+
+    def _push_retry(self, *args):
+        self._waiting_retries -= 1
+        self._push(*args)
+
+    async def run(self):
+        """Dispatches until the queue is drained and no call is in flight."""
+        self._started_at = time.monotonic()
+        await asyncio.gather(*(self._lane(i) for i in range(self.lanes)))
+
+    async def _lane(self, lane_id: int):
+        slots = asyncio.Semaphore(self.per_lane_concurrency)
+        in_flight = set()
+        while self._queue or in_flight or self._waiting_retries:
+            if not self._queue:
+                # Wake on a finished call or a retry coming off backoff, whichever is first.
+                self._not_empty.clear()
+                waiter = asyncio.ensure_future(self._not_empty.wait())
+                await asyncio.wait(in_flight | {waiter}, return_when=asyncio.FIRST_COMPLETED)
+                waiter.cancel()
+                continue
+            await slots.acquire()
+            if not self._queue:
+                slots.release()
+                continue
+            item = heapq.heappop(self._queue)
+            task = asyncio.create_task(self._attempt(lane_id, slots, *item))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+
+    async def _attempt(self, lane_id, slots, neg_risk, neg_amount, _seq, case_id, attempt, enqueued_at):
+        try:
+            case = self.store.get(case_id)
+            if not case or case["status"] != "pending_review":
+                self._queued_ids.discard(case_id)
+                return
+            async with self._global:
+                await self._bucket.acquire()
+                if attempt == 1:
+                    self._queue_ages.append(time.monotonic() - enqueued_at)
+                try:
+                    await self.dispatcher.dispatch(case)
+                except ValueError as e:
+                    # The case itself is unusable (e.g. no phone number); retrying will not help
+                    self._retry_or_fail(case_id, -neg_risk, -neg_amount, attempt, enqueued_at, lane_id, e, retryable=False)
+                    return
+                except Exception as e:
+                    self._retry_or_fail(case_id, -neg_risk, -neg_amount, attempt, enqueued_at, lane_id, e)
+                    return
+            self.dispatched += 1
+            self._queued_ids.discard(case_id)
+            logger.info(f"Lane {lane_id} dispatched {case_id} (attempt {attempt})")
+        finally:
+            slots.release()
+
+    def _retry_or_fail(self, case_id, risk, amount, attempt, enqueued_at, lane_id, error, retryable=True):
+        if not retryable or attempt >= self.max_attempts:
+            self.failed += 1
+            self._queued_ids.discard(case_id)
+            logger.error(f"Lane {lane_id} giving up on {case_id} after {attempt} attempts: {error}")
+            return
+        backoff = min(self.max_backoff, self.base_backoff * 2 ** (attempt - 1)) * random.uniform(0.5, 1.0)
+        self.retries += 1
+        self._waiting_retries += 1
+        logger.warning(f"Lane {lane_id} retrying {case_id} in {backoff:.2f}s: {error}")
+        asyncio.get_running_loop().call_later(backoff, self._push_retry, case_id, risk, amount, attempt + 1, enqueued_at)
+
+    def metrics(self) -> dict:
+        elapsed = time.monotonic() - self._started_at if self._started_at else 0.0
+        ages = sorted(self._queue_ages)
+        return {
+            "queue_depth": len(self._queue),
+            "dispatched": self.dispatched,
+            "failed": self.failed,
+            "retries": self.retries,
+            "dispatch_per_second": round(self.dispatched / elapsed, 2) if elapsed else 0.0,
+            "queue_age_avg_s": round(sum(ages) / len(ages), 3) if ages else 0.0,
+            "queue_age_max_s": round(ages[-1], 3) if ages else 0.0,
+        }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Dispatch outbound calls for pending fraud cases.")
+    parser.add_argument("--local", action="store_true", help="use the in-process dispatcher instead of LiveKit")
+    parser.add_argument("--limit", type=int, default=None, help="maximum number of cases to queue")
+    parser.add_argument("--lanes", type=int, default=2, help="dispatch loops in this process")
+    parser.add_argument("--per-lane", type=int, default=3, help="calls in progress per lane")
+    parser.add_argument("--global-concurrency", type=int, default=5)
+    parser.add_argument("--rate", type=float, default=2.0, help="dispatches per second")
+    parser.add_argument("--burst", type=int, default=5)
+    parser.add_argument("--no-score", action="store_true", help="skip scoring new or changed cases before queueing")
+    parser.add_argument("--rescore", action="store_true", help="rescore every pending case, not only unscored ones")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    store = FraudCaseStore()
+    if not args.no_score:
+        logger.info(f"Scored {score_pending(store, rescore=args.rescore)} pending cases")
+    dispatcher = LocalDispatcher(call_seconds=0.5) if args.local else LiveKitDispatcher()
+    scheduler = CampaignScheduler(
+        store,
+        dispatcher,
+        lanes=args.lanes,
+        per_lane_concurrency=args.per_lane,
+        global_concurrency=args.global_concurrency,
+        rate_per_second=args.rate,
+        burst=args.burst,
+    )
+    logger.info(f"Queued {scheduler.enqueue_pending(args.limit)} pending cases")
+    try:
+        await scheduler.run()
+    finally:
+        await dispatcher.aclose()
+    logger.info(f"Campaign finished: {scheduler.metrics()}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,17 @@
+"""Agent name the outbound campaign dispatches the fraud agent under.
+
+A LiveKit worker registered with an agent_name is only sent jobs that are
+explicitly dispatched to that name, so it no longer joins inbound and web
+calls. The fraud agent worker therefore registers by name only when
+FRAUD_CAMPAIGN_AGENT_NAME is set. Leave it unset on the default worker and
+set it, to the same value, on the worker that serves the campaign and on
+campaign.py.
+"""
+import os
+
+AGENT_NAME_ENV = "FRAUD_CAMPAIGN_AGENT_NAME"
+
+
+def campaign_agent_name() -> str:
+    """The dispatch name from the environment, or "" for automatic dispatch."""
+    return os.getenv(AGENT_NAME_ENV, "").strip()
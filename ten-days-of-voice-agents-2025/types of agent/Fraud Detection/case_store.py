@@ -0,0 +1,306 @@
+import json
+import logging
+import os
+import re
+import sqlite3
+from datetime import datetime, timezone
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from name_matching import name_phonetic_keys, rank_names, shortlist
+
+logger = logging.getLogger("fraud-case-store")
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DB_FILE = os.path.join(SCRIPT_DIR, "fraud_cases.db")
+SEED_FILE = os.path.join(SCRIPT_DIR, "fraud_cases.json")
+
+# Phonetic candidates fetched per lookup, and how many of them reach edit-distance
+# ranking after the letter-pair shortlist; keeps lookups sub-millisecond on common names.
+MAX_PHONETIC_CANDIDATES = 32
+MAX_RANKED_CANDIDATES = 8
+# Lowest match_score find_by_name accepts without an exact name match.
+MIN_NAME_MATCH_SCORE = 0.7
+
+# Page cache shared by every worker process that opens the same database file.
+DEFAULT_MMAP_SIZE = 256 * 1024 * 1024
+
+# Allowed status moves; anything else is rejected by transition().
+STATUS_TRANSITIONS = {
+    "pending_review": {"confirmed_safe", "confirmed_fraud", "processing_error"},
+    "processing_error": {"confirmed_safe", "confirmed_fraud"},
+}
+
+CASE_FIELDS = (
+    "case_id",
+    "customer_name",
+    "phone_number",
+    "security_identifier",
+    "masked_card",
+    "transaction_amount",
+    "merchant_name",
+    "location",
+    "home_location",
+    "timestamp",
+    "security_question",
+    "security_answer",
+    "status",
+    "outcome_note",
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS fraud_cases (
+    case_id TEXT PRIMARY KEY,
+    customer_name TEXT NOT NULL,
+    name_key TEXT NOT NULL,
+    phone_number TEXT NOT NULL DEFAULT '',
+    security_identifier TEXT NOT NULL,
+    masked_card TEXT NOT NULL DEFAULT '',
+    transaction_amount TEXT NOT NULL DEFAULT '',
+    merchant_name TEXT NOT NULL DEFAULT '',
+    location TEXT NOT NULL DEFAULT '',
+    home_location TEXT NOT NULL DEFAULT '',
+    timestamp TEXT NOT NULL DEFAULT '',
+    security_question TEXT NOT NULL DEFAULT '',
+    security_answer TEXT NOT NULL DEFAULT '',
+    status TEXT NOT NULL DEFAULT 'pending_review',
+    outcome_note TEXT NOT NULL DEFAULT '',
+    version INTEGER NOT NULL DEFAULT 0,
+    updated_at TEXT NOT NULL DEFAULT '',
+    risk_score REAL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS fraud_case_phonetics (
+    code TEXT NOT NULL,
+    case_id TEXT NOT NULL,
+    PRIMARY KEY (code, case_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_fraud_cases_name_key ON fraud_cases (name_key);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_fraud_cases_security_identifier ON fraud_cases (security_identifier);
+CREATE INDEX IF NOT EXISTS idx_fraud_cases_status ON fraud_cases (status);
+"""
+
+
+def normalize_name(name: str) -> str:
+    """Lowercases a name and strips punctuation, e.g. 'Monkey D. Luffy' -> 'monkey d luffy'."""
+    return " ".join(re.sub(r"[^a-z0-9\s]", " ", name.lower()).split())
+
+
+class FraudCaseStore:
+    """SQLite-backed fraud case database with indexed lookups.
+
+    Status changes go through transition(), a compare-and-set on the case's
+    version, so concurrent workers cannot overwrite each other's outcome.
+    get() serves from a per-connection cache that is dropped whenever
+    SQLite's data_version shows another connection has committed.
+    """
+
+    def __init__(self, db_path: str = DB_FILE, seed_path: Optional[str] = SEED_FILE, mmap_size: int = DEFAULT_MMAP_SIZE):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path, timeout=10.0, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(f"PRAGMA mmap_size={int(mmap_size)}")
+        self.conn.executescript(SCHEMA)
+        self._migrate_columns()
+        self._cache = {}
+        self._data_version = None
+        self._backfill_phonetics()
+        if seed_path and self.count() == 0 and os.path.exists(seed_path):
+            with open(seed_path, "r") as f:
+                self.add_cases(json.load(f))
+            logger.info(f"Seeded fraud case store from {seed_path}")
+
+    def _migrate_columns(self):
+        # Databases created before optimistic concurrency, risk scoring or outbound calls lack these columns.
+        existing = {row["name"] for row in self.conn.execute("PRAGMA table_info(fraud_cases)")}
+        if "version" not in existing:
+            self.conn.execute("ALTER TABLE fraud_cases ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+        if "updated_at" not in existing:
+            self.conn.execute("ALTER TABLE fraud_cases ADD COLUMN updated_at TEXT NOT NULL DEFAULT ''")
+        if "home_location" not in existing:
+            self.conn.execute("ALTER TABLE fraud_cases ADD COLUMN home_location TEXT NOT NULL DEFAULT ''")
+        if "risk_score" not in existing:
+            self.conn.execute("ALTER TABLE fraud_cases ADD COLUMN risk_score REAL")
+        if "phone_number" not in existing:
+            self.conn.execute("ALTER TABLE fraud_cases ADD COLUMN phone_number TEXT NOT NULL DEFAULT ''")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_fraud_cases_status_risk ON fraud_cases (status, risk_score)")
+
+    def _backfill_phonetics(self):
+        # Databases created before the phonetic index existed get it built once here.
+        if self.conn.execute("SELECT 1 FROM fraud_case_phonetics LIMIT 1").fetchone():
+            return
+        rows = self.conn.execute("SELECT case_id, name_key FROM fraud_cases").fetchall()
+        if rows:
+            with self.conn:
+                self.conn.execute("BEGIN")
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO fraud_case_phonetics (code, case_id) VALUES (?, ?)",
+                    [(code, case_id) for case_id, name_key in rows for code in name_phonetic_keys(name_key)],
+                )
+
+    def close(self):
+        self.conn.close()
+
+    def count(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM fraud_cases").fetchone()[0]
+
+    def add_cases(self, cases) -> int:
+        """Inserts or replaces cases in one transaction. Returns the number written."""
+        rows = []
+        codes = []
+        for case in cases:
+            row = {field: case.get(field, "") for field in CASE_FIELDS}
+            row["status"] = row["status"] or "pending_review"
+            row["name_key"] = normalize_name(row["customer_name"])
+            rows.append(row)
+            codes.extend((code, row["case_id"]) for code in name_phonetic_keys(row["name_key"]))
+
+        columns = CASE_FIELDS + ("name_key",)
+        # Re-imported cases keep counting versions so stale compare-and-sets still fail,
+        # and lose their risk score so the next score_pending() rescores them.
+        updates = ", ".join(f"{c} = excluded.{c}" for c in columns if c != "case_id")
+        with self.conn:
+            self.conn.execute("BEGIN")
+            self.conn.executemany(
+                f"INSERT INTO fraud_cases ({', '.join(columns)}) "
+                f"VALUES ({', '.join(':' + c for c in columns)}) "
+                f"ON CONFLICT (case_id) DO UPDATE SET {updates}, version = version + 1, risk_score = NULL",
+                rows,
+            )
+            # A re-added case may have a new name, so its old codes go before the new ones are written.
+            self.conn.executemany(
+                "DELETE FROM fraud_case_phonetics WHERE case_id = ?", [(row["case_id"],) for row in rows]
+            )
+            self.conn.executemany("INSERT OR IGNORE INTO fraud_case_phonetics (code, case_id) VALUES (?, ?)", codes)
+        self._cache.clear()
+        return len(rows)
+
+    def _check_cache(self):
+        data_version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        if data_version != self._data_version:
+            self._cache.clear()
+            self._data_version = data_version
+
+    def get(self, case_id: str) -> Optional[dict]:
+        self._check_cache()
+        case = self._cache.get(case_id)
+        if case is None:
+            row = self.conn.execute("SELECT * FROM fraud_cases WHERE case_id = ?", (case_id,)).fetchone()
+            if not row:
+                return None
+            case = self._cache[case_id] = dict(row)
+        return dict(case)
+
+    def get_by_security_identifier(self, security_identifier: str) -> Optional[dict]:
+        row = self.conn.execute(
+            "SELECT * FROM fraud_cases WHERE security_identifier = ?", (security_identifier,)
+        ).fetchone()
+        return dict(row) if row else None
+
+    def find_by_name(self, spoken_name: str) -> Optional[dict]:
+        """Finds a case by exact full name, falling back to the best phonetic match.
+
+        Pending cases win over already-resolved ones on an exact match, and
+        the riskiest pending case wins when a customer has several.
+        """
+        name_key = normalize_name(spoken_name)
+        if not name_key:
+            return None
+        row = self.conn.execute(
+            "SELECT * FROM fraud_cases WHERE name_key = ? "
+            "ORDER BY status != 'pending_review', risk_score DESC LIMIT 1",
+            (name_key,),
+        ).fetchone()
+        if row:
+            return dict(row)
+        matches = self.match_name(spoken_name, limit=1)
+        if matches and matches[0]["match_score"] >= MIN_NAME_MATCH_SCORE:
+            return matches[0]
+        return None
+
+    def match_name(self, spoken_name: str, limit: int = 3) -> List[dict]:
+        """Ranks cases whose names sound like the spoken name, best first.
+
+        Each returned case carries a 'match_score' between 0 and 1.
+        """
+        name_key = normalize_name(spoken_name)
+        codes = name_phonetic_keys(name_key)
+        if not codes:
+            return []
+        placeholders = ", ".join("?" for _ in codes)
+        # Most shared phonetic codes first, then closest name length, before edit-distance ranking.
+        candidates = self.conn.execute(
+            f"SELECT c.case_id, c.name_key FROM ("
+            f"  SELECT case_id, COUNT(*) AS hits FROM fraud_case_phonetics"
+            f"  WHERE code IN ({placeholders}) GROUP BY case_id"
+            f") p JOIN fraud_cases c ON c.case_id = p.case_id"
+            f" ORDER BY p.hits DESC, ABS(LENGTH(c.name_key) - ?) LIMIT ?",
+            (*codes, len(name_key), MAX_PHONETIC_CANDIDATES),
+        ).fetchall()
+        ranked = rank_names(name_key, shortlist(name_key, candidates, MAX_RANKED_CANDIDATES), limit)
+        if not ranked:
+            return []
+        # One query for every match rather than a get() each
+        rows = self.conn.execute(
+            f"SELECT * FROM fraud_cases WHERE case_id IN ({', '.join('?' for _ in ranked)})",
+            [case_id for _, case_id in ranked],
+        ).fetchall()
+        cases = {row["case_id"]: dict(row) for row in rows}
+        matches = []
+        for score, case_id in ranked:
+            case = cases[case_id]
+            case["match_score"] = round(score, 3)
+            matches.append(case)
+        return matches
+
+    def iter_by_status(
+        self, status: str, limit: Optional[int] = None, by_risk: bool = False, unscored_only: bool = False
+    ) -> Iterator[dict]:
+        """Yields cases with the given status, highest risk_score first when by_risk is set.
+
+        unscored_only keeps cases without a risk_score: new, or changed since they were scored.
+        """
+        sql = "SELECT * FROM fraud_cases WHERE status = ?"
+        params = [status]
+        if unscored_only:
+            sql += " AND risk_score IS NULL"
+        if by_risk:
+            # Unscored cases (NULL) sort last.
+            sql += " ORDER BY risk_score DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        for row in self.conn.execute(sql, params):
+            yield dict(row)
+
+    def set_risk_scores(self, scores: Iterable[Tuple[str, float]]) -> int:
+        """Stores (case_id, risk_score) pairs in one transaction. Returns the number written.
+
+        Scores are advisory, so this does not bump the version used by transition().
+        """
+        rows = [(float(score), case_id) for case_id, score in scores]
+        with self.conn:
+            self.conn.execute("BEGIN")
+            self.conn.executemany("UPDATE fraud_cases SET risk_score = ? WHERE case_id = ?", rows)
+        self._cache.clear()
+        return len(rows)
+
+    def transition(self, case_id: str, expected_version: int, status: str, outcome_note: str) -> Optional[dict]:
+        """Moves a case to a new status if it is still at expected_version.
+
+        Returns the updated case, or None when another writer got there first
+        or the move is not in STATUS_TRANSITIONS.
+        """
+        allowed_from = [current for current, targets in STATUS_TRANSITIONS.items() if status in targets]
+        if not allowed_from:
+            return None
+        placeholders = ", ".join("?" for _ in allowed_from)
+        cur = self.conn.execute(
+            f"UPDATE fraud_cases SET status = ?, outcome_note = ?, version = version + 1, updated_at = ? "
+            f"WHERE case_id = ? AND version = ? AND status IN ({placeholders})",
+            (status, outcome_note, datetime.now(timezone.utc).isoformat(), case_id, expected_version, *allowed_from),
+        )
+        self._cache.pop(case_id, None)
+        if cur.rowcount != 1:
+            return None
+        return self.get(case_id)
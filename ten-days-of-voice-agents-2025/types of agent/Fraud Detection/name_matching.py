@@ -0,0 +1,269 @@
+import heapq
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+VOWELS = set("AEIOU")
+FRONT_VOWELS = set("EIY")
+
+# Voiced/unvoiced pairs that speech-to-text mixes up; folded together for the alternate key.
+LOOSE_FOLD = str.maketrans({"B": "P", "D": "T", "G": "K", "V": "F", "Z": "S", "J": "X", "0": "T"})
+
+
+def _letters(word: str) -> str:
+    return re.sub(r"[^A-Z]", "", word.upper())
+
+
+def metaphone(word: str) -> str:
+    """Returns a Metaphone-style phonetic code, e.g. 'Ravee' and 'Ravi' both give 'RF'."""
+    w = _letters(word)
+    if not w:
+        return ""
+    if w[:2] in ("KN", "GN", "PN", "AE", "WR"):
+        w = w[1:]
+    if w[0] == "X":
+        w = "S" + w[1:]
+    elif w[:2] == "WH":
+        w = "W" + w[2:]
+
+    code = []
+    n = len(w)
+    for i, c in enumerate(w):
+        prev = w[i - 1] if i > 0 else ""
+        nxt = w[i + 1] if i + 1 < n else ""
+        nxt2 = w[i + 2] if i + 2 < n else ""
+        if c == prev and c != "C":
+            continue
+        if c in VOWELS:
+            if i == 0:
+                code.append("A")
+        elif c == "B":
+            if not (prev == "M" and i == n - 1):
+                code.append("B")
+        elif c == "C":
+            if nxt == "H" or (nxt == "I" and nxt2 == "A"):
+                code.append("K" if prev == "S" else "X")
+            elif nxt in FRONT_VOWELS:
+                if prev != "S":
+                    code.append("S")
+            else:
+                code.append("K")
+        elif c == "D":
+            code.append("J" if nxt == "G" and nxt2 in FRONT_VOWELS else "T")
+        elif c == "G":
+            if nxt == "H" and nxt2 and nxt2 not in VOWELS:
+                continue
+            if nxt == "N" and (i + 2 == n or w[i + 2:] == "ED"):
+                continue
+            if prev == "D" and nxt in FRONT_VOWELS:
+                continue
+            code.append("J" if nxt in FRONT_VOWELS else "K")
+        elif c == "H":
+            if nxt in VOWELS and prev not in ("C", "S", "P", "T", "G"):
+                code.append("H")
+        elif c == "K":
+            if prev != "C":
+                code.append("K")
+        elif c == "P":
+            code.append("F" if nxt == "H" else "P")
+        elif c == "Q":
+            code.append("K")
+        elif c == "S":
+            if nxt == "H" or (nxt == "I" and nxt2 in ("O", "A")):
+                code.append("X")
+            else:
+                code.append("S")
+        elif c == "T":
+            if nxt == "I" and nxt2 in ("O", "A"):
+                code.append("X")
+            elif nxt == "H":
+                code.append("0")
+            elif not (nxt == "C" and nxt2 == "H"):
+                code.append("T")
+        elif c == "V":
+            code.append("F")
+        elif c in ("W", "Y"):
+            if nxt in VOWELS:
+                code.append(c)
+        elif c == "X":
+            code.append("KS")
+        elif c == "Z":
+            code.append("S")
+        else:
+            code.append(c)
+    return "".join(code)
+
+
+def phonetic_keys(word: str) -> Tuple[str, ...]:
+    """Returns the primary phonetic code and, when different, a looser alternate."""
+    primary = metaphone(word)
+    if not primary:
+        return ()
+    alternate = primary.translate(LOOSE_FOLD)
+    return (primary,) if alternate == primary else (primary, alternate)
+
+
+# Words shorter than this never match a name word on their own ('i', 'am', 'is')
+MIN_WORD_LEN = 3
+
+
+def name_units(name_key: str) -> List[str]:
+    """Words of a normalized name plus each adjacent pair run together.
+
+    The joined pairs catch STT splitting a word ('jin woo' for 'jinwoo'),
+    also inside a longer utterance ('i am jin woo').
+    """
+    words = name_key.split()
+    return words + [a + b for a, b in zip(words, words[1:])]
+
+
+def name_phonetic_keys(name_key: str) -> List[str]:
+    """Phonetic keys for each word and joined word pair of a normalized name, plus the name run together.
+
+    The joined forms catch STT splitting or merging words ('jin woo' vs 'jinwoo').
+    """
+    words = name_key.split()
+    keys = set()
+    for unit in name_units(name_key):
+        keys.update(phonetic_keys(unit))
+    if len(words) > 2:
+        keys.update(phonetic_keys("".join(words)))
+    return sorted(keys)
+
+
+@lru_cache(maxsize=4096)
+def pattern_masks(word: str) -> Dict[str, int]:
+    """Bit mask of the positions of each character in word, for _masked_distance().
+
+    Cached, so the words of a spoken name are encoded once per lookup rather
+    than once per candidate they are compared with.
+    """
+    peq = {}
+    for i, c in enumerate(word):
+        peq[c] = peq.get(c, 0) | (1 << i)
+    return peq
+
+
+def edit_distance(a: str, b: str) -> int:
+    """Levenshtein distance using the bit-parallel Myers/Hyyrö algorithm.
+
+    Names are short, so one machine-word-sized int per column replaces the
+    usual dynamic-programming table and each call costs a few microseconds.
+    """
+    if a == b:
+        return 0
+    if len(a) < len(b):
+        a, b = b, a
+    return _masked_distance(pattern_masks(b), len(b), a)
+
+
+def _masked_distance(peq: Dict[str, int], m: int, a: str) -> int:
+    # Distance between a and the m-character word encoded in peq; either may be the longer
+    if m == 0:
+        return len(a)
+    mask = (1 << m) - 1
+    high = 1 << (m - 1)
+    pv, mv, score = mask, 0, m
+    for c in a:
+        eq = peq.get(c, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | ~(xh | pv)
+        mh = pv & xh
+        if ph & high:
+            score += 1
+        elif mh & high:
+            score -= 1
+        ph = (ph << 1) | 1
+        mh <<= 1
+        pv = (mh | ~(xv | ph)) & mask
+        mv = ph & xv & mask
+    return score
+
+
+def similarity(a: str, b: str) -> float:
+    """Edit-distance similarity in [0, 1]."""
+    longest = max(len(a), len(b))
+    if longest == 0:
+        return 1.0
+    if a == b:
+        return 1.0
+    # a is the spoken side in name_similarity, so its masks are reused across candidates
+    return 1.0 - _masked_distance(pattern_masks(a), len(a), b) / longest
+
+
+def bigrams(text: str) -> set:
+    """Adjacent letter pairs of a name run together: 'ravi sharma' -> {'ra', 'av', 'vi', 'is', ...}."""
+    text = text.replace(" ", "")
+    return {text[i:i + 2] for i in range(len(text) - 1)}
+
+
+def shortlist(query_key: str, candidates: Iterable[Tuple[str, str]], limit: int) -> List[Tuple[str, str]]:
+    """Keeps the limit (case_id, name_key) pairs sharing the most letter pairs with the query.
+
+    A set intersection per candidate is much cheaper than the edit distances
+    rank_names() computes, so it decides which candidates are worth ranking.
+    Ties keep their order, i.e. the caller's own ranking.
+    """
+    candidates = list(candidates)
+    if len(candidates) <= limit:
+        return candidates
+    query = bigrams(query_key)
+    return sorted(candidates, key=lambda item: -len(query & bigrams(item[1])))[:limit]
+
+
+def name_similarity(query_key: str, candidate_key: str, word_cache: Optional[dict] = None) -> float:
+    """Scores a spoken name against a stored one.
+
+    The larger of whole-name similarity and the best per-word match, so a
+    first name alone, a reversed name ('sung jinwoo') or a name inside a
+    sentence ('my name is luna') still scores high. Spoken and stored words
+    are paired greedily, each used once, and the per-word score is
+    discounted by up to 10% by how poorly the other stored words match:
+    'ravee sharma' ranks 'ravi sharma' above 'ravi patel', and 'katya adto'
+    does not match 'matya katya' by using 'katya' twice. word_cache
+    memoizes word-pair scores across candidates of one query.
+    """
+    whole = similarity(query_key.replace(" ", ""), candidate_key.replace(" ", ""))
+    units = [u for u in name_units(query_key) if len(u) >= MIN_WORD_LEN]
+    candidate_words = candidate_key.split()
+    if not units or not candidate_words:
+        return whole
+    if word_cache is None:
+        word_cache = {}
+    # Pairs come off the heap best first. Each starts keyed by the score its lengths
+    # allow at most and is only scored when it reaches the top, so pairs the greedy
+    # pairing never gets to cost no edit distance.
+    heap = [
+        (abs(len(q) - len(c)) / max(len(q), len(c)) - 1.0, -i, -j, False)
+        for j, c in enumerate(candidate_words)
+        for i, q in enumerate(units)
+    ]
+    heapq.heapify(heap)
+    used_units, used_words = set(), set()
+    best, total = 0.0, 0.0
+    while heap and len(used_units) < len(units) and len(used_words) < len(candidate_words):
+        key, i, j, scored = heapq.heappop(heap)
+        if -i in used_units or -j in used_words:
+            continue
+        if not scored:
+            pair = (units[-i], candidate_words[-j])
+            score = word_cache.get(pair)
+            if score is None:
+                score = word_cache[pair] = similarity(*pair)
+            heapq.heappush(heap, (-score, i, j, True))
+            continue
+        if not used_units:
+            best = -key
+        used_units.add(-i)
+        used_words.add(-j)
+        total -= key
+    return max(whole, best * (0.9 + 0.1 * total / len(candidate_words)))
+
+
+def rank_names(query_key: str, candidates: Iterable[Tuple[str, str]], limit: int = 5) -> List[Tuple[float, str]]:
+    """Ranks (case_id, name_key) pairs against a normalized query, best first."""
+    word_cache = {}
+    scored = [(name_similarity(query_key, name_key, word_cache), case_id) for case_id, name_key in candidates]
+    scored.sort(key=lambda item: -item[0])
+    return scored[:limit]
@@ -1,7 +1,9 @@
 import logging
 import json
 import os
-from typing import Dict, Any, Optional, List 
+import sqlite3
+from collections import deque
+from typing import Deque, Dict, Any, Optional, List 
 
 from dotenv import load_dotenv
 from livekit.agents import (
@@ -21,92 +23,139 @@ from livekit.agents import (
 from livekit.plugins import murf, silero, google, deepgram, noise_cancellation
 from livekit.plugins.turn_detector.multilingual import MultilingualModel
 
+from faq_index import FaqIndex
+from lead_fields import canonical_field, normalize_fields
+from lead_scoring import score_lead
+from lead_store import LEAD_FIELDS, LEAD_STORE_PATH, LeadStore
+from transcript_recorder import TRANSCRIPT_DIR, TranscriptRecorder
+
 logger = logging.getLogger("agent")
 
-LEAD_FILE_PATH = "captured_lead_data.json"
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+# FAQ packs (*.json) indexed at startup; see faq_index.py for the format
+FAQ_DIR = os.path.join(SCRIPT_DIR, "faq")
 
 load_dotenv(".env.local")
 
 # ✅ NEW COMPANY
 COMPANY_NAME = "ExampleCorp"
 
-# ✅ FAQ CONTENT FOR THE NEW COMPANY
-FAQ_CONTENT = {
-    "what_it_does": "ExampleCorp is a leading provider of cloud solutions, AI-driven analytics, and enterprise software tools.",
-    "target_audience": "ExampleCorp serves businesses of all sizes that need cloud infrastructure, AI insights, and productivity solutions.",
-    "pricing_basics": "Pricing depends on the solution and business size. Cloud subscriptions are tiered; AI tools have per-seat licensing; enterprise software is custom-quoted.",
-    "key_benefits": "ExampleCorp provides scalable cloud solutions, AI-powered analytics, seamless integrations, and robust support.",
-    "free_tier": "ExampleCorp offers a free tier for some cloud tools and AI trial solutions for evaluation purposes."
+LEAD_PROMPTS = {
+    "Name": "Before we proceed, may I have your name?",
+    "Email": "Great! What email address can we use to follow up with you?",
+    "Company": "Which company are you currently associated with?",
+    "Role": "What is your role or designation at your company?",
+    "Use case": f"What {COMPANY_NAME} product or solution are you most interested in?",
+    "Team size": "Approximately how many team members will be using this solution?",
+    "Timeline": "When are you planning to make a purchase or begin implementation?"
 }
 
-LEAD_FIELDS = ["Name", "Company", "Email", "Role", "Use case", "Team size", "Timeline"]
-
 class SDRSessionState:
     def __init__(self):
         self.lead_data: Dict[str, Any] = {field: None for field in LEAD_FIELDS}
         self.current_question: Optional[str] = None
-        self.conversation_transcript: List[str] = []
+        # Last turns only; the recorder streams the full transcript to transcript_path
+        self.conversation_transcript: Deque[Dict[str, str]] = deque()
+        self.transcript_path: Optional[str] = None
         self.faq_hits: List[str] = []
+        # Lead capture tool calls this session, to measure calls per qualified lead
+        self.capture_calls = 0
 
     def get_missing_lead_fields(self) -> List[str]:
         return [field for field, value in self.lead_data.items() if value is None]
 
 
 class SDRScriptAgent(Agent):
-    def __init__(self, userdata: SDRSessionState) -> None:
+    def __init__(self, userdata: SDRSessionState, faq: FaqIndex, leads: LeadStore) -> None:
         self.state = userdata
+        self.faq = faq
+        self.leads = leads
         
         instructions = f"""You are the Sales Development Representative (SDR) for {COMPANY_NAME}.
 Your primary goal is to qualify the visitor, answer their questions based *ONLY* on the provided FAQ, and capture lead information.
 
 **SDR Persona Rules:**
 1.  **Greet Warmly:** Start by greeting the user and asking what brought them here.
-2.  **Use FAQ:** If the user asks a product, pricing, or company question, use the `answer_faq` tool. **DO NOT invent details.**
-3.  **Capture Lead Data:** Interweave lead questions naturally during the conversation using the `capture_lead_data` tool. Ask for missing fields one by one.
+2.  **Use FAQ:** If the user asks a product, pricing, or company question, use the `answer_faq` tool with the visitor's question in their own words. **DO NOT invent details.**
+3.  **Capture Lead Data:** Interweave lead questions naturally during the conversation. Whenever the visitor mentions any lead details, pass *all* of them in a single `capture_lead_details` call (e.g. "I'm Priya from Acme, CTO, team of 40" is one call with name, company, role and team_size), then ask the question it returns.
 4.  **End Call:** When the user indicates they are done (e.g., "that's all," "thanks," "bye"), use the `end_call_summary` tool immediately to finish the session.
 
-**Available FAQ Keys:** {', '.join(FAQ_CONTENT.keys())}
+**Example FAQ Topics:** {', '.join(faq.topics())}
 """
         super().__init__(instructions=instructions)
 
     @function_tool
     async def answer_faq(self, context: RunContext, topic: str) -> str:
-        topic = topic.lower().replace(' ', '_').replace('-', '_')
-        
-        for key, answer in FAQ_CONTENT.items():
-            if topic in key or key in topic:
-                context.userdata.faq_hits.append(key)
-                return f"Regarding {COMPANY_NAME}, {answer}"
+        match = self.faq.answer(topic)
+        if match is not None:
+            context.userdata.faq_hits.append(match.entry.id)
+            logger.info(f"FAQ hit {match.entry.id} for {topic!r} (confidence {match.confidence:.2f})")
+            return f"Regarding {COMPANY_NAME}, {match.entry.answer}"
 
+        logger.info(f"No confident FAQ answer for {topic!r}")
         return f"I'm sorry, I don't have an approved answer for that in my {COMPANY_NAME} FAQ. Would you like to ask something else?"
 
+    @function_tool
+    async def capture_lead_details(
+        self,
+        context: RunContext,
+        name: Optional[str] = None,
+        company: Optional[str] = None,
+        email: Optional[str] = None,
+        role: Optional[str] = None,
+        use_case: Optional[str] = None,
+        team_size: Optional[str] = None,
+        timeline: Optional[str] = None,
+    ) -> str:
+        """Records every lead detail the visitor just gave, in one call, and returns the next question to ask.
+
+        Args:
+            name: Visitor's name
+            company: Company they work for
+            email: Email address, as spoken (e.g. "priya at acme dot com")
+            role: Role or job title
+            use_case: Product or problem they are interested in
+            team_size: How many people would use it (e.g. "team of 40")
+            timeline: When they plan to buy or start (e.g. "next quarter")
+        """
+        values = {"Name": name, "Company": company, "Email": email, "Role": role,
+                  "Use case": use_case, "Team size": team_size, "Timeline": timeline}
+        return self._record_lead_fields(context, values)
+
     @function_tool
     async def capture_lead_data(self, context: RunContext, field_name: Optional[str] = None, value: Optional[str] = None) -> str:
+        values = {}
         if field_name and value:
-            field_name = field_name.title()
-            if field_name in LEAD_FIELDS:
-                context.userdata.lead_data[field_name] = value
-                logger.info(f"Captured lead data: {field_name}={value}")
-        
-        missing = context.userdata.get_missing_lead_fields()
-        
+            name = canonical_field(field_name)
+            if name:
+                values[name] = value
+        return self._record_lead_fields(context, values)
+
+    def _record_lead_fields(self, context: RunContext, values: dict) -> str:
+        state: SDRSessionState = context.userdata
+        state.capture_calls += 1
+        accepted, errors = normalize_fields(values)
+        state.lead_data.update(accepted)
+        if accepted:
+            logger.info(f"Captured lead data: {accepted}")
+
+        parts = []
+        if accepted:
+            parts.append("Noted: " + ", ".join(f"{k} = {v}" for k, v in accepted.items()) + ".")
+        if errors:
+            # Re-ask for the first field that failed validation before moving on
+            field = next(iter(errors))
+            state.current_question = field
+            return " ".join(parts + [errors[field]])
+
+        missing = state.get_missing_lead_fields()
         if not missing:
-            return "Thanks! I have all your details. How else can I help you today?"
+            logger.info(f"Lead qualified after {state.capture_calls} capture calls")
+            return " ".join(parts + ["Thanks! I have all your details. How else can I help you today?"])
 
         next_field = missing[0]
-        context.userdata.current_question = next_field
-
-        prompts = {
-            "Name": "Before we proceed, may I have your name?",
-            "Email": "Great! What email address can we use to follow up with you?",
-            "Company": "Which company are you currently associated with?",
-            "Role": "What is your role or designation at your company?",
-            "Use case": f"What {COMPANY_NAME} product or solution are you most interested in?",
-            "Team size": "Approximately how many team members will be using this solution?",
-            "Timeline": "When are you planning to make a purchase or begin implementation?"
-        }
-
-        return prompts.get(next_field, "Thanks! Let me note that down.")
+        state.current_question = next_field
+        return " ".join(parts + [LEAD_PROMPTS.get(next_field, "Thanks! Let me note that down.")])
 
     @function_tool
     async def end_call_summary(self, context: RunContext) -> str:
@@ -123,31 +172,28 @@ Your primary goal is to qualify the visitor, answer their questions based *ONLY*
             f"One of our {COMPANY_NAME} specialists will get in touch with you soon."
         )
 
+        faq_hits = context.userdata.faq_hits
+        scored = score_lead(lead_data, faq_hits)
         try:
-            if os.path.exists(LEAD_FILE_PATH):
-                with open(LEAD_FILE_PATH, 'r') as f:
-                    try:
-                        leads = json.load(f)
-                    except json.JSONDecodeError:
-                        leads = []
-            else:
-                leads = []
-            
-            leads.append(lead_data)
-            
-            with open(LEAD_FILE_PATH, 'w') as f:
-                json.dump(leads, f, indent=4)
-            
-            logger.info(f"Saved {COMPANY_NAME} lead data to {LEAD_FILE_PATH}")
-
-        except Exception as e:
+            # Saved with the call's score; returning visitors are merged, whichever worker saw them before
+            lead_id, is_new = await self.leads.upsert(
+                lead_data, transcript=context.userdata.transcript_path, faq_hits=faq_hits, scored=scored
+            )
+        except (OSError, sqlite3.Error, ValueError, TypeError, KeyError) as e:
+            # Bad lead data fails the same way a full disk does: the caller still gets their summary
             logger.error(f"Failed to save {COMPANY_NAME} lead: {e}")
             summary_text += " (Note: Data saving issue occurred.)"
+        else:
+            logger.info(f"{'Saved new' if is_new else 'Merged returning'} {COMPANY_NAME} lead {lead_id}: "
+                        f"score {scored['score']}, route {scored['route']}")
 
         return summary_text + f" Thank you for speaking with {COMPANY_NAME}!"
 
 def prewarm(proc: JobProcess):
     proc.userdata["vad"] = silero.VAD.load()
+    proc.userdata["faq"] = FaqIndex.from_dir(FAQ_DIR)
+    proc.userdata["leads"] = LeadStore(LEAD_STORE_PATH)
+    logger.info(f"Indexed {len(proc.userdata['faq'].entries)} FAQ entries from {FAQ_DIR}")
 
 
 async def entrypoint(ctx: JobContext):
@@ -171,6 +217,11 @@ async def entrypoint(ctx: JobContext):
         preemptive_generation=True,
     )
 
+    transcript = TranscriptRecorder(TRANSCRIPT_DIR)
+    transcript.attach(session)
+    session_state.conversation_transcript = transcript.tail
+    session_state.transcript_path = transcript.path
+
     usage_collector = metrics.UsageCollector()
 
     @session.on("metrics_collected")
@@ -183,9 +234,10 @@ async def entrypoint(ctx: JobContext):
         logger.info(f"Usage: {summary}")
 
     ctx.add_shutdown_callback(log_usage)
+    ctx.add_shutdown_callback(transcript.close)
 
     await session.start(
-        agent=SDRScriptAgent(userdata=session_state),
+        agent=SDRScriptAgent(userdata=session_state, faq=ctx.proc.userdata["faq"], leads=ctx.proc.userdata["leads"]),
         room=ctx.room,
         room_input_options=RoomInputOptions(
             noise_cancellation=noise_cancellation.BVC(),
@@ -0,0 +1,131 @@
+"""Retrieval quality and latency of FaqIndex vs the old substring matcher.
+
+Part 1 runs labelled visitor questions (and off-topic ones that should get
+the fallback) against the shipped faq/ packs. Part 2 builds a synthetic
+pack of thousands of product x aspect entries and times paraphrased queries.
+
+Usage: python bench_faq_index.py [synthetic_entries] [min_confidence]
+"""
+import os
+import random
+import statistics
+import sys
+import time
+
+from faq_index import MIN_CONFIDENCE, FaqEntry, FaqIndex
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+LABELLED = [
+    ("what does examplecorp do", "what_it_does"),
+    ("what do you guys sell", "what_it_does"),
+    ("what kind of solutions do you offer", "what_it_does"),
+    ("tell me about your services", "what_it_does"),
+    ("what it does", "what_it_does"),
+    ("who is this for", "target_audience"),
+    ("who are your typical clients", "target_audience"),
+    ("is it only for big enterprises", "target_audience"),
+    ("target audience", "target_audience"),
+    ("how much does it cost", "pricing_basics"),
+    ("what are your prices", "pricing_basics"),
+    ("is it expensive", "pricing_basics"),
+    ("how does licensing work", "pricing_basics"),
+    ("pricing", "pricing_basics"),
+    ("can I get a quote", "pricing_basics"),
+    ("why should I pick you", "key_benefits"),
+    ("what are the advantages", "key_benefits"),
+    ("what makes you better than the competition", "key_benefits"),
+    ("do you have good support and integrations", "key_benefits"),
+    ("key benefits", "key_benefits"),
+    ("is there a free version", "free_tier"),
+    ("can I try it before buying", "free_tier"),
+    ("do you offer a trial", "free_tier"),
+    ("free tier", "free_tier"),
+    ("is it free", "free_tier"),
+]
+OFF_TOPIC = [
+    "what is the weather today",
+    "can I get a refund on my last invoice",
+    "do you have an office in Paris",
+    "what is your CEO's name",
+    "how do I reset my password",
+    "tell me a joke",
+    "are you hiring engineers",
+    "what time is it",
+]
+
+PRODUCTS = ["CloudVault", "InsightAI", "FlowDesk", "DataPipe", "SecureGate", "MetricHub", "ChatPilot", "FormForge"]
+ASPECTS = {
+    "pricing": ("How much does {p} {v} cost?", "{p} {v} pricing is tiered by usage.", "what's the price of {p} {v}"),
+    "setup": ("How do I set up {p} {v}?", "{p} {v} installs in minutes with the guided wizard.", "installing {p} {v}"),
+    "security": ("Is {p} {v} secure?", "{p} {v} encrypts data at rest and in transit.", "{p} {v} encryption"),
+    "integrations": ("What does {p} {v} integrate with?", "{p} {v} connects to Slack, Salesforce and more.", "does {p} {v} connect to slack"),
+    "support": ("What support comes with {p} {v}?", "{p} {v} includes email support; premium adds phone.", "{p} {v} help desk support"),
+    "limits": ("What are the limits of {p} {v}?", "{p} {v} handles up to a million records per month.", "{p} {v} maximum records"),
+}
+
+
+def legacy_answer(faq: dict, topic: str):
+    """The previous answer_faq lookup: substring match either way on the normalized topic."""
+    topic = topic.lower().replace(" ", "_").replace("-", "_")
+    for key in faq:
+        if topic in key or key in topic:
+            return key
+    return None
+
+
+def quality(name: str, answer) -> None:
+    correct = sum(answer(q) == expected for q, expected in LABELLED)
+    wrong = sum(answer(q) not in (None, expected) for q, expected in LABELLED)
+    false_accepts = sum(answer(q) is not None for q in OFF_TOPIC)
+    print(
+        f"  {name:<22} correct {correct}/{len(LABELLED)}  wrong {wrong}  "
+        f"fallback {len(LABELLED) - correct - wrong}  off-topic answered {false_accepts}/{len(OFF_TOPIC)}"
+    )
+
+
+def synthetic_index(size: int, min_confidence: float):
+    rng = random.Random(4)
+    entries, queries = [], []
+    variants = max(1, size // (len(PRODUCTS) * len(ASPECTS)))
+    for p in PRODUCTS:
+        for v in range(variants):
+            version = f"v{v}"
+            for aspect, (question, answer, paraphrase) in ASPECTS.items():
+                entry_id = f"{p.lower()}_{version}_{aspect}"
+                entries.append(FaqEntry(entry_id, answer.format(p=p, v=version), [question.format(p=p, v=version)]))
+                queries.append((paraphrase.format(p=p, v=version), entry_id))
+    rng.shuffle(queries)
+    synonyms = {"price": ["cost", "pricing"], "setup": ["install", "installs", "installing", "set"], "support": ["help"], "security": ["secure", "encrypt", "encrypts", "encryption"]}
+    return FaqIndex(entries, synonyms, min_confidence), queries
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000
+    min_confidence = float(sys.argv[2]) if len(sys.argv) > 2 else MIN_CONFIDENCE
+
+    index = FaqIndex.from_dir(os.path.join(SCRIPT_DIR, "faq"), min_confidence)
+    faq = {entry.id: entry.answer for entry in index.entries}
+    print(f"Shipped packs: {len(index.entries)} entries, min_confidence={min_confidence}")
+    quality("substring (old)", lambda q: legacy_answer(faq, q))
+    quality("BM25 + synonyms", lambda q: (lambda m: m.entry.id if m else None)(index.answer(q)))
+
+    start = time.perf_counter()
+    index, queries = synthetic_index(size, min_confidence)
+    build_ms = (time.perf_counter() - start) * 1000
+    latencies, hits = [], 0
+    for query, expected in queries[:2_000]:
+        start = time.perf_counter()
+        match = index.answer(query)
+        latencies.append((time.perf_counter() - start) * 1e6)
+        hits += match is not None and match.entry.id == expected
+    latencies.sort()
+    print(f"\nSynthetic pack: {len(index.entries):,} entries built in {build_ms:.0f} ms")
+    print(
+        f"  top-1 correct {hits / len(latencies):.1%} of {len(latencies):,} paraphrased queries, "
+        f"latency p50={statistics.median(latencies):.0f} us  p99={latencies[int(len(latencies) * 0.99)]:.0f} us"
+    )
+
+
+if __name__ == "__main__":
+    main()
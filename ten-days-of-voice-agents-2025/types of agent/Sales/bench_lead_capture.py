@@ -0,0 +1,92 @@
+"""Tool calls per qualified lead: one field per call vs capture_lead_details.
+
+Replays scripted visitors. Each visitor turn mentions one or more lead
+fields the way people say them; some emails come through garbled. The
+single-field flow makes one capture_lead_data call per field mentioned and
+accepts whatever it is given, as before, so a garbled email is stored. The
+batch flow makes one capture_lead_details call per turn, validates locally
+with normalize_fields and re-asks when the email is unusable, which costs
+one more turn and call.
+
+Usage: python bench_lead_capture.py [visitors]
+"""
+import random
+import sys
+import time
+
+from lead_fields import normalize_fields
+from lead_store import LEAD_FIELDS
+
+NAMES = ["Priya", "Marco", "Aiko", "Sam", "Fatima", "Lukas"]
+COMPANIES = ["Acme", "Globex", "Initech", "Umbrella", "Hooli"]
+ROLES = ["CTO", "Data Engineer", "Product Manager", "Founder"]
+TEAM_SIZES = ["team of 40", "about two hundred", "just me", "10 to 20", "a dozen"]
+TIMELINES = ["next quarter", "asap", "in two weeks", "just exploring", "six months"]
+
+
+def visitor_script(rng: random.Random):
+    """Turns of (field, spoken value) pairs covering every lead field, plus the email repeated when re-asked."""
+    name = rng.choice(NAMES)
+    company = rng.choice(COMPANIES)
+    email = f"{name.lower()} at {company.lower()} dot com"
+    values = {
+        "Name": name, "Company": company, "Role": rng.choice(ROLES), "Email": email,
+        "Use case": "AI analytics", "Team size": rng.choice(TEAM_SIZES), "Timeline": rng.choice(TIMELINES),
+    }
+    fields = list(LEAD_FIELDS)
+    rng.shuffle(fields)
+    turns = []
+    while fields:
+        take = rng.choice([1, 1, 2, 3, 4])
+        turns.append([(f, values[f]) for f in fields[:take]])
+        fields = fields[take:]
+    if rng.random() < 0.3:
+        turn = next(t for t in turns if any(f == "Email" for f, _ in t))
+        turn[:] = [(f, f"{name.lower()} at {company.lower()}" if f == "Email" else v) for f, v in turn]
+    return turns, [("Email", email)]
+
+
+def single_field(script) -> tuple:
+    turns, _ = script
+    lead, calls = {}, 0
+    for turn in turns:
+        for field, value in turn:
+            calls += 1
+            lead[field] = value
+    invalid = int(" dot " not in lead["Email"])
+    return calls, invalid
+
+
+def batch(script) -> tuple:
+    turns, retry = script
+    lead, calls = {}, 0
+    pending = list(turns)
+    while pending:
+        turn = pending.pop(0)
+        calls += 1
+        accepted, errors = normalize_fields(dict(turn))
+        lead.update(accepted)
+        if "Email" in errors:
+            pending.append(retry)
+    assert set(lead) == set(LEAD_FIELDS), lead
+    return calls, 0
+
+
+def main():
+    visitors = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    rng = random.Random(8)
+    scripts = [visitor_script(rng) for _ in range(visitors)]
+    turns = sum(len(t) for t, _ in scripts)
+    print(f"{visitors:,} visitors, {turns / visitors:.2f} turns per lead")
+    for label, flow in (("capture_lead_data", single_field), ("capture_lead_details", batch)):
+        start = time.perf_counter()
+        results = [flow(s) for s in scripts]
+        elapsed = time.perf_counter() - start
+        calls = sum(c for c, _ in results)
+        invalid = sum(i for _, i in results)
+        print(f"  {label:<21} {calls / visitors:.2f} tool calls per lead, {invalid:,} unusable emails stored, "
+              f"{elapsed / calls * 1e6:.1f} us per call locally")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Ranking cost of lead_scoring over a synthetic lead store.
+
+Fills a lead store with N leads with the kinds of answers visitors give,
+then times building the score index from scratch, updating it after a
+day's worth of new and returning leads, and ranking every lead from the index.
+Scoring records one at a time with score_lead() is timed for comparison.
+
+Usage: python bench_lead_scoring.py [leads] [new_leads]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from lead_scoring import ROUTES, rank, route, score_lead, update_index
+from lead_store import LeadStore
+
+ROLES = ["CTO", "VP Engineering", "Head of Data", "Product Manager", "Data Engineer", "Founder", "Analyst", None]
+TEAM_SIZES = ["12", "10-20", "1", "40", "200", "1500", "team of 40", "about two hundred", None]
+TIMELINES = ["immediately", "within a month", "1-3 months", "3-6 months", "6+ months", "exploring", "after the budget review", None]
+TOPICS = ["pricing_basics", "key_benefits", "free_tier", "target_audience", "what_it_does"]
+
+
+def make_lead(i: int, rng: random.Random) -> dict:
+    return {
+        "lead_id": f"LEAD-{i:021x}", "first_seen": "2025-11-01T10:00:00", "updated_at": "2025-11-01T10:05:00", "visits": 1,
+        "fields": {"Name": f"Visitor {i}", "Company": f"Company {i % 997}", "Email": f"visitor{i}@example.com" if rng.random() < 0.8 else None,
+                   "Role": rng.choice(ROLES), "Use case": "AI analytics", "Team size": rng.choice(TEAM_SIZES), "Timeline": rng.choice(TIMELINES)},
+        "faq_hits": rng.sample(TOPICS, rng.randint(0, 3)),
+    }
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    new = int(sys.argv[2]) if len(sys.argv) > 2 else 1_000
+    rng = random.Random(5)
+    with tempfile.TemporaryDirectory() as directory:
+        store = LeadStore(os.path.join(directory, "leads.db"), legacy_path=None, journal_path=None)
+        index_path = os.path.join(directory, "leads.scores.npz")
+        leads = [make_lead(i, rng) for i in range(count)]
+        store.import_records(leads)
+
+        index, build_ms = timed(update_index, store, index_path)
+        # Half new visitors, half returning ones whose new version replaces the old one
+        returning = [dict(make_lead(rng.randrange(count), rng)) for _ in range(new // 2)]
+        store.import_records([make_lead(count + i, rng) for i in range(new - len(returning))] + returning)
+        index, update_ms = timed(update_index, store, index_path)
+        _, noop_ms = timed(update_index, store, index_path)
+        result, score_ms = timed(route, index.features)
+        top, rank_ms = timed(rank, result["score"], 20)
+
+        sample = leads[:5_000]
+        _, loop_ms = timed(lambda: [score_lead(r["fields"], r["faq_hits"]) for r in sample])
+
+        rebuilt = update_index(store, index_path, rebuild=True)
+        assert len(rebuilt) == len(index) == len(store) == count + new - len(returning)
+        assert np.allclose(np.sort(route(rebuilt.features)["score"]), np.sort(result["score"]))
+
+    print(f"{count:,} leads in the store, then {new:,} more writes ({len(returning):,} returning)")
+    print(f"  build index from scratch  {build_ms:8.1f} ms")
+    print(f"  update with new writes    {update_ms:8.1f} ms")
+    print(f"  update, nothing new       {noop_ms:8.1f} ms")
+    print(f"  score all {len(index):,}        {score_ms:8.1f} ms")
+    print(f"  top 20                    {rank_ms:8.1f} ms")
+    print(f"  one lead at a time        {loop_ms / len(sample) * 1000:8.1f} us per lead, {loop_ms / len(sample) * len(index) / 1000:.1f} s for all")
+    counts = np.bincount(result["route"], minlength=len(ROUTES))
+    print("  routes: " + ", ".join(f"{n:,} {name}" for name, n in zip(ROUTES, counts.tolist())))
+    print(f"  best {result['score'][top[0]]:.1f}, 20th {result['score'][top[-1]]:.1f}, median {np.median(result['score']):.1f}")
+
+
+if __name__ == "__main__":
+    main()
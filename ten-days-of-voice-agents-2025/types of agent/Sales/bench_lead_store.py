@@ -0,0 +1,127 @@
+"""Lead capture cost: JSON rewrite per lead vs the SQLite LeadStore.
+
+Simulates end-of-call saves where a share of visitors are returning ones,
+then streams the store to CSV and reports export time and peak memory.
+Finally several processes, each with its own LeadStore as agent workers
+have, save the same visitors at once; every visitor must end up as one lead.
+
+Usage: python bench_lead_store.py [leads] [returning_share] [legacy_leads] [processes]
+"""
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from lead_store import LeadStore
+
+
+def make_leads(count: int, returning: float, rng: random.Random):
+    seen = []
+    for i in range(count):
+        if seen and rng.random() < returning:
+            lead = dict(rng.choice(seen))
+            lead["Timeline"] = rng.choice(["this month", "next quarter", "exploring"])
+        else:
+            lead = {"Name": f"Visitor {i}", "Company": f"Company {i % 997}", "Email": f"visitor{i}@example.com",
+                    "Role": "Engineer", "Use case": "AI analytics", "Team size": str(rng.randint(1, 500)), "Timeline": None}
+            seen.append(lead)
+        yield lead
+
+
+def legacy_save(path: str, lead: dict):
+    """The previous end_call_summary: read everything, append, rewrite with indent=4."""
+    if os.path.exists(path):
+        with open(path, "r") as f:
+            leads = json.load(f)
+    else:
+        leads = []
+    leads.append(lead)
+    with open(path, "w") as f:
+        json.dump(leads, f, indent=4)
+
+
+async def store_saves(store: LeadStore, leads) -> list:
+    latencies = []
+    for lead in leads:
+        start = time.perf_counter()
+        await store.upsert(lead)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def save_visitors(args) -> int:
+    path, visitors, seed = args
+    store = LeadStore(path, legacy_path=None, journal_path=None)
+    order = list(range(visitors))
+    random.Random(seed).shuffle(order)
+    for i in order:
+        store.upsert_sync({"Name": f"Visitor {i}", "Company": f"Company {i % 97}", "Email": f"visitor{i}@example.com",
+                           "Timeline": f"call from process {seed}"})
+    store.close()
+    return store.merged
+
+
+def summary(label: str, latencies: list):
+    latencies = sorted(latencies)
+    print(f"  {label:<22} mean {statistics.mean(latencies):.3f} ms  p99 {latencies[int(len(latencies) * 0.99)]:.3f} ms  "
+          f"total {sum(latencies) / 1000:.2f} s for {len(latencies):,} leads")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    returning = float(sys.argv[2]) if len(sys.argv) > 2 else 0.2
+    legacy_count = int(sys.argv[3]) if len(sys.argv) > 3 else 1_000
+    processes = int(sys.argv[4]) if len(sys.argv) > 4 else 4
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"Saving leads ({returning:.0%} returning visitors):")
+        legacy_path = os.path.join(tmp, "captured_lead_data.json")
+        latencies = []
+        for lead in make_leads(legacy_count, returning, random.Random(1)):
+            start = time.perf_counter()
+            legacy_save(legacy_path, lead)
+            latencies.append((time.perf_counter() - start) * 1000)
+        summary("JSON rewrite (old)", latencies)
+
+        store_path = os.path.join(tmp, "leads.db")
+        store = LeadStore(store_path, legacy_path=None, journal_path=None)
+        summary("LeadStore.upsert", asyncio.run(store_saves(store, make_leads(count, returning, random.Random(1)))))
+        print(f"  {len(store):,} unique leads, {store.merged:,} merged, database {os.path.getsize(store_path) / 1e6:.1f} MB")
+        store.close()
+
+        start = time.perf_counter()
+        reopened = LeadStore(store_path, legacy_path=None, journal_path=None)
+        print(f"\nReopen: {(time.perf_counter() - start) * 1000:.0f} ms")
+        start = time.perf_counter()
+        exported = reopened.export_csv(os.path.join(tmp, "leads.csv"))
+        elapsed = time.perf_counter() - start
+        # Separate pass for memory; tracing slows the export itself down
+        tracemalloc.start()
+        reopened.export_csv(os.path.join(tmp, "leads.csv"))
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"Export: {exported:,} leads to CSV in {elapsed * 1000:.0f} ms, peak traced memory {peak / 1024:.0f} KiB")
+
+        visitors = 2_000
+        shared_path = os.path.join(tmp, "shared.db")
+        LeadStore(shared_path, legacy_path=None, journal_path=None).close()
+        start = time.perf_counter()
+        with multiprocessing.Pool(processes) as pool:
+            merged = sum(pool.map(save_visitors, [(shared_path, visitors, seed) for seed in range(processes)]))
+        elapsed = time.perf_counter() - start
+        shared = LeadStore(shared_path, legacy_path=None, journal_path=None)
+        leads = len(shared)
+        visits = sum(record["visits"] for record in shared.iter_leads())
+        print(f"\n{processes} processes saving the same {visitors:,} visitors: {leads:,} leads, {merged:,} merged, "
+              f"{visits:,} visits recorded, {processes * visitors / elapsed:,.0f} saves/s")
+        assert leads == visitors and visits == processes * visitors
+
+
+if __name__ == "__main__":
+    main()
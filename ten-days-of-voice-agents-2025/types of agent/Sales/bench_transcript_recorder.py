@@ -0,0 +1,85 @@
+"""Memory and event-loop cost of TranscriptRecorder over a long call.
+
+Feeds a call's worth of alternating user/agent turns through the recorder
+(flushing in the background as in a live session) and compares memory with
+keeping every turn in SDRSessionState.conversation_transcript. A turn every
+few seconds makes an hour-long call roughly 1,000-2,000 turns.
+
+Usage: python bench_transcript_recorder.py [turns] [tail_size]
+"""
+import array
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+from transcript_recorder import TRANSCRIPT_TAIL, TranscriptRecorder
+
+WORDS = ("pricing team analytics dashboard integration quarter budget rollout security support "
+         "onboarding licence seats pilot trial contract renewal forecast pipeline workflow").split()
+
+
+def utterance(rng: random.Random) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 40)))
+
+
+async def run(turns: int, tail_size: int, directory: str):
+    rng = random.Random(2)
+    texts = [utterance(rng) for _ in range(256)]
+    checkpoints = {turns // 4, turns // 2, 3 * turns // 4, turns}
+
+    tracemalloc.start()
+    unbounded = []
+    base = tracemalloc.get_traced_memory()[0]
+    listed = {}
+    for i in range(1, turns + 1):
+        unbounded.append({"seq": i, "ts": datetime.now().isoformat(), "role": "user" if i % 2 else "agent", "text": texts[i % 256]})
+        if i in checkpoints:
+            listed[i] = tracemalloc.get_traced_memory()[0] - base
+    del unbounded
+    tracemalloc.stop()
+
+    recorder = TranscriptRecorder(directory, tail_size=tail_size, flush_interval=0.05)
+    # Preallocated so the timings themselves don't show up as growth
+    record_us = array.array("d", bytes(8 * turns))
+    recorded = {}
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    for i in range(1, turns + 1):
+        start = time.perf_counter()
+        recorder.record("user" if i % 2 else "agent", texts[i % 256])
+        record_us[i - 1] = (time.perf_counter() - start) * 1e6
+        if i % 20 == 0:
+            # Give the background flush a chance to run, as real turns are seconds apart
+            await asyncio.sleep(0)
+            await recorder.flush()
+        if i in checkpoints:
+            recorded[i] = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    await recorder.close()
+
+    print(f"{turns:,} turns, tail of {tail_size}; memory held after n turns (KiB)")
+    print(f"  {'turns':>7} {'list of all turns':>18} {'TranscriptRecorder':>19}")
+    for i in sorted(checkpoints):
+        print(f"  {i:>7,} {listed[i] / 1024:>18.1f} {recorded[i] / 1024:>19.1f}")
+    record_us = sorted(record_us)
+    size = os.path.getsize(recorder.path)
+    with open(recorder.path) as f:
+        lines = sum(1 for _ in f)
+    print(f"\nrecord() on the loop: p50={record_us[len(record_us) // 2]:.1f} us  p99={record_us[int(len(record_us) * 0.99)]:.1f} us")
+    print(f"{lines:,} lines, {size / 1024:.0f} KiB on disk in {recorder.path}; metrics {recorder.metrics()}")
+
+
+def main():
+    turns = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    tail_size = int(sys.argv[2]) if len(sys.argv) > 2 else TRANSCRIPT_TAIL
+    with tempfile.TemporaryDirectory() as directory:
+        asyncio.run(run(turns, tail_size, directory))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""BM25 retrieval over FAQ packs for the SDR agent.
+
+A pack is a JSON file in the faq/ directory:
+
+    {"pack": "...", "synonyms": {"price": ["cost", "pricing", ...]},
+     "entries": [{"id": "...", "questions": ["..."], "answer": "..."}]}
+
+Every entry is indexed from its id, questions and answer. Synonyms are folded
+onto their head term both when indexing and when querying, so "how much does
+it cost" and "pricing" meet on the same term. answer() returns the best entry
+only when its confidence clears a threshold; callers fall back otherwise.
+"""
+import glob
+import heapq
+import json
+import math
+import os
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+MIN_CONFIDENCE = 0.25
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+STOPWORDS = {
+    "a", "an", "the", "is", "are", "was", "be", "it", "its", "of", "to", "for", "in", "on", "and", "or",
+    "i", "you", "your", "we", "our", "me", "my", "can", "there", "this", "that", "what", "how", "about",
+    "tell", "any", "have", "has", "much", "with", "at", "so", "if", "some", "do", "does", "did", "should",
+    "would", "could", "will", "get", "than", "only", "kind", "guys", "please", "just", "like", "need",
+    "want", "know", "really", "also", "more", "very", "make", "makes", "s",
+}
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def _stem(token: str) -> str:
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+@dataclass
+class FaqEntry:
+    id: str
+    answer: str
+    questions: List[str] = field(default_factory=list)
+    pack: str = ""
+
+
+@dataclass
+class FaqMatch:
+    entry: FaqEntry
+    score: float
+    confidence: float
+
+
+class FaqIndex:
+    """Inverted BM25 index over FAQ entries.
+
+    Queries only touch the postings of their own terms, so lookups stay well
+    under a millisecond for thousands of entries.
+    """
+
+    def __init__(self, entries: Iterable[FaqEntry] = (), synonyms: Optional[Dict[str, List[str]]] = None, min_confidence: float = MIN_CONFIDENCE):
+        self.min_confidence = min_confidence
+        self._synonyms: Dict[str, str] = {}
+        self.entries: List[FaqEntry] = []
+        self._by_id: Dict[str, int] = {}
+        self._tfs: Dict[str, List[Tuple[int, int]]] = {}
+        self._doc_len: List[int] = []
+        # term -> [(doc, BM25 weight)], rebuilt whenever entries are added
+        self._postings: Dict[str, List[Tuple[int, float]]] = {}
+        self._idf: Dict[str, float] = {}
+        self._unknown_idf = 0.0
+        if synonyms:
+            self.add_synonyms(synonyms)
+        self.add_entries(entries)
+
+    @classmethod
+    def from_dir(cls, directory: str, min_confidence: float = MIN_CONFIDENCE) -> "FaqIndex":
+        """Builds an index from every *.json pack in directory."""
+        index = cls(min_confidence=min_confidence)
+        for path in sorted(glob.glob(os.path.join(directory, "*.json"))):
+            with open(path, "r", encoding="utf-8") as f:
+                pack = json.load(f)
+            name = pack.get("pack") or os.path.splitext(os.path.basename(path))[0]
+            index.add_synonyms(pack.get("synonyms", {}))
+            index.add_entries(
+                FaqEntry(id=e["id"], answer=e["answer"], questions=e.get("questions", []), pack=name)
+                for e in pack.get("entries", [])
+            )
+        return index
+
+    # --------------------------
+    #       BUILDING
+    # --------------------------
+
+    def add_synonyms(self, synonyms: Dict[str, List[str]]):
+        """Maps every listed variant onto its head term. Call before adding entries."""
+        for head, variants in synonyms.items():
+            head = _stem(head.lower())
+            for variant in variants:
+                for token in TOKEN_RE.findall(variant.lower()):
+                    self._synonyms[_stem(token)] = head
+
+    def tokenize(self, text: str) -> List[str]:
+        terms = []
+        for token in TOKEN_RE.findall(text.lower()):
+            if token in STOPWORDS:
+                continue
+            token = _stem(token)
+            terms.append(self._synonyms.get(token, token))
+        return terms
+
+    def add_entries(self, entries: Iterable[FaqEntry]):
+        for entry in entries:
+            doc = len(self.entries)
+            if entry.id in self._by_id:
+                raise ValueError(f"Duplicate FAQ id {entry.id!r} in pack {entry.pack!r}")
+            self.entries.append(entry)
+            self._by_id[entry.id] = doc
+            terms = self.tokenize(" ".join([entry.id.replace("_", " "), *entry.questions, entry.answer]))
+            self._doc_len.append(len(terms))
+            for term, tf in Counter(terms).items():
+                self._tfs.setdefault(term, []).append((doc, tf))
+        self._reweight()
+
+    def _reweight(self):
+        n = len(self.entries)
+        if not n:
+            return
+        avg_len = sum(self._doc_len) / n
+        norms = [K1 * (1 - B + B * length / avg_len) for length in self._doc_len]
+        self._idf = {term: math.log(1 + (n - len(tfs) + 0.5) / (len(tfs) + 0.5)) for term, tfs in self._tfs.items()}
+        self._postings = {
+            term: [(doc, idf * tf * (K1 + 1) / (tf + norms[doc])) for doc, tf in self._tfs[term]]
+            for term, idf in self._idf.items()
+        }
+        # Terms the index has never seen weigh like a typical term when judging confidence
+        self._unknown_idf = sum(self._idf.values()) / len(self._idf) if self._idf else 0.0
+
+    # --------------------------
+    #       QUERYING
+    # --------------------------
+
+    def get(self, entry_id: str) -> Optional[FaqEntry]:
+        doc = self._by_id.get(entry_id)
+        return None if doc is None else self.entries[doc]
+
+    def search(self, query: str, limit: int = 1) -> List[FaqMatch]:
+        """Ranked matches with confidence in [0, 1], best first, including low-confidence ones."""
+        terms = set(self.tokenize(query))
+        if not terms or not self.entries:
+            return []
+        scores: Dict[int, float] = {}
+        # Best score a query could reach: every term matched with saturated tf.
+        # Unknown terms still count toward it, which lowers confidence for off-topic questions.
+        ceiling = 0.0
+        for term in terms:
+            idf = self._idf.get(term)
+            ceiling += (idf if idf is not None else self._unknown_idf) * (K1 + 1)
+            if idf is None:
+                continue
+            get = scores.get
+            for doc, weight in self._postings[term]:
+                scores[doc] = get(doc, 0.0) + weight
+        best = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+        return [FaqMatch(self.entries[doc], score, min(1.0, score / ceiling)) for doc, score in best]
+
+    def answer(self, query: str) -> Optional[FaqMatch]:
+        """Best match if it clears the confidence threshold. An exact entry id always matches."""
+        entry = self.get(query.strip().lower().replace(" ", "_").replace("-", "_"))
+        if entry is not None:
+            return FaqMatch(entry, float("inf"), 1.0)
+        matches = self.search(query)
+        if matches and matches[0].confidence >= self.min_confidence:
+            return matches[0]
+        return None
+
+    def topics(self, limit: int = 20) -> List[str]:
+        return [entry.id for entry in self.entries[:limit]]
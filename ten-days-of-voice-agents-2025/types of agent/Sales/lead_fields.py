@@ -0,0 +1,136 @@
+"""Normalization and validation of captured lead fields.
+
+Speech-to-text hands the agent things like "priya at acme dot com", "team
+of forty" or "sometime next quarter". normalize_fields() turns them into
+clean values (an email address, a head count, a timeline bucket) and
+reports the ones it could not accept so the agent can ask again.
+"""
+import re
+from typing import Dict, Optional, Tuple
+
+from lead_store import LEAD_FIELDS
+
+# Lowercase aliases the LLM may use for a field name
+FIELD_ALIASES = {name.lower(): name for name in LEAD_FIELDS}
+FIELD_ALIASES.update({
+    "full name": "Name", "organization": "Company", "organisation": "Company", "email address": "Email",
+    "title": "Role", "job title": "Role", "use_case": "Use case", "team_size": "Team size",
+    "team": "Team size", "headcount": "Team size", "when": "Timeline",
+})
+
+EMAIL_RE = re.compile(r"^[a-z0-9._%+-]+@[a-z0-9-]+(\.[a-z0-9-]+)*\.[a-z]{2,}$")
+SPOKEN_EMAIL = [
+    (r"\s+at\s+", "@"), (r"\s+dot\s+", "."), (r"\bunderscore\b", "_"), (r"\b(dash|hyphen)\b", "-"),
+    (r"\bplus\b", "+"),
+]
+
+NUMBER_WORDS = {
+    "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7, "eight": 8,
+    "nine": 9, "ten": 10, "eleven": 11, "twelve": 12, "thirteen": 13, "fourteen": 14, "fifteen": 15,
+    "sixteen": 16, "seventeen": 17, "eighteen": 18, "nineteen": 19, "twenty": 20, "thirty": 30, "forty": 40,
+    "fifty": 50, "sixty": 60, "seventy": 70, "eighty": 80, "ninety": 90, "couple": 2, "few": 3,
+}
+SCALES = {"dozen": 12, "hundred": 100, "thousand": 1000, "k": 1000}
+
+TIMELINE_PHRASES = [
+    (r"\b(asap|immediately|right away|right now|now|today|this week|urgent)\b", "immediately"),
+    (r"\b(just looking|exploring|not sure|no timeline|undecided|researching|no rush)\b", "exploring"),
+    (r"\b(next week|couple of weeks|few weeks|this month|end of the month)\b", "within a month"),
+    (r"\b(next month|this quarter|next quarter|quarter)\b", "1-3 months"),
+    (r"\b(half|six months|this year|end of the year)\b", "3-6 months"),
+    (r"\b(next year|long term)\b", "6+ months"),
+]
+UNIT_MONTHS = {"day": 1 / 30, "week": 0.25, "month": 1, "quarter": 3, "year": 12}
+
+
+def canonical_field(name: str) -> Optional[str]:
+    return FIELD_ALIASES.get(name.strip().lower().replace("-", " "))
+
+
+def parse_number(text: str) -> Optional[int]:
+    """'40', 'forty', 'forty five', 'two hundred', '1.5k', 'a dozen' -> int."""
+    text = text.lower().replace(",", "").replace("-", " ")
+    match = re.search(r"(\d+(?:\.\d+)?)\s*(k|thousand|hundred|dozen)?\b", text)
+    if match:
+        value = float(match.group(1)) * SCALES.get(match.group(2) or "", 1)
+        return int(value)
+    total, current, seen = 0, 0, False
+    for word in re.findall(r"[a-z]+", text):
+        if word in NUMBER_WORDS:
+            current += NUMBER_WORDS[word]
+            seen = True
+        elif word in SCALES:
+            # "a hundred", "two dozen"
+            current = max(current, 1) * SCALES[word]
+            seen = True
+            if SCALES[word] >= 1000:
+                total, current = total + current, 0
+    return total + current if seen else None
+
+
+def normalize_email(value: str) -> Tuple[Optional[str], Optional[str]]:
+    text = f" {value.strip().lower()} "
+    for pattern, replacement in SPOKEN_EMAIL:
+        text = re.sub(pattern, replacement, text)
+    text = re.sub(r"\s+", "", text)
+    if EMAIL_RE.match(text):
+        return text, None
+    return None, "That email address didn't come through clearly. Could you spell it out for me?"
+
+
+def normalize_team_size(value: str) -> Tuple[Optional[str], Optional[str]]:
+    text = value.lower()
+    if re.search(r"\b(just me|only me|myself|solo)\b", text):
+        return "1", None
+    parts = re.split(r"\s*(?:\bto\b|\band\b|(?<=\d)\s*-\s*(?=\d))\s*", text)
+    numbers = [n for n in (parse_number(part) for part in parts) if n]
+    if len(numbers) >= 2 and numbers[0] < numbers[1]:
+        return f"{numbers[0]}-{numbers[1]}", None
+    if numbers:
+        return str(numbers[0]), None
+    return None, "Roughly how many people would be using it? A ballpark number is fine."
+
+
+def normalize_timeline(value: str) -> Tuple[Optional[str], Optional[str]]:
+    text = value.lower()
+    match = re.search(r"(\w+(?:\s\w+)?)\s+(day|week|month|quarter|year)s?\b", text)
+    if match and match.group(1) not in ("next", "this", "a few", "few", "couple of", "end of"):
+        amount = parse_number(match.group(1))
+        if amount:
+            months = amount * UNIT_MONTHS[match.group(2)]
+            for limit, bucket in ((0.25, "immediately"), (1, "within a month"), (3, "1-3 months"), (6, "3-6 months")):
+                if months <= limit:
+                    return bucket, None
+            return "6+ months", None
+    for pattern, bucket in TIMELINE_PHRASES:
+        if re.search(pattern, text):
+            return bucket, None
+    if re.search(r"\bq[1-4]\b", text):
+        return "1-3 months", None
+    # Keep an unrecognized answer as said; it is still useful to a human
+    return value.strip() or None, None
+
+
+def normalize_fields(values: Dict[str, Optional[str]]) -> Tuple[Dict[str, str], Dict[str, str]]:
+    """Returns (accepted values by LEAD_FIELDS name, error prompts by field name). Empty values are ignored."""
+    accepted, errors = {}, {}
+    for raw_name, raw_value in values.items():
+        name = canonical_field(raw_name) if raw_name not in LEAD_FIELDS else raw_name
+        value = (str(raw_value).strip() if raw_value is not None else "")
+        if name is None or not value:
+            continue
+        if name == "Email":
+            clean, error = normalize_email(value)
+        elif name == "Team size":
+            clean, error = normalize_team_size(value)
+        elif name == "Timeline":
+            clean, error = normalize_timeline(value)
+        elif name == "Name":
+            clean, error = " ".join(w.capitalize() for w in value.split()), None
+        else:
+            clean, error = value, None
+        if error:
+            errors[name] = error
+        elif clean:
+            accepted[name] = clean
+    return accepted, errors
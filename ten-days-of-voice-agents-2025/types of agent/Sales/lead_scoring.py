@@ -0,0 +1,251 @@
+"""Scores and routes SDR leads from their captured fields.
+
+Each lead gets five features in [0, 1]: team size, timeline urgency, role
+seniority, buying intent from the FAQ topics it asked about (faq_hits) and
+whether we can contact it. The score is their weighted sum on a 0-100 scale
+and decides the route:
+
+    account_executive  score >= 70, hand over now
+    sdr_followup       score >= 40
+    nurture            everything else
+
+Features are computed for many leads at once as NumPy arrays; free-text
+fields are parsed once per distinct value and broadcast back. They are kept
+in a score index (leads.scores.npz) together with how far into the lead
+store's write sequence the index has read. Updating the index only parses
+the leads written since, so ranking tens of thousands of leads costs a few
+milliseconds once the index exists:
+
+    python lead_scoring.py rank [leads.db] [--top 20] [--index leads.scores.npz] [--rebuild]
+
+Scores are computed from the stored features at rank time, so changing
+WEIGHTS or ROUTE_THRESHOLDS needs no rebuild. The score and route a lead got
+at the end of its latest call (score_lead) are saved with it in the store.
+"""
+import argparse
+import json
+import math
+import os
+import re
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from lead_fields import normalize_team_size, normalize_timeline
+from lead_store import LEAD_STORE_PATH, LeadStore
+
+SCORE_INDEX_PATH = "leads.scores.npz"
+
+FEATURES = ["size", "urgency", "seniority", "intent", "contact"]
+WEIGHTS = np.array([0.25, 0.30, 0.20, 0.15, 0.10])
+
+ROUTES = ["nurture", "sdr_followup", "account_executive"]
+# Lowest score for each route after the first
+ROUTE_THRESHOLDS = [40.0, 70.0]
+
+# Team of MAX_TEAM or more counts as full size; unknown sizes get UNKNOWN_SIZE
+MAX_TEAM = 1000
+UNKNOWN_SIZE = 0.2
+
+URGENCY = {
+    "immediately": 1.0, "within a month": 0.85, "1-3 months": 0.6, "3-6 months": 0.35,
+    "6+ months": 0.15, "exploring": 0.05,
+}
+# Timelines kept as raw text because no bucket matched
+UNKNOWN_URGENCY = 0.25
+
+SENIORITY = [
+    (r"\b(ceo|cto|cfo|coo|cio|ciso|chief|founder|co-?founder|owner|president|partner)\b", 1.0),
+    (r"\b(vp|vice president|head|director)\b", 0.8),
+    (r"\b(manager|lead|principal|architect)\b", 0.55),
+]
+OTHER_ROLE = 0.3
+NO_ROLE = 0.15
+
+# Intent added per FAQ entry asked about, capped at 1
+TOPIC_INTENT = {
+    "pricing_basics": 0.5, "key_benefits": 0.3, "free_tier": 0.2, "target_audience": 0.15, "what_it_does": 0.1,
+}
+OTHER_TOPIC_INTENT = 0.1
+
+
+def size_feature(value: Optional[str]) -> float:
+    clean, _ = normalize_team_size(value or "")
+    if not clean:
+        return UNKNOWN_SIZE
+    # Upper end of a range such as "10-20"
+    team = int(clean.rsplit("-", 1)[-1])
+    return min(1.0, math.log10(max(team, 1)) / math.log10(MAX_TEAM))
+
+
+def urgency_feature(value: Optional[str]) -> float:
+    clean, _ = normalize_timeline(value or "")
+    return URGENCY.get(clean, UNKNOWN_URGENCY) if clean else UNKNOWN_URGENCY
+
+
+def seniority_feature(value: Optional[str]) -> float:
+    role = (value or "").lower()
+    if not role.strip():
+        return NO_ROLE
+    for pattern, level in SENIORITY:
+        if re.search(pattern, role):
+            return level
+    return OTHER_ROLE
+
+
+def _codes(values: Iterable) -> Tuple[np.ndarray, List]:
+    """Dense code per value plus the distinct values in code order."""
+    codes: Dict = {}
+    index = np.fromiter((codes.setdefault(v, len(codes)) for v in values), dtype=np.int64)
+    return index, list(codes)
+
+
+def _per_value(values: Iterable[Optional[str]], feature) -> np.ndarray:
+    """Applies feature once per distinct value and broadcasts the result to every lead."""
+    index, distinct = _codes(values)
+    return np.array([feature(v) for v in distinct], dtype=np.float64)[index]
+
+
+def _intent(hits: List[List[str]]) -> np.ndarray:
+    counts = np.fromiter((len(h) for h in hits), dtype=np.int64, count=len(hits))
+    index, distinct = _codes(topic for h in hits for topic in h)
+    if not distinct:
+        return np.zeros(len(hits))
+    weights = np.array([TOPIC_INTENT.get(t, OTHER_TOPIC_INTENT) for t in distinct])[index]
+    owners = np.repeat(np.arange(len(hits)), counts)
+    return np.minimum(1.0, np.bincount(owners, weights=weights, minlength=len(hits)))
+
+
+def features(records: List[dict]) -> np.ndarray:
+    """Feature matrix (leads x FEATURES) for lead records as stored by LeadStore."""
+    if not records:
+        return np.empty((0, len(FEATURES)))
+    fields = [r.get("fields", {}) for r in records]
+    columns = [
+        _per_value((f.get("Team size") for f in fields), size_feature),
+        _per_value((f.get("Timeline") for f in fields), urgency_feature),
+        _per_value((f.get("Role") for f in fields), seniority_feature),
+        _intent([r.get("faq_hits", []) for r in records]),
+        np.fromiter((bool(f.get("Email")) for f in fields), dtype=np.float64, count=len(fields)),
+    ]
+    return np.column_stack(columns)
+
+
+def route(features_: np.ndarray) -> Dict[str, np.ndarray]:
+    """Returns score (0-100) and route index (into ROUTES) per row of a feature matrix."""
+    scores = features_ @ WEIGHTS * 100
+    return {"score": scores, "route": np.searchsorted(ROUTE_THRESHOLDS, scores, side="right")}
+
+
+def score(records: List[dict]) -> Dict[str, np.ndarray]:
+    return route(features(records))
+
+
+def score_lead(fields: dict, faq_hits: Iterable[str] = ()) -> Dict[str, object]:
+    """Score and route of one lead, for routing at the end of a call."""
+    result = score([{"fields": fields, "faq_hits": list(faq_hits)}])
+    return {"score": round(float(result["score"][0]), 1), "route": ROUTES[int(result["route"][0])]}
+
+
+# --------------------------
+#       SCORE INDEX
+# --------------------------
+
+class ScoreIndex:
+    """Features of every lead, kept current with the lead store."""
+
+    def __init__(self, lead_ids: np.ndarray, features_: np.ndarray, seq: int = 0):
+        self.lead_ids = lead_ids
+        self.features = features_
+        # Store-wide write sequence the index has read up to
+        self.seq = seq
+
+    @classmethod
+    def empty(cls) -> "ScoreIndex":
+        return cls(np.empty(0, dtype="S32"), np.empty((0, len(FEATURES))))
+
+    @classmethod
+    def load(cls, path: str) -> "ScoreIndex":
+        with np.load(path) as data:
+            if "seq" not in data:
+                # Built from the JSONL journal of earlier versions; rebuilt from the store
+                return cls.empty()
+            return cls(data["lead_ids"], data["features"], int(data["seq"]))
+
+    def save(self, path: str):
+        # Written under a temporary name so a reader never sees a half-written index
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, lead_ids=self.lead_ids, features=self.features, seq=self.seq)
+        os.replace(tmp, path)
+
+    def update(self, store: LeadStore) -> int:
+        """Reads the leads written since the last update. Returns how many were read."""
+        records = []
+        for seq, record in store.changed_since(self.seq):
+            records.append(record)
+            self.seq = seq
+        if not records:
+            return 0
+
+        # Lead ids are ASCII; bytes take a quarter of the space of NumPy unicode strings
+        new_ids = np.array([r["lead_id"].encode() for r in records], dtype="S32")
+        new_features = features(records)
+        keep = ~np.isin(self.lead_ids, new_ids)
+        self.lead_ids = np.concatenate([self.lead_ids[keep], new_ids])
+        self.features = np.concatenate([self.features[keep], new_features])
+        return len(records)
+
+    def read_lead(self, store: LeadStore, row: int) -> dict:
+        return store.get(self.lead_ids[row].decode())
+
+    def __len__(self) -> int:
+        return len(self.lead_ids)
+
+
+def update_index(store: LeadStore, path: str = SCORE_INDEX_PATH, rebuild: bool = False) -> ScoreIndex:
+    index = ScoreIndex.load(path) if os.path.exists(path) and not rebuild else ScoreIndex.empty()
+    if index.update(store):
+        index.save(path)
+    return index
+
+
+def rank(scores: np.ndarray, top: int) -> np.ndarray:
+    """Rows of the top scores, best first, without sorting every lead."""
+    top = min(top, len(scores))
+    if top == 0:
+        return np.empty(0, dtype=np.int64)
+    best = np.argpartition(-scores, top - 1)[:top]
+    return best[np.argsort(-scores[best], kind="stable")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rank captured leads by score.")
+    parser.add_argument("command", choices=["rank"])
+    parser.add_argument("path", nargs="?", default=LEAD_STORE_PATH)
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--index", default=SCORE_INDEX_PATH)
+    parser.add_argument("--rebuild", action="store_true", help="rescore every lead in the store")
+    args = parser.parse_args()
+    if not os.path.exists(args.path):
+        raise SystemExit(f"No lead store at {args.path}")
+
+    store = LeadStore(args.path, legacy_path=None, journal_path=None)
+    start = time.perf_counter()
+    index = update_index(store, args.index, args.rebuild)
+    updated = time.perf_counter()
+    result = route(index.features)
+    top = rank(result["score"], args.top)
+    ranked = time.perf_counter()
+
+    for position, row in enumerate(top, 1):
+        fields = index.read_lead(store, row)["fields"]
+        print(f"{position:>4}. {result['score'][row]:5.1f}  {ROUTES[result['route'][row]]:<18} {index.lead_ids[row].decode()}  "
+              f"{fields.get('Name') or '?'} ({fields.get('Role') or '?'}, {fields.get('Company') or '?'})")
+    counts = np.bincount(result["route"], minlength=len(ROUTES))
+    print(f"\n{len(index):,} leads: " + ", ".join(f"{n:,} {name}" for name, n in zip(ROUTES, counts.tolist())))
+    print(f"index update {(updated - start) * 1000:.1f} ms, score + rank {(ranked - updated) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,306 @@
+"""Deduplicating lead store in SQLite, shared by every worker process.
+
+Each lead is one row holding its full, merged record as JSON. Returning
+visitors are matched by email, or by name within the same company, through
+a lead_keys table whose primary key makes each email and each (company,
+name) pair belong to at most one lead. upsert() looks the visitor up and
+writes the merged record in one immediate transaction, so two sessions
+capturing the same visitor at once, in the same or different processes,
+end up with one lead. A lead also lists the transcript file of every call
+it came from, the FAQ topics it asked about and the score and route it got
+at the end of its latest call; lead_scoring.py uses these to rank leads.
+
+Every write stamps the lead with the next value of a store-wide sequence,
+so readers such as the score index can fetch only the leads changed since
+they last looked. Export streams every lead to CSV:
+
+    python lead_store.py export leads.csv [leads.db]
+
+A store opened on an empty database imports, once, the JSONL journal of
+earlier versions of this module (leads.jsonl) or failing that the JSON list
+end_call_summary used to write.
+"""
+import asyncio
+import csv
+import json
+import logging
+import os
+import re
+import sqlite3
+import sys
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from order_ids import new_order_id
+
+logger = logging.getLogger("lead-store")
+
+LEAD_FIELDS = ["Name", "Company", "Email", "Role", "Use case", "Team size", "Timeline"]
+LEAD_STORE_PATH = "leads.db"
+# Written by earlier versions; imported once into an empty store
+LEGACY_JOURNAL = "leads.jsonl"
+LEGACY_LEAD_FILE = "captured_lead_data.json"
+
+COMPANY_SUFFIXES = {"inc", "llc", "ltd", "limited", "corp", "corporation", "co", "gmbh", "pvt", "plc"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS leads (
+    lead_id TEXT PRIMARY KEY,
+    record TEXT NOT NULL,
+    score REAL,
+    route TEXT,
+    seq INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_leads_seq ON leads (seq);
+CREATE TABLE IF NOT EXISTS lead_keys (
+    key TEXT PRIMARY KEY,
+    lead_id TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_lead_keys_lead_id ON lead_keys (lead_id);
+"""
+
+
+def email_key(email: Optional[str]) -> Optional[str]:
+    email = (email or "").strip().lower()
+    return email if "@" in email else None
+
+
+def company_key(company: Optional[str]) -> Optional[str]:
+    """'Acme, Inc.' and 'ACME' both give 'acme'."""
+    words = [w for w in re.findall(r"[a-z0-9]+", (company or "").lower()) if w not in COMPANY_SUFFIXES]
+    return " ".join(words) or None
+
+
+def name_key(name: Optional[str]) -> Optional[str]:
+    return " ".join(re.findall(r"[a-z0-9]+", (name or "").lower())) or None
+
+
+def lead_keys(fields: dict) -> List[str]:
+    """Lookup keys of a lead, most specific first: its email, then its name within its company."""
+    keys = []
+    email = email_key(fields.get("Email"))
+    if email:
+        keys.append(f"email:{email}")
+    company, name = company_key(fields.get("Company")), name_key(fields.get("Name"))
+    if company and name:
+        keys.append(f"name:{company}|{name}")
+    return keys
+
+
+class LeadStore:
+    """Deduplicating lead store over a SQLite database in WAL mode.
+
+    Methods other than upsert() and close() block on SQLite; the agent only
+    calls upsert(), which runs its transaction in a worker thread.
+    """
+
+    def __init__(self, path: str = LEAD_STORE_PATH, legacy_path: Optional[str] = LEGACY_LEAD_FILE,
+                 journal_path: Optional[str] = LEGACY_JOURNAL):
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=10.0, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        # One statement at a time on the shared connection
+        self._lock = threading.Lock()
+        self.merged = 0
+
+        if len(self) == 0:
+            if journal_path and os.path.exists(journal_path):
+                self._import_journal(journal_path)
+            elif legacy_path and os.path.exists(legacy_path):
+                self._import_legacy(legacy_path)
+
+    # --------------------------
+    #       LOOKUPS
+    # --------------------------
+
+    def _find(self, fields: dict) -> Optional[str]:
+        # Called with the lock held
+        for key in lead_keys(fields):
+            row = self.conn.execute("SELECT lead_id FROM lead_keys WHERE key = ?", (key,)).fetchone()
+            if row:
+                return row[0]
+        return None
+
+    def find(self, fields: dict) -> Optional[str]:
+        """Lead id of an existing lead with the same email, or the same name at the same company."""
+        with self._lock:
+            return self._find(fields)
+
+    def get(self, lead_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self.conn.execute("SELECT record FROM leads WHERE lead_id = ?", (lead_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def leads_for_company(self, company: str) -> List[str]:
+        key = company_key(company)
+        if not key:
+            return []
+        # Keys are "name:<company>|<name>"; the range covers every name at the company
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT DISTINCT lead_id FROM lead_keys WHERE key >= ? AND key < ?", (f"name:{key}|", f"name:{key}}}")
+            ).fetchall()
+        return sorted(row[0] for row in rows)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM leads").fetchone()[0]
+
+    # --------------------------
+    #       WRITING
+    # --------------------------
+
+    async def upsert(self, fields: dict, transcript: Optional[str] = None, faq_hits: Iterable[str] = (),
+                     scored: Optional[dict] = None) -> Tuple[str, bool]:
+        """Adds a lead or merges it into a matching one. Returns (lead_id, is_new).
+
+        transcript is the path of this call's transcript, appended to the lead's list;
+        faq_hits are the FAQ entry ids answered during the call, merged into the lead's;
+        scored is the call's {"score", "route"} from lead_scoring.score_lead.
+        """
+        return await asyncio.to_thread(self.upsert_sync, fields, transcript, list(faq_hits), scored)
+
+    def upsert_sync(self, fields: dict, transcript: Optional[str] = None, faq_hits: Iterable[str] = (),
+                    scored: Optional[dict] = None) -> Tuple[str, bool]:
+        with self._lock:
+            with self.conn:
+                # Taken before the lookup, so no other process can add the same visitor in between
+                self.conn.execute("BEGIN IMMEDIATE")
+                lead_id = self._find(fields)
+                existing = None
+                if lead_id is not None:
+                    row = self.conn.execute("SELECT record FROM leads WHERE lead_id = ?", (lead_id,)).fetchone()
+                    existing = json.loads(row[0])
+                record = self._merge(fields, existing, transcript, faq_hits, scored)
+                self._write(record)
+        if existing is not None:
+            self.merged += 1
+        return record["lead_id"], existing is None
+
+    @staticmethod
+    def _merge(fields: dict, existing: Optional[dict], transcript: Optional[str], faq_hits: Iterable[str],
+               scored: Optional[dict]) -> dict:
+        now = datetime.now().isoformat()
+        if existing is None:
+            record = {"lead_id": new_order_id("LEAD"), "first_seen": now, "visits": 0, "fields": {}}
+        else:
+            record = {**existing, "fields": dict(existing["fields"])}
+        # Newer answers win, but a missing answer never erases an earlier one
+        record["fields"].update({k: v for k, v in fields.items() if v not in (None, "")})
+        record["visits"] += 1
+        if transcript:
+            record["transcripts"] = [*record.get("transcripts", []), transcript]
+        if faq_hits:
+            record["faq_hits"] = list(dict.fromkeys([*record.get("faq_hits", []), *faq_hits]))
+        if scored:
+            record["score"], record["route"] = scored["score"], scored["route"]
+        record["updated_at"] = now
+        return record
+
+    def _write(self, record: dict):
+        # Called inside a transaction with the lock held
+        self.conn.execute(
+            "INSERT INTO leads (lead_id, record, score, route, seq) "
+            "VALUES (?, ?, ?, ?, (SELECT COALESCE(MAX(seq), 0) + 1 FROM leads)) "
+            "ON CONFLICT (lead_id) DO UPDATE SET "
+            "record = excluded.record, score = excluded.score, route = excluded.route, seq = excluded.seq",
+            (record["lead_id"], json.dumps(record, separators=(",", ":")), record.get("score"), record.get("route")),
+        )
+        # A key already held by another lead stays with that lead
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO lead_keys (key, lead_id) VALUES (?, ?)",
+            [(key, record["lead_id"]) for key in lead_keys(record["fields"])],
+        )
+
+    def import_records(self, records: Iterable[dict]):
+        """Writes whole lead records as they are, in one transaction, e.g. from an earlier store."""
+        with self._lock:
+            with self.conn:
+                self.conn.execute("BEGIN IMMEDIATE")
+                for record in records:
+                    self._write(record)
+
+    def _import_journal(self, journal_path: str):
+        # Latest line per lead id wins, as it did in the journal
+        latest: Dict[str, dict] = {}
+        try:
+            with open(journal_path, "rb") as f:
+                for line in f:
+                    if line.endswith(b"\n"):
+                        record = json.loads(line)
+                        latest.pop(record["lead_id"], None)
+                        latest[record["lead_id"]] = record
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not import {journal_path}: {e}")
+            return
+        self.import_records(latest.values())
+        logger.info(f"Imported {len(latest)} leads from {journal_path} into {self.path}")
+
+    def _import_legacy(self, legacy_path: str):
+        try:
+            with open(legacy_path, "r") as f:
+                leads = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.error(f"Could not import {legacy_path}: {e}")
+            return
+        for fields in leads:
+            self.upsert_sync(fields)
+        logger.info(f"Imported {len(leads)} leads from {legacy_path} into {self.path}")
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+    # --------------------------
+    #       READING
+    # --------------------------
+
+    def changed_since(self, seq: int, page: int = 1_000) -> Iterator[Tuple[int, dict]]:
+        """(seq, record) of every lead written after seq, oldest write first, read a page at a time."""
+        while True:
+            with self._lock:
+                rows = self.conn.execute(
+                    "SELECT seq, record FROM leads WHERE seq > ? ORDER BY seq LIMIT ?", (seq, page)
+                ).fetchall()
+            if not rows:
+                return
+            for seq, record in rows:
+                yield seq, json.loads(record)
+
+    def iter_leads(self) -> Iterator[dict]:
+        """Every lead, least recently written first."""
+        for _, record in self.changed_since(0):
+            yield record
+
+    def export_csv(self, out_path: str) -> int:
+        count = 0
+        with open(out_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["lead_id", "first_seen", "updated_at", "visits", *LEAD_FIELDS, "score", "route", "transcripts"])
+            for record in self.iter_leads():
+                fields = record["fields"]
+                writer.writerow([record["lead_id"], record["first_seen"], record["updated_at"], record["visits"],
+                                 *(fields.get(name) or "" for name in LEAD_FIELDS), record.get("score", ""),
+                                 record.get("route", ""), " ".join(record.get("transcripts", []))])
+                count += 1
+        return count
+
+
+def main():
+    if len(sys.argv) < 3 or sys.argv[1] != "export":
+        raise SystemExit("Usage: python lead_store.py export leads.csv [leads.db]")
+    path = sys.argv[3] if len(sys.argv) > 3 else LEAD_STORE_PATH
+    if not os.path.exists(path):
+        raise SystemExit(f"No lead store at {path}")
+    store = LeadStore(path, legacy_path=None, journal_path=None)
+    count = store.export_csv(sys.argv[2])
+    print(f"Exported {count} leads to {sys.argv[2]}")
+
+
+if __name__ == "__main__":
+    main()
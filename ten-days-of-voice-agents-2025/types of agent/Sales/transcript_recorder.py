@@ -0,0 +1,77 @@
+"""Streams SDR call transcripts to one JSONL file per session.
+
+Every final user or agent turn becomes one line in transcripts/<call id>.jsonl:
+
+    {"seq": 3, "ts": "...", "role": "user", "text": "..."}
+
+Lines go through a JsonlSink, so the event loop only appends to an in-memory
+batch that a worker thread flushes every second. The recorder itself keeps
+just the last tail_size turns (for prompts and logs); the full transcript
+lives only on disk, so memory stays flat however long the call runs.
+"""
+import logging
+import os
+import sys
+from collections import deque
+from datetime import datetime
+from typing import Deque, Dict, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from jsonl_sink import JsonlSink
+from order_ids import new_order_id
+
+logger = logging.getLogger("transcript-recorder")
+
+TRANSCRIPT_DIR = "transcripts"
+TRANSCRIPT_TAIL = 50
+
+
+class TranscriptRecorder:
+    """Append-only transcript for one session with a bounded in-memory tail."""
+
+    def __init__(self, directory: str = TRANSCRIPT_DIR, call_id: Optional[str] = None, tail_size: int = TRANSCRIPT_TAIL, flush_interval: float = 1.0):
+        os.makedirs(directory, exist_ok=True)
+        self.call_id = call_id or new_order_id("CALL")
+        self.path = os.path.join(directory, f"{self.call_id}.jsonl")
+        self.tail: Deque[Dict[str, str]] = deque(maxlen=tail_size)
+        self.turns = 0
+        self._sink = JsonlSink(self.path, flush_interval=flush_interval)
+
+    def record(self, role: str, text: str):
+        """Queues one finished turn. Must be called from the event loop thread."""
+        text = (text or "").strip()
+        if not text:
+            return
+        self.turns += 1
+        turn = {"seq": self.turns, "ts": datetime.now().isoformat(), "role": role, "text": text}
+        self.tail.append(turn)
+        self._sink.write(turn)
+
+    def attach(self, session):
+        """Records final user transcriptions and the agent's spoken replies from an AgentSession."""
+
+        @session.on("user_input_transcribed")
+        def _on_user_input(ev):
+            if ev.is_final:
+                self.record("user", ev.transcript)
+
+        @session.on("conversation_item_added")
+        def _on_item_added(ev):
+            # User turns are already recorded from their final transcription
+            if getattr(ev.item, "role", None) == "assistant":
+                self.record("agent", ev.item.text_content)
+
+    def recent(self, limit: Optional[int] = None) -> str:
+        turns = list(self.tail)[-limit:] if limit else self.tail
+        return "\n".join(f"{turn['role']}: {turn['text']}" for turn in turns)
+
+    async def flush(self):
+        await self._sink.flush()
+
+    async def close(self):
+        await self._sink.close()
+        logger.info(f"Wrote {self.turns} turns to {self.path}")
+
+    def metrics(self) -> dict:
+        return {"turns": self.turns, "tail": len(self.tail), **self._sink.metrics()}
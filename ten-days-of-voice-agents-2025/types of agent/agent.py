@@ -1,11 +1,54 @@
 import json
+import logging
+import os
 import random
 import time
+from dataclasses import dataclass
 from datetime import datetime
+from typing import Callable, Optional, Tuple
+
+from save_slots import SAVES_DIR, SaveSlots, dump_state, player_key
+
+logger = logging.getLogger("horror-world")
+
+# Single save file used before per-player slots. It belongs to one player: set LEGACY_SAVE_PLAYER
+# to their name and their first load moves it into their slot, then renames it out of the way.
+LEGACY_SAVE_FILE = "shadowrealm_save.json"
+LEGACY_SAVE_PLAYER = os.getenv("LEGACY_SAVE_PLAYER", "")
+
+
+@dataclass(frozen=True)
+class HorrorRules:
+    """Fear and HP dynamics. Shared by WorldState and the offline simulator in horror_balance.py."""
+    low_roll: int = 5                           # rolls at or below raise fear
+    low_roll_fear: Tuple[int, int] = (3, 7)
+    high_roll: int = 18                         # rolls at or above calm the player
+    high_roll_calm: Tuple[int, int] = (1, 5)
+    panic_fear: int = 70                        # fear at which HP starts to drain
+    panic_damage: Tuple[int, int] = (1, 4)
+    event_base_chance: int = 10                 # percent, plus fear / 10
+    event_fear: Tuple[int, int] = (2, 5)
+
+
+DEFAULT_RULES = HorrorRules()
 
 
 class WorldState:
-    def __init__(self):
+    def __init__(
+        self,
+        seed: Optional[int] = None,
+        rules: HorrorRules = DEFAULT_RULES,
+        player: Optional[str] = None,
+        slot: int = 1,
+        saves_dir: str = SAVES_DIR,
+    ):
+        # Every roll comes from this session's RNG, so a seed plus the same actions replays a session exactly
+        self.seed = seed if seed is not None else random.SystemRandom().randrange(2**32)
+        self.rng = random.Random(self.seed)
+        self.rules = rules
+        self.slots = SaveSlots(player, saves_dir)
+        self.slot = slot
+        self._last_saved: Optional[str] = None
         self.state = {
             "player": {
                 "name": "Wanderer",
@@ -27,6 +70,7 @@ class WorldState:
                 ),
             },
             "time_started": time.time(),
+            "seed": self.seed,
         }
 
     # --------------------------
@@ -38,17 +82,18 @@ class WorldState:
 
     # Dice roll with horror flavor
     def roll_dice(self, sides=20):
-        result = random.randint(1, sides)
+        rules = self.rules
+        result = self.rng.randint(1, sides)
 
         # Increase fear when rolling poorly
-        if result <= 5:
-            self.state["player"]["fear"] += random.randint(3, 7)
-        elif result >= 18:
-            self.state["player"]["fear"] = max(0, self.state["player"]["fear"] - random.randint(1, 5))
+        if result <= rules.low_roll:
+            self.state["player"]["fear"] += self.rng.randint(*rules.low_roll_fear)
+        elif result >= rules.high_roll:
+            self.state["player"]["fear"] = max(0, self.state["player"]["fear"] - self.rng.randint(*rules.high_roll_calm))
 
         # HP decay when fear is high
-        if self.state["player"]["fear"] >= 70:
-            self.state["player"]["hp"] -= random.randint(1, 4)
+        if self.state["player"]["fear"] >= rules.panic_fear:
+            self.state["player"]["hp"] -= self.rng.randint(*rules.panic_damage)
 
         return result
 
@@ -73,7 +118,7 @@ class WorldState:
 
         self.state["inventory"].append({
             "item": item_name,
-            "description": random.choice(creepy_descriptions)
+            "description": self.rng.choice(creepy_descriptions)
         })
 
         return f"{item_name} added to your cursed inventory."
@@ -113,10 +158,10 @@ class WorldState:
         ]
 
         # Chance increases with fear
-        chance = 10 + int(self.state["player"]["fear"] / 10)
-        if random.randint(1, 100) <= chance:
-            event = random.choice(events)
-            self.state["player"]["fear"] += random.randint(2, 5)
+        chance = self.rules.event_base_chance + int(self.state["player"]["fear"] / 10)
+        if self.rng.randint(1, 100) <= chance:
+            event = self.rng.choice(events)
+            self.state["player"]["fear"] += self.rng.randint(*self.rules.event_fear)
             return event
         return None
 
@@ -124,20 +169,73 @@ class WorldState:
     #       SAVE & LOAD
     # --------------------------
 
-    def save_game(self):
+    def prepare_save(self, slot: Optional[int] = None) -> Optional[Callable[[], int]]:
+        """Captures the state for a save.
+
+        Returns a function that writes it to the slot, which is safe to run
+        in a worker thread, or None when nothing changed since the last save.
+        """
+        slot = slot or self.slot
+        # The RNG position is saved too, so a loaded game continues the same sequence
+        payload = dump_state({**self.state, "rng_state": self.rng.getstate()})
+        if payload == self._last_saved:
+            return None
+
+        def write() -> int:
+            size = self.slots.write_json(slot, payload)
+            self._last_saved = payload
+            return size
+        return write
+
+    def save_game(self, slot: Optional[int] = None):
         try:
-            with open("shadowrealm_save.json", "w") as f:
-                json.dump(self.state, f, indent=4)
+            writer = self.prepare_save(slot)
+            if writer is not None:
+                writer()
             return "Your suffering has been preserved."
-        except:
+        except (OSError, TypeError, ValueError) as e:
+            logger.error(f"Error saving game: {e}")
             return "The shadows refuse to save your progress."
 
-    def load_game(self):
+    def load_game(self, slot: Optional[int] = None):
+        slot = slot or self.slot
+        try:
+            if self.slots.exists(slot):
+                state = self.slots.read(slot)
+            else:
+                state = self._migrate_legacy_save(slot)
+            if state is None:
+                return "No echoes of your past exist here."
+        except (OSError, ValueError) as e:
+            logger.error(f"Error loading game: {e}")
+            return "The save is corrupted... something has clawed through your memories."
+
         try:
-            with open("shadowrealm_save.json", "r") as f:
-                self.state = json.load(f)
-            return "The darkness remembers you well..."
-        except:
-            return "No echoes of your past exist here."
+            rng_state = state.pop("rng_state", None)
+            self.seed = state.setdefault("seed", self.seed)
+            self.rng = random.Random(self.seed)
+            if rng_state is not None:
+                version, internal, gauss = rng_state
+                self.rng.setstate((version, tuple(internal), gauss))
+            self.state = state
+        except (KeyError, TypeError, ValueError) as e:
+            logger.error(f"Error restoring game: {e}")
+            return "The save is corrupted... something has clawed through your memories."
+        self.slot = slot
+        self._last_saved = None
+        return "The darkness remembers you well..."
+
+    def _migrate_legacy_save(self, slot: int) -> Optional[dict]:
+        """Moves the pre-slot save into this player's slot if they are LEGACY_SAVE_PLAYER. Happens once."""
+        if not LEGACY_SAVE_PLAYER or player_key(LEGACY_SAVE_PLAYER) != self.slots.player:
+            return None
+        if not os.path.exists(LEGACY_SAVE_FILE):
+            return None
+        with open(LEGACY_SAVE_FILE, "r") as f:
+            state = json.load(f)
+        self.slots.write(slot, state)
+        os.replace(LEGACY_SAVE_FILE, f"{LEGACY_SAVE_FILE}.migrated")
+        logger.info(f"Migrated {LEGACY_SAVE_FILE} to {self.slots.path(slot)}")
+        return state
 
 
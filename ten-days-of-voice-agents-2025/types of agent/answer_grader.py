@@ -0,0 +1,290 @@
+"""Local first-pass grading of quiz and teach-back answers.
+
+Each concept can carry a rubric: for each mode ("quiz", "teach_back"), a
+list of key points, each with the words and phrases that count as making
+that point. A concept without a "teach_back" list uses its "quiz" list:
+
+    "rubric": {"quiz": [{"point": "stores a value", "phrases": ["store", "hold", "container"]}, ...]}
+
+A point about one of several things the concept compares (for and while
+loops, = and ==) also lists that thing as its "subject":
+
+    {"point": "a while loop runs as long as a condition is true", "subject": ["while loop"], "phrases": [...]}
+
+AnswerGrader compiles the phrases of every rubric into one table keyed by
+normalized word sequences, so grading an answer is a single scan of its
+words whatever the number of concepts. Keywords alone show which points an
+answer touches, not whether it gets them right ("a while loop iterates over
+a sequence and a for loop runs while a condition is true" touches all three
+points of loops and is wrong), so a clear pass is held to more:
+
+- every key point is made, with no negation or contrast word anywhere in the answer;
+- a point with a subject counts only when the nearest subject named at most
+  SUBJECT_WINDOW words before its phrase is its own ("for loop ... each item");
+- a point without one counts only through a phrase of two or more words.
+
+A short "I don't know" that makes no key point is a clear fail. Both get
+immediate feedback without asking the LLM. Every other answer is ambiguous
+and goes to the LLM along with the key points the grader found and missed.
+
+Wiring it into a LiveKit agent:
+
+    async def on_user_turn_completed(self, turn_ctx, new_message):
+        result = grader.grade(concept_id, mode, new_message.text_content)
+        if result.verdict != "ambiguous":
+            self.session.say(result.feedback(concept_title))
+            raise StopResponse()
+"""
+import math
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# Share of key points that counts as covering the question, in the note to the LLM
+PASS_SHARE = 2 / 3
+# A point whose phrase follows one of these within NEGATION_WINDOW words is not counted
+NEGATIONS = {"not", "no", "never", "dont", "doesnt", "isnt", "arent", "cant", "cannot", "wont", "without"}
+NEGATION_WINDOW = 3
+# An answer with any of these, or a negation, is never a clear pass
+CONTRASTS = {"but", "however", "although", "though", "except", "opposite", "wrong", "only", "actually", "rather",
+             "unlike", "instead", "neither", "nor"}
+# How far before its phrase a point's subject may be named
+SUBJECT_WINDOW = 6
+DONT_KNOW = ("dont know", "no idea", "not sure", "no clue", "i forget", "i forgot", "cant remember")
+# Longer replies may go on to attempt an answer after "I don't know"
+DONT_KNOW_MAX_WORDS = 8
+# Replies about the session rather than the question go to the LLM
+COMMANDS = (
+    "switch", "mode", "hint", "skip", "help me", "repeat the question", "say that again",
+    "next question", "next concept", "move on", "quiz me", "teach you", "explain it",
+)
+
+WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def _stem(word: str) -> str:
+    for suffix in ("ing", "ed", "es", "s"):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3 and not word.endswith("ss"):
+            word = word[: -len(suffix)]
+            break
+    if len(word) > 3 and word.endswith("e"):
+        word = word[:-1]
+    return word
+
+
+def words(text: str) -> List[str]:
+    """Lowercased, lightly stemmed words: 'storing values' and 'stores a value' share 'stor' and 'valu'."""
+    return [_stem(w) for w in WORD_RE.findall((text or "").lower().replace("'", "").replace("’", ""))]
+
+
+@dataclass
+class GradeResult:
+    verdict: str  # "pass", "fail" or "ambiguous"
+    grade: Optional[int]  # 0-5 for pass and fail
+    matched: List[str] = field(default_factory=list)
+    missed: List[str] = field(default_factory=list)
+    reason: str = ""
+    elapsed_ms: float = 0.0
+
+    @property
+    def is_clear(self) -> bool:
+        return self.verdict != "ambiguous"
+
+    def feedback(self, title: str) -> str:
+        """What the agent says for a clear pass or fail."""
+        if self.verdict == "pass":
+            return f"That's right! You covered {_join(self.matched)}."
+        return f"No worries, that's what practice is for. For {title}, the key points are: {_join(self.missed)}."
+
+    def summary(self) -> str:
+        """What the grader found, for the LLM to finish the judgement."""
+        return (
+            f"Local grader: {self.reason}. Key points made: {', '.join(self.matched) or 'none'}. "
+            f"Missing: {', '.join(self.missed) or 'none'}."
+        )
+
+
+def _join(items: List[str]) -> str:
+    return items[0] if len(items) == 1 else ", ".join(items[:-1]) + " and " + items[-1]
+
+
+class AnswerGrader:
+    """Keyword and phrase rubrics of every concept, compiled into one lookup table."""
+
+    def __init__(self, pass_share: float = PASS_SHARE):
+        self.pass_share = pass_share
+        # (concept id, mode) -> key point labels
+        self._points: Dict[Tuple[str, str], List[str]] = {}
+        # word sequence -> [(concept id, mode, key point index, can make the point for a clear pass)]
+        self._phrases: Dict[Tuple[str, ...], List[Tuple[str, str, int, bool]]] = {}
+        self._lengths: List[int] = []
+        # (concept id, mode) -> subject word sequence -> indexes of the key points about it
+        self._subjects: Dict[Tuple[str, str], Dict[Tuple[str, ...], Set[int]]] = {}
+        self._dont_know = [tuple(words(p)) for p in DONT_KNOW]
+        self._commands = [tuple(words(p)) for p in COMMANDS]
+
+    @classmethod
+    def from_concepts(cls, concepts: Iterable[dict], **kwargs) -> "AnswerGrader":
+        """Builds a grader from concept dicts with "id" and an optional "rubric"."""
+        grader = cls(**kwargs)
+        for concept in concepts:
+            for mode, points in (concept.get("rubric") or {}).items():
+                grader.add(concept["id"], mode, points)
+        grader.compile()
+        return grader
+
+    def add(self, concept_id: str, mode: str, points: List[dict]):
+        key = (concept_id, mode)
+        self._points[key] = [p["point"] for p in points]
+        for index, point in enumerate(points):
+            subjects = {tuple(words(s)) for s in point.get("subject", [])} - {()}
+            for seq in subjects:
+                self._subjects.setdefault(key, {}).setdefault(seq, set()).add(index)
+            for phrase in [point["point"], *point.get("phrases", [])]:
+                seq = tuple(words(phrase))
+                if seq:
+                    # Naming the subject is not making the point; a lone keyword is too loose without a subject
+                    strong = seq not in subjects and (bool(subjects) or len(seq) > 1)
+                    self._phrases.setdefault(seq, []).append((concept_id, mode, index, strong))
+
+    def compile(self):
+        """Call after the last add(); longest phrases are tried first."""
+        self._lengths = sorted({len(seq) for seq in self._phrases}, reverse=True)
+
+    def has_rubric(self, concept_id: str, mode: str) -> bool:
+        return self._rubric_key(concept_id, mode) is not None
+
+    def _rubric_key(self, concept_id: str, mode: str) -> Optional[Tuple[str, str]]:
+        for key in ((concept_id, mode), (concept_id, "quiz")):
+            if key in self._points:
+                return key
+        return None
+
+    def grade(self, concept_id: str, mode: str, answer: str) -> GradeResult:
+        start = time.perf_counter()
+        result = self._grade(concept_id, mode, answer)
+        result.elapsed_ms = (time.perf_counter() - start) * 1000
+        return result
+
+    def _grade(self, concept_id: str, mode: str, answer: str) -> GradeResult:
+        key = self._rubric_key(concept_id, mode)
+        if key is None:
+            return GradeResult("ambiguous", None, reason="no rubric for this concept")
+        labels = self._points[key]
+        answer = answer or ""
+        seq = words(answer)
+        if not seq or "?" in answer or any(self._contains(seq, phrase) for phrase in self._commands):
+            return GradeResult("ambiguous", None, missed=list(labels), reason="reply may not be an answer")
+
+        mentions = self._mentions(key, seq)
+        subject_points = self._subject_points(key)
+        hit, negated, strong = set(), set(), set()
+        # A phrase said about another point's subject ("a while loop goes over each item") is a wrong claim
+        misplaced = False
+        i = 0
+        while i < len(seq):
+            step = 1
+            for n in self._lengths:
+                for cid, m, index, can_pass in self._phrases.get(tuple(seq[i:i + n]), ()):
+                    if (cid, m) != key:
+                        continue
+                    step = max(step, n)
+                    if NEGATIONS.intersection(seq[max(0, i - NEGATION_WINDOW):i]):
+                        negated.add(index)
+                        continue
+                    hit.add(index)
+                    if not can_pass:
+                        continue
+                    if index not in subject_points:
+                        strong.add(index)
+                        continue
+                    owners = self._nearest_subject(mentions, i, n)
+                    if owners is not None and index in owners:
+                        strong.add(index)
+                    elif owners is not None:
+                        misplaced = True
+            i += step
+
+        matched = [labels[i] for i in sorted(hit)]
+        missed = [label for i, label in enumerate(labels) if i not in hit]
+        if not hit and not negated and len(seq) <= DONT_KNOW_MAX_WORDS and any(
+            self._contains(seq, phrase) for phrase in self._dont_know
+        ):
+            return GradeResult("fail", 1, matched, missed, reason="learner did not know")
+        if len(strong) == len(labels) and not misplaced and not (NEGATIONS | CONTRASTS).intersection(seq):
+            return GradeResult("pass", 5, matched, missed, reason="every key point made about the right thing")
+        if negated - hit:
+            reason = "a key point was negated"
+        elif len(hit) >= math.ceil(self.pass_share * len(labels)):
+            reason = "key point keywords present; check each is said about the right thing"
+        else:
+            reason = "too few key points made"
+        return GradeResult("ambiguous", None, matched, missed, reason=reason)
+
+    def _subject_points(self, key: Tuple[str, str]) -> Set[int]:
+        return {index for indexes in self._subjects.get(key, {}).values() for index in indexes}
+
+    def _mentions(self, key: Tuple[str, str], seq: List[str]) -> List[Tuple[int, Set[int]]]:
+        """(position, key points it is the subject of) of every subject named in the answer, in order."""
+        subjects = self._subjects.get(key)
+        if not subjects:
+            return []
+        return [
+            (i, points)
+            for i in range(len(seq))
+            for subject, points in subjects.items()
+            if tuple(seq[i:i + len(subject)]) == subject
+        ]
+
+    @staticmethod
+    def _nearest_subject(mentions: List[Tuple[int, Set[int]]], start: int, length: int) -> Optional[Set[int]]:
+        """Key points of the subject named last before the end of the phrase at start, if within SUBJECT_WINDOW words."""
+        nearest = None
+        for position, points in mentions:
+            if position >= start + length:
+                break
+            nearest = (position, points)
+        if nearest is None or nearest[0] < start - SUBJECT_WINDOW:
+            return None
+        return nearest[1]
+
+    @staticmethod
+    def _contains(seq: List[str], phrase: Tuple[str, ...]) -> bool:
+        n = len(phrase)
+        return any(tuple(seq[i:i + n]) == phrase for i in range(len(seq) - n + 1))
+
+
+class FastPathStats:
+    """How many answers one session graded locally, and roughly how much LLM time that saved."""
+
+    def __init__(self):
+        self.answers = 0
+        self.passed = 0
+        self.failed = 0
+        self.local_ms = 0.0
+        self.llm_replies = 0
+        self.llm_ttft_total = 0.0
+
+    def record(self, result: GradeResult):
+        self.answers += 1
+        self.passed += result.verdict == "pass"
+        self.failed += result.verdict == "fail"
+        self.local_ms += result.elapsed_ms
+
+    def observe_llm(self, ttft: float):
+        """Time to first token of an LLM reply, in seconds; the estimate of what a local grade saves."""
+        self.llm_replies += 1
+        self.llm_ttft_total += ttft
+
+    def report(self) -> dict:
+        local = self.passed + self.failed
+        avg_ttft_ms = self.llm_ttft_total / self.llm_replies * 1000 if self.llm_replies else 0.0
+        return {
+            "answers": self.answers,
+            "graded_locally": local,
+            "local_share": round(local / self.answers, 3) if self.answers else 0.0,
+            "avg_local_ms": round(self.local_ms / self.answers, 3) if self.answers else 0.0,
+            "avg_llm_ttft_ms": round(avg_ttft_ms, 1),
+            "est_saved_ms": round(local * avg_ttft_ms - self.local_ms, 1) if self.llm_replies else None,
+        }
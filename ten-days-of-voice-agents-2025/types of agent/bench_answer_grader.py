@@ -0,0 +1,226 @@
+"""Local answer grading: how many answers skip the LLM judge, how often it is wrong, and what it costs.
+
+Builds synthetic learner replies from the shipped rubrics (teach tutor core
+pack and the shared Day 4 content). A learner makes each key point either
+with one of its rubric phrases or with a paraphrase the rubric does not
+know, or skips it. Replies are labelled correct when they make enough key
+points. A point with a subject is usually said about it ("a for loop goes
+over each item"). Also mixed in: answers about the wrong concept, negated
+points, "I don't know" (alone and followed by an attempt), requests like
+"give me a hint", answers that make every point but say each one about
+another point's subject, and hand-written wrong answers that use the right
+keywords: swapped ("a while loop iterates over a sequence...") and
+contradictory ones. Every locally graded reply saves one LLM judging turn;
+llm_ms is the LLM latency assumed for that turn (read avg_llm_ttft_ms from
+a session's shutdown log for a real figure).
+
+False passes are wrong answers graded pass without the LLM and must stay at
+0; "keyword passes" counts the wrong answers that still have the keywords
+of enough key points, i.e. what a keyword-count pass rule would have let
+through.
+
+Part 2 times grading against libraries of 10 to about 10,000 rubrics to
+show the compiled matcher does not slow down as rubrics are added.
+
+Usage: python bench_answer_grader.py [replies] [llm_ms]
+"""
+import json
+import math
+import os
+import random
+import statistics
+import sys
+
+from answer_grader import PASS_SHARE, AnswerGrader, FastPathStats
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PACKS = [
+    os.path.join(SCRIPT_DIR, "teach tutor", "content_packs", "core.json"),
+    os.path.join(SCRIPT_DIR, "..", "Agent type", "Coeffe", "shared-data", "day4_tutor_content.json"),
+]
+FILLER = ["well", "so", "basically", "i think", "um", "you know", "it is like", "and", "then", "also", "in python"]
+PARAPHRASE = ["kinda the thing that", "sort of does the stuff where", "that bit which handles"]
+COMMANDS = ["can you give me a hint", "switch to learn mode please", "could you repeat the question", "skip this one"]
+# Wrong answers made of the right keywords
+KEYWORD_WRONG = {
+    "loops": [
+        "a while loop iterates over a sequence and a for loop runs while a condition is true",
+        "a for loop repeats as long as a condition is true and a while loop goes over each item in a list",
+        "loops repeat code but a for loop never goes over a sequence, it just runs until something is false",
+        "a while loop goes over each item multiple times and a for loop runs as long as a condition is true",
+        "a loop runs code again and again, a while loop over each item in a list and a for loop until it is false",
+        "a for loop runs as long as a condition is true and repeats, a while loop counts a fixed number of times",
+    ],
+    "variables": [
+        "a variable is a name but it cannot store a value and you can never change it later",
+        "it is a box that holds a label, and the label is what you reuse, not any value",
+    ],
+    "function": [
+        "a function is a block of code you can only call once, so you copy it to reuse it",
+        "it is a piece of code that makes things harder to debug because you rewrite it every time",
+        "a function is a block of code that you write many times instead of calling it, which is easier to read",
+        "a function is a piece of code you copy and paste multiple times, which keeps code organized",
+    ],
+    "functions": [
+        "a function is a block of code you can only call once, so you copy it to reuse it",
+        "a function is a block of code that you write many times instead of calling it, which is easier to read",
+    ],
+    "operators": [
+        "== assigns a value and = compares two values and gives true or false",
+        "the equals sign compares and double equals assigns, both give true or false",
+        "double equals assigns a value, the single equals sign compares two values and gives true or false",
+        "the single equal checks if two values are the same and the double equal sets a value, true or false",
+    ],
+    "data_types": [
+        "an integer is text and a string is a whole number, the type says what kind of value it is",
+        "a string is a whole number and an integer is a word in quotes",
+        "a boolean is text, a string is true or false and an int is a letter",
+    ],
+    "oop": [
+        "encapsulation is a child class getting methods from its parent class, inheritance hides data "
+        "and polymorphism bundles the object data and methods",
+        "polymorphism means inherit from a parent class and inheritance means many forms of an object",
+    ],
+    "if_else": [
+        "an if statement repeats a block of code while a condition is true, like a loop over two paths",
+    ],
+    "lists": [
+        "a list is an unordered collection of items written with curly braces, and you cannot sort it",
+    ],
+}
+
+
+def load_concepts():
+    concepts = []
+    for path in PACKS:
+        with open(path) as f:
+            data = json.load(f)
+        concepts.extend(data["concepts"] if isinstance(data, dict) else data)
+    # The core pack wins where both define a concept, as in the tutor
+    unique = {}
+    for concept in concepts:
+        if concept.get("rubric"):
+            unique.setdefault(concept["id"], concept)
+    return list(unique.values())
+
+
+def speak(rng: random.Random, parts) -> str:
+    out = []
+    for part in parts:
+        out.append(rng.choice(FILLER))
+        out.append(part)
+    return " ".join(out)
+
+
+def reply(rng: random.Random, concept: dict, mode: str, others):
+    """(text, label) with label 'correct', 'incorrect' or 'not_an_answer'."""
+    points = concept["rubric"].get(mode) or concept["rubric"]["quiz"]
+    kind = rng.random()
+    if kind < 0.05:
+        return rng.choice(COMMANDS), "not_an_answer"
+    if kind < 0.10:
+        return rng.choice(["i dont know", "no idea sorry", "i forgot this one", "not sure at all"]), "incorrect"
+    if kind < 0.12 and concept["id"] in KEYWORD_WRONG:
+        return rng.choice(KEYWORD_WRONG[concept["id"]]), "incorrect"
+    if kind < 0.22:
+        other = rng.choice(others)
+        other_points = other["rubric"].get(mode) or other["rubric"]["quiz"]
+        return speak(rng, [rng.choice(p["phrases"]) for p in rng.sample(other_points, 2)]), "incorrect"
+    if kind < 0.27:
+        point = rng.choice(points)
+        return speak(rng, [f"it does not {rng.choice(point['phrases'])}"]), "incorrect"
+    if kind < 0.32:
+        swapped = swap_subjects(rng, points)
+        if swapped:
+            return speak(rng, swapped), "incorrect"
+    made, parts = 0, []
+    for point in points:
+        if rng.random() < 0.75:
+            made += 1
+            part = rng.choice(point["phrases"]) if rng.random() < 0.7 else rng.choice(PARAPHRASE)
+            if point.get("subject") and rng.random() < 0.8:
+                part = f"{rng.choice(point['subject'])} {part}"
+            parts.append(part)
+    rng.shuffle(parts)
+    label = "correct" if made >= math.ceil(PASS_SHARE * len(points)) else "incorrect"
+    text = speak(rng, parts) or "hmm"
+    if rng.random() < 0.05:
+        text = "i dont know exactly but " + text
+    return text, label
+
+
+def swap_subjects(rng: random.Random, points) -> list:
+    """Every point made, each subject point said about the next one's subject; [] if there is no such swap."""
+    with_subject = [point for point in points if point.get("subject")]
+    parts = [rng.choice(point["phrases"]) for point in points if not point.get("subject")]
+    for i, point in enumerate(with_subject):
+        other = with_subject[(i + 1) % len(with_subject)]
+        wrong = [subject for subject in other["subject"] if subject not in point["subject"]]
+        if not wrong:
+            return []
+        parts.append(f"{rng.choice(wrong)} {rng.choice(point['phrases'])}")
+    rng.shuffle(parts)
+    return parts
+
+
+def synthetic_rubrics(size: int, rng: random.Random):
+    syllables = ["ka", "lo", "mi", "ne", "su", "ta", "ri", "po", "ve", "do"]
+    word = lambda: "".join(rng.choice(syllables) for _ in range(3))
+    return [
+        {"id": f"c{i}", "rubric": {"quiz": [{"point": word(), "phrases": [word(), f"{word()} {word()}"]} for _ in range(3)]}}
+        for i in range(size)
+    ]
+
+
+def main():
+    replies = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    llm_ms = float(sys.argv[2]) if len(sys.argv) > 2 else 800.0
+    rng = random.Random(5)
+    concepts = load_concepts()
+    grader = AnswerGrader.from_concepts(concepts)
+    stats = FastPathStats()
+    outcomes = {"pass": {}, "fail": {}, "ambiguous": {}}
+    labels = {}
+    keyword_passes = 0
+    for _ in range(replies):
+        concept = rng.choice(concepts)
+        mode = rng.choice(["quiz", "teach_back"])
+        others = [c for c in concepts if c["id"] != concept["id"]]
+        text, label = reply(rng, concept, mode, others)
+        result = grader.grade(concept["id"], mode, text)
+        stats.record(result)
+        stats.observe_llm(llm_ms / 1000)
+        outcomes[result.verdict][label] = outcomes[result.verdict].get(label, 0) + 1
+        labels[label] = labels.get(label, 0) + 1
+        keyword_passes += label == "incorrect" and result.reason.startswith("key point keywords present")
+
+    report = stats.report()
+    local = report["graded_locally"]
+    wrong = outcomes["pass"].get("incorrect", 0) + outcomes["fail"].get("correct", 0)
+    commands = sum(outcomes[v].get("not_an_answer", 0) for v in ("pass", "fail"))
+    incorrect = labels.get("incorrect", 0)
+    print(f"{replies:,} synthetic replies over {len(concepts)} rubrics")
+    for verdict, by_label in outcomes.items():
+        print(f"  {verdict:<10} " + ("  ".join(f"{label} {count:,}" for label, count in sorted(by_label.items())) or "none"))
+    print(f"  graded without the LLM: {report['local_share']:.1%}  (wrong verdicts {wrong / max(1, local):.2%}, "
+          f"commands graded {commands})")
+    print(f"  false passes: {outcomes['pass'].get('incorrect', 0)} of {incorrect:,} wrong answers; "
+          f"keyword passes: {keyword_passes} ({keyword_passes / max(1, incorrect):.1%})")
+    print(f"  clear passes: {outcomes['pass'].get('correct', 0):,} of {labels.get('correct', 0):,} correct answers; "
+          f"correct answers failed: {outcomes['fail'].get('correct', 0)}")
+    print(f"  local grade: avg {report['avg_local_ms'] * 1000:.0f} us")
+    print(f"  LLM time saved at {llm_ms:.0f} ms per judging turn: {report['est_saved_ms'] / 1000:,.0f} s total, "
+          f"{report['est_saved_ms'] / replies:.0f} ms per reply on average")
+
+    assert outcomes["pass"].get("incorrect", 0) == 0, "a wrong answer was passed without the LLM"
+
+    print("\nGrading cost as rubrics are added (median us per reply)")
+    sample = [reply(rng, c, "quiz", [c])[0] for c in rng.choices(concepts, k=2_000)]
+    for size in (0, 1_000, 10_000):
+        big = AnswerGrader.from_concepts(concepts + synthetic_rubrics(size, rng))
+        times = [big.grade("variables", "quiz", text).elapsed_ms * 1000 for text in sample]
+        print(f"  {len(concepts) + size:>6,} rubrics  {statistics.median(times):6.1f} us")
+
+
+if __name__ == "__main__":
+    main()
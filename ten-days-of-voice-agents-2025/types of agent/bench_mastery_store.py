@@ -0,0 +1,111 @@
+"""Mastery store: session-start load, turn-boundary writes and weakest() queries.
+
+Part 1 times weakest(3) against sorting every score, for learners with
+more and more practiced concepts. Part 2 times LearnerMastery.open() for a
+returning learner. Part 3 runs several worker processes, each serving many
+learners turn by turn (update 1-3 concepts, then flush), against a single
+database file and against the sharded store, and reports flush latency
+and total turns per second.
+
+Usage: python bench_mastery_store.py [workers] [turns_per_worker]
+"""
+import asyncio
+import multiprocessing
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from mastery_store import LearnerMastery, MasteryStore
+
+CONCEPTS = [f"concept_{i}" for i in range(200)]
+
+
+def time_weakest(size: int, repeat: int = 2_000):
+    rng = random.Random(size)
+    mastery = LearnerMastery(None, "bench", {f"c{i}": (rng.random(), {}) for i in range(size)})
+    start = time.perf_counter()
+    for _ in range(repeat):
+        # One score changes per turn, then the tutor asks for weak spots
+        mastery.update(f"c{rng.randrange(size)}", score=rng.random())
+        mastery.weakest(3)
+    bucket_us = (time.perf_counter() - start) / repeat * 1e6
+    scores = {f"c{i}": rng.random() for i in range(size)}
+    start = time.perf_counter()
+    for _ in range(repeat):
+        scores[f"c{rng.randrange(size)}"] = rng.random()
+        sorted(scores.items(), key=lambda item: item[1])[:3]
+    sort_us = (time.perf_counter() - start) / repeat * 1e6
+    return bucket_us, sort_us
+
+
+async def time_open(directory: str, concepts: int, repeat: int = 50) -> float:
+    store = MasteryStore(directory)
+    mastery = LearnerMastery(store, "returning")
+    for i in range(concepts):
+        mastery.update(f"c{i}", {"tutor": {"times_learned": 3, "last_score": 4}}, score=0.8)
+    await mastery.flush()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await LearnerMastery.open(store, "returning")
+        samples.append((time.perf_counter() - start) * 1000)
+    store.close()
+    return statistics.median(samples)
+
+
+async def serve(directory: str, shards: int, worker: int, turns: int) -> list:
+    rng = random.Random(worker)
+    store = MasteryStore(directory, shards=shards)
+    learners = [await LearnerMastery.open(store, f"learner-{worker}-{i}") for i in range(8)]
+    latencies = []
+    for _ in range(turns):
+        learner = rng.choice(learners)
+        for concept_id in rng.sample(CONCEPTS, rng.randint(1, 3)):
+            learner.update(concept_id, {"tutor": {"times_quizzed": 1}}, score=rng.random())
+        start = time.perf_counter()
+        await learner.flush()
+        latencies.append((time.perf_counter() - start) * 1000)
+    store.close()
+    return latencies
+
+
+def run_worker(args) -> list:
+    return asyncio.run(serve(*args))
+
+
+def contention(workers: int, turns: int, shards: int):
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        with multiprocessing.Pool(workers) as pool:
+            results = pool.map(run_worker, [(directory, shards, w, turns) for w in range(workers)])
+        elapsed = time.perf_counter() - start
+    latencies = sorted(ms for worker in results for ms in worker)
+    p99 = latencies[int(len(latencies) * 0.99)]
+    return statistics.median(latencies), p99, workers * turns / elapsed
+
+
+def main():
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    turns = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+
+    print("weakest(3) after one score change (us per query)")
+    print(f"  {'concepts':>9} {'buckets':>9} {'sort':>9}")
+    for size in (10, 1_000, 100_000):
+        bucket_us, sort_us = time_weakest(size, repeat=2_000 if size < 100_000 else 50)
+        print(f"  {size:>9,} {bucket_us:>9.1f} {sort_us:>9.1f}")
+
+    print("\nSession start: LearnerMastery.open() for a returning learner (median ms)")
+    with tempfile.TemporaryDirectory() as directory:
+        for concepts in (7, 200, 5_000):
+            print(f"  {concepts:>5} concepts  {asyncio.run(time_open(directory + f'/{concepts}', concepts)):6.2f} ms")
+
+    print(f"\nTurn-boundary flushes, {workers} workers x {turns} turns")
+    for label, shards in (("one file", 1), ("16 shards", 16)):
+        p50, p99, rate = contention(workers, turns, shards)
+        print(f"  {label:<10} flush p50 {p50:6.2f} ms  p99 {p99:6.2f} ms  {rate:8.0f} turns/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""Save/load latency and file size for slot saves vs the old pretty-printed JSON.
+
+Builds a late-game state for both WorldState variants, then times:
+  - the old save (json.dump with indent to one shared file) and load
+  - a slot save (binary header + zlib JSON, or the game master's journal) and load
+  - event-loop lag while many players autosave, inline vs via Autosaver
+
+Usage: python bench_save_slots.py [turns] [players]
+"""
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+import gamemaster_tools
+from agent import WorldState as HorrorWorld
+from save_slots import Autosaver
+
+
+def timed(fn, repeat: int = 20) -> float:
+    """Median milliseconds for fn()."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def play_horror(world: HorrorWorld, turns: int):
+    for turn in range(turns):
+        world.roll_dice()
+        world.random_horror_event()
+        if turn % 5 == 0:
+            world.add_inventory_item(f"Cursed relic {turn}")
+
+
+def play_gamemaster(world, turns: int, rng: random.Random):
+    for turn in range(turns):
+        world.log_event(f"Turn {turn}: the party {rng.choice(['fought', 'explored', 'rested'])} near landmark {rng.randrange(500)}.")
+        if rng.random() < 0.2:
+            world.add_inventory_item(f"Trinket {turn}")
+        else:
+            world.update_character_status(hp=rng.randint(1, 20))
+
+
+def legacy_save(state: dict, path: str, indent: int):
+    with open(path, "w") as f:
+        json.dump(state, f, indent=indent)
+
+
+def legacy_load(path: str):
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+async def loop_lag(worlds, autosave: bool, seconds: float = 1.0, interval: float = 0.05) -> float:
+    """Event-loop lag percentiles (p50, p99) in ms while every world saves each interval."""
+    lags = []
+
+    async def ticker():
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(0.001)
+            lags.append((time.perf_counter() - start) * 1000 - 1)
+
+    async def inline(world):
+        while True:
+            await asyncio.sleep(interval)
+            world.state["player"]["fear"] += 1
+            world.save_game()
+
+    async def nudge(world):
+        while True:
+            await asyncio.sleep(interval)
+            world.state["player"]["fear"] += 1
+
+    tasks = [asyncio.create_task(ticker())]
+    savers = []
+    for world in worlds:
+        if autosave:
+            saver = Autosaver(world.prepare_save, interval=interval)
+            saver.start()
+            savers.append(saver)
+            tasks.append(asyncio.create_task(nudge(world)))
+        else:
+            tasks.append(asyncio.create_task(inline(world)))
+    await asyncio.sleep(seconds)
+    for task in tasks:
+        task.cancel()
+    for saver in savers:
+        await saver.stop()
+    lags.sort()
+    return lags[len(lags) // 2], lags[int(len(lags) * 0.99)]
+
+
+def main():
+    turns = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000
+    players = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        print(f"{'variant':<22} {'save ms':>9} {'load ms':>9} {'size KiB':>9}")
+
+        horror = HorrorWorld(seed=1, player="Mary Jane")
+        play_horror(horror, turns)
+        legacy_save(horror.state, "shadowrealm_save.json", 4)
+        print(f"{'horror, old JSON':<22} {timed(lambda: legacy_save(horror.state, 'shadowrealm_save.json', 4)):>9.3f} "
+              f"{timed(lambda: legacy_load('shadowrealm_save.json')):>9.3f} {os.path.getsize('shadowrealm_save.json') / 1024:>9.1f}")
+
+        def horror_save():
+            horror._last_saved = None
+            horror.save_game()
+        horror_save()
+        reloaded = HorrorWorld(player="Mary Jane")
+        print(f"{'horror, slot':<22} {timed(horror_save):>9.3f} {timed(reloaded.load_game):>9.3f} "
+              f"{os.path.getsize(horror.slots.path(1)) / 1024:>9.1f}")
+        assert reloaded.state == horror.state and reloaded.roll_dice() == horror.roll_dice()
+
+        rng = random.Random(2)
+        gm = gamemaster_tools.WorldState.for_player("Mary Jane", slot=2)
+        gm.save_game()
+        gm_saves = []
+        for _ in range(turns):
+            play_gamemaster(gm, 1, rng)
+            start = time.perf_counter()
+            gm.save_game()
+            gm_saves.append((time.perf_counter() - start) * 1000)
+        legacy_save(gm.state, "gamestate.json", 2)
+        print(f"{'game master, old JSON':<22} {timed(lambda: legacy_save(gm.state, 'gamestate.json', 2)):>9.3f} "
+              f"{timed(lambda: legacy_load('gamestate.json')):>9.3f} {os.path.getsize('gamestate.json') / 1024:>9.1f}")
+        gm_save_ms = statistics.median(gm_saves)
+        gm.journal.close()
+        gm_reloaded = gamemaster_tools.WorldState.for_player("Mary Jane", slot=2)
+        gm_load_ms = timed(gm_reloaded.load_game, repeat=5)
+        base = os.path.splitext(gm.save_path)[0]
+        gm_size = sum(os.path.getsize(f"{base}{ext}") for ext in (".snap", ".journal"))
+        print(f"{'game master, slot':<22} {gm_save_ms:>9.3f} {gm_load_ms:>9.3f} {gm_size / 1024:>9.1f}")
+        assert gm_reloaded.state == gm.state
+
+        worlds = [HorrorWorld(seed=i, player=f"player {i}") for i in range(players)]
+        for world in worlds:
+            play_horror(world, turns // 4)
+        print(f"\n{players} players saving every 50 ms, event-loop lag (p50 / p99 ms):")
+        for label, autosave in (("inline save_game", False), ("Autosaver", True)):
+            p50, p99 = asyncio.run(loop_lag(worlds, autosave))
+            print(f"  {label:<17} {p50:6.2f} / {p99:6.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Prompt tokens per turn with full-state injection vs WorldContext diffs.
+
+Plays a scripted adventure. Every turn the user speaks, the world changes a
+little, the state is injected into the history and the game master replies.
+The prompt for a turn is the system prompt plus the whole history. When the
+history passes the budget it is compacted: the oldest messages are dropped
+until it is down to half the budget. Dropping an injected state message
+triggers a full refresh in the diff strategy, as WorldContext.inject does.
+
+Tokens are estimated as words plus punctuation marks, close enough to BPE
+counts for comparing strategies.
+
+Usage: python bench_world_context.py [turns] [history_budget_tokens]
+"""
+import json
+import random
+import re
+import sys
+
+from gamemaster_tools import WorldState
+from world_context import WorldContext
+
+SYSTEM_PROMPT = (
+    "You are the Game Master of a fantasy adventure. Describe scenes vividly but briefly, "
+    "ask the player what they do next, use the tools to roll dice and keep the world state "
+    "up to date, and never contradict the world state you are given."
+)
+ACTIONS = ["I head north.", "I search the room.", "I talk to the stranger.", "I attack!", "I rest for a while.", "I open the chest."]
+PLACES = ["The Dark Forest", "Oakhaven Village", "The Sunken Crypt", "Goblin Camp", "Riverside Mill"]
+ITEMS = ["Torch", "Healing Potion", "Silver Key", "Rope", "Ancient Coin"]
+TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+
+def tokens(text: str) -> int:
+    return len(TOKEN_RE.findall(text))
+
+
+def world_turn(world: WorldState, turn: int, rng: random.Random):
+    roll = rng.random()
+    if roll < 0.25:
+        place = rng.choice(PLACES)
+        world.update_location(place, f"You arrive at {place}. Shadows stretch across the ground.", ["North", "South", "West"])
+    elif roll < 0.45:
+        world.add_inventory_item(rng.choice(ITEMS))
+    elif roll < 0.55 and len(world.character.inventory) > 2:
+        world.remove_inventory_item(rng.choice(list(world.character.inventory)))
+    elif roll < 0.8:
+        hp = max(1, world.character.hp - rng.randint(1, 4))
+        world.update_character_status(hp=hp, status="Wounded" if hp < 10 else "Healthy")
+    if rng.random() < 0.6:
+        world.log_event(f"Turn {turn}: something happened near {world.location.name}.")
+
+
+def play(strategy: str, turns: int, budget: int) -> list:
+    rng = random.Random(7)
+    world = WorldState()
+    context = WorldContext(world)
+    history = []
+    per_turn = []
+    for turn in range(turns):
+        world_turn(world, turn, rng)
+        history.append(("user", rng.choice(ACTIONS)))
+        if strategy == "full":
+            injected = "World state: " + json.dumps(world.get_state())
+        else:
+            injected = context.update()
+        if injected:
+            history.append(("system", injected))
+
+        prompt = tokens(SYSTEM_PROMPT) + sum(tokens(text) for _, text in history)
+        per_turn.append((prompt, tokens(injected)))
+
+        history.append(("assistant", "The torchlight flickers as you move on. What do you do next, adventurer?"))
+        if sum(tokens(text) for _, text in history) > budget:
+            while sum(tokens(text) for _, text in history) > budget // 2:
+                role, _ = history.pop(0)
+                if role == "system" and strategy == "diff":
+                    context.reset()
+    return per_turn
+
+
+def main():
+    turns = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    budget = int(sys.argv[2]) if len(sys.argv) > 2 else 4_000
+    results = {name: play(name, turns, budget) for name in ("full", "diff")}
+
+    print(f"Turns: {turns}  history budget: {budget:,} tokens")
+    print(f"{'turn':>5} {'full prompt':>12} {'full injected':>14} {'diff prompt':>12} {'diff injected':>14}")
+    for turn in range(0, turns, max(1, turns // 12)):
+        (fp, fi), (dp, di) = results["full"][turn], results["diff"][turn]
+        print(f"{turn + 1:>5} {fp:>12,} {fi:>14,} {dp:>12,} {di:>14,}")
+    for name, per_turn in results.items():
+        prompts = [p for p, _ in per_turn]
+        injected = [i for _, i in per_turn]
+        print(
+            f"{name:>5}: mean prompt {sum(prompts) / turns:,.0f} tokens/turn, "
+            f"mean injected {sum(injected) / turns:,.0f} tokens/turn, total prompt {sum(prompts):,}"
+        )
+
+
+if __name__ == "__main__":
+    main()
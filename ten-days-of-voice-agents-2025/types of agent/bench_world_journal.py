@@ -0,0 +1,104 @@
+"""Benchmark journaled WorldState saves against full JSON rewrites on a long campaign.
+
+Each turn logs an event, sometimes moves, picks up or drops an item or takes
+damage, then saves. The legacy path rewrites the whole state with indent=2
+every turn, like save_game used to, including every event ever logged.
+
+Usage: python bench_world_journal.py [turns] [compact_every]
+"""
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from gamemaster_tools import WorldState
+
+
+def play_turn(world: WorldState, turn: int, rng: random.Random):
+    world.log_event(f"Turn {turn}: the party {rng.choice(['fought', 'explored', 'rested', 'bartered'])} near landmark {rng.randrange(500)}.")
+    roll = rng.random()
+    if roll < 0.2:
+        world.update_location(f"Place {turn}", f"A place discovered on turn {turn}.", ["North", "South"])
+    elif roll < 0.35:
+        world.add_inventory_item(f"Trinket {turn}")
+    elif roll < 0.45 and len(world.character.inventory) > 3:
+        world.remove_inventory_item(next(reversed(world.character.inventory)))
+    elif roll < 0.6:
+        world.update_character_status(hp=rng.randint(1, 20))
+
+
+def percentile(values, q):
+    return sorted(values)[min(len(values) - 1, int(len(values) * q))]
+
+
+def main():
+    turns = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000
+    compact_every = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_path = os.path.join(tmp, "legacy.json")
+        rng = random.Random(5)
+        world = WorldState(os.path.join(tmp, "unused.json"))
+        legacy_saves = []
+        all_events = []
+        for turn in range(turns):
+            play_turn(world, turn, rng)
+            all_events.append(world.events[-1])
+            start = time.perf_counter()
+            with open(legacy_path, "w") as f:
+                json.dump({**world.state, "events": all_events}, f, indent=2)
+            legacy_saves.append((time.perf_counter() - start) * 1000)
+
+        rng = random.Random(5)
+        save_path = os.path.join(tmp, "journaled.json")
+        world = WorldState(save_path, compact_every=compact_every)
+        world.save_game()
+        journal_saves = []
+        for turn in range(turns):
+            play_turn(world, turn, rng)
+            start = time.perf_counter()
+            world.save_game()
+            journal_saves.append((time.perf_counter() - start) * 1000)
+        final_state = world.state
+        world.journal.close()
+
+        start = time.perf_counter()
+        with open(legacy_path, "r") as f:
+            legacy_loaded = json.load(f)
+        legacy_load_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        reloaded = WorldState(save_path)
+        reloaded.load_game()
+        journal_load_ms = (time.perf_counter() - start) * 1000
+
+        legacy_size = os.path.getsize(legacy_path)
+        base = os.path.splitext(save_path)[0]
+        journal_size = os.path.getsize(f"{base}.snap") + os.path.getsize(f"{base}.journal")
+        archive_size = os.path.getsize(f"{base}.events.jsonl") if os.path.exists(f"{base}.events.jsonl") else 0
+        archived_events = list(reloaded.journal.archived())
+
+    print(f"Turns: {turns:,}  events in memory: {len(final_state['events']):,}  compact_every: {compact_every}")
+    for label, saves in (("Full rewrite", legacy_saves), ("Journaled", journal_saves)):
+        last = saves[-1000:]
+        print(
+            f"{label:>12} save ms  mean={statistics.mean(saves):.3f}  p99={percentile(saves, 0.99):.3f}  max={max(saves):.3f}"
+            f"  last-1000 mean={statistics.mean(last):.3f}  total={sum(saves) / 1000:.2f}s"
+        )
+    print(f"Load ms  full JSON={legacy_load_ms:.1f}  snapshot+replay={journal_load_ms:.1f}")
+    print(
+        f"On disk  full JSON={legacy_size / 1024:,.0f} KiB  snapshot+journal={journal_size / 1024:,.0f} KiB"
+        f"  event archive={archive_size / 1024:,.0f} KiB"
+    )
+    live_events = final_state["events"]
+    print(
+        f"States match: {reloaded.state == final_state}"
+        f"  events match: {legacy_loaded['events'] == archived_events + live_events}"
+    )
+
+
+if __name__ == "__main__":
+    main()
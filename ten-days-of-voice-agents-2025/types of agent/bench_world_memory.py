@@ -0,0 +1,85 @@
+"""Measure memory per game-master session for the old dict layout and the slots model.
+
+Plays the same scripted turns into many live sessions of each kind and
+reports the traced allocation per session. The old layout is a nested dict
+with a list inventory and an unbounded event list, as WorldState used to
+hold. Slots sessions save every few turns, as the agent does, so evicted
+events land in the on-disk archive instead of memory.
+
+Usage: python bench_world_memory.py [sessions] [turns_per_session] [save_every]
+"""
+import copy
+import os
+import random
+import sys
+import tempfile
+import tracemalloc
+
+from gamemaster_tools import WorldState, default_state
+
+
+class DictWorld:
+    """Minimal stand-in for the previous dict-backed WorldState."""
+
+    def __init__(self):
+        self.state = copy.deepcopy(default_state())
+
+    def log_event(self, event: str):
+        self.state["events"].append(event)
+
+    def add_inventory_item(self, item: str):
+        if item not in self.state["character"]["inventory"]:
+            self.state["character"]["inventory"].append(item)
+
+    def update_character_status(self, hp: int = None, status: str = None):
+        if hp is not None:
+            self.state["character"]["hp"] = hp
+
+    def save_game(self):
+        pass
+
+
+def play(world, turns: int, save_every: int, rng: random.Random):
+    for turn in range(turns):
+        world.log_event(f"Turn {turn}: the party {rng.choice(['fought', 'explored', 'rested', 'bartered'])} near landmark {rng.randrange(500)}.")
+        if rng.random() < 0.1:
+            world.add_inventory_item(f"Trinket {turn}")
+        else:
+            world.update_character_status(hp=rng.randint(1, 20))
+        if turn % save_every == save_every - 1:
+            world.save_game()
+
+
+def measure(factory, sessions: int, turns: int, save_every: int) -> float:
+    rng = random.Random(11)
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    worlds = []
+    for i in range(sessions):
+        world = factory(i)
+        play(world, turns, save_every, rng)
+        worlds.append(world)
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    for world in worlds:
+        if getattr(world, "journal", None) is not None:
+            world.journal.close()
+    return used / sessions
+
+
+def main():
+    sessions = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    turns = int(sys.argv[2]) if len(sys.argv) > 2 else 1_000
+    save_every = int(sys.argv[3]) if len(sys.argv) > 3 else 5
+
+    with tempfile.TemporaryDirectory() as tmp:
+        dict_bytes = measure(lambda i: DictWorld(), sessions, turns, save_every)
+        slots_bytes = measure(lambda i: WorldState(os.path.join(tmp, f"session{i}.json")), sessions, turns, save_every)
+
+    print(f"Sessions: {sessions}  turns per session: {turns:,}  save every: {save_every} turns")
+    print(f"Dict layout   {dict_bytes / 1024:8.1f} KiB/session")
+    print(f"Slots model   {slots_bytes / 1024:8.1f} KiB/session  (dict/slots = {dict_bytes / slots_bytes:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
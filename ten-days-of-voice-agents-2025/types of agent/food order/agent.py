@@ -2,6 +2,7 @@ import logging
 import json
 import os
 import asyncio
+import sys
 from datetime import datetime
 from typing import Annotated, List
 
@@ -25,6 +26,9 @@ SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 CATALOG_FILE = os.path.join(SCRIPT_DIR, "grocery_catalog.json")
 ORDERS_FILE = os.path.join(SCRIPT_DIR, "orders.json")
 
+sys.path.insert(0, os.path.dirname(SCRIPT_DIR))
+from order_ids import new_order_id
+
 RECIPES = {
     # --- Indian Mains (10) ---
     "dal_makhani": ["urad_dal", "kidney_beans", "butter", "cream", "ginger", "garlic", "chilli_powder", "garam_masala"],
@@ -70,13 +74,17 @@ RECIPES = {
 class StoreManager:
     def __init__(self):
         self.catalog = []
+        self.items_by_id = {}
+        self.customer_history = {}
         self._load_catalog()
         self._ensure_orders_file()
+        self._build_history_index()
 
     def _load_catalog(self):
         if os.path.exists(CATALOG_FILE):
             with open(CATALOG_FILE, "r") as f:
                 self.catalog = json.load(f)
+        self.items_by_id = {item["id"]: item for item in self.catalog}
 
     def _ensure_orders_file(self):
         if not os.path.exists(ORDERS_FILE):
@@ -91,11 +99,56 @@ class StoreManager:
             if name_query in item["name"].lower(): return item
         return None
 
-    def save_order(self, cart_items: dict, total: float):
-        order_id = f"ORD-{int(datetime.now().timestamp())}"
+    def _build_history_index(self):
+        try:
+            with open(ORDERS_FILE, "r") as f:
+                orders = json.load(f)
+        except Exception:
+            orders = []
+        for order in orders:
+            self._index_order(order)
+
+    @staticmethod
+    def _customer_key(customer_name: str) -> str:
+        return " ".join(customer_name.lower().split())
+
+    def _index_order(self, order: dict):
+        """Folds one order into its customer's history, keeping the usual basket precomputed."""
+        customer = order.get("customer")
+        if not customer:
+            return
+        history = self.customer_history.setdefault(self._customer_key(customer), {
+            "orders": 0,
+            "last_items": {},
+            "item_counts": {},
+            "item_quantities": {},
+            "usual_items": {},
+        })
+        history["orders"] += 1
+        history["last_items"] = dict(order["items"])
+        for item_id, qty in order["items"].items():
+            history["item_counts"][item_id] = history["item_counts"].get(item_id, 0) + 1
+            history["item_quantities"][item_id] = history["item_quantities"].get(item_id, 0) + qty
+
+        # "Usual" items show up in at least half of the customer's orders, at their average quantity.
+        usual = sorted(
+            (item_id for item_id, count in history["item_counts"].items() if count * 2 >= history["orders"]),
+            key=lambda item_id: -history["item_counts"][item_id],
+        )
+        history["usual_items"] = {
+            item_id: max(1, round(history["item_quantities"][item_id] / history["item_counts"][item_id]))
+            for item_id in usual
+        }
+
+    def get_customer_history(self, customer_name: str):
+        return self.customer_history.get(self._customer_key(customer_name))
+
+    def save_order(self, cart_items: dict, total: float, customer_name: str = ""):
+        order_id = new_order_id("ORD")
         order = {
             "id": order_id,
             "timestamp": datetime.now().isoformat(),
+            "customer": customer_name,
             "items": cart_items,
             "total": total,
             "status": "received"
@@ -111,7 +164,8 @@ class StoreManager:
         
         with open(ORDERS_FILE, "w") as f:
             json.dump(data, f, indent=2)
-        
+
+        self._index_order(order)
         return order_id
 
     def update_mock_statuses(self):
@@ -159,6 +213,9 @@ class GroceryAgent(Agent):
             2. **Manage Cart:** Remove items using `remove_from_cart` or show the cart total using `view_cart`.
             3. **Place Order:** When the user is done, summarize the total and call `place_order`.
             4. **Tracking:** If the user asks "Where is my order?", use `track_orders`.
+            5. **Returning Customers:** Ask for the customer's name. If they want "the same as last time", call `reorder_last`;
+               if they want "my usual", call `add_usual_items`. Each rebuilds the whole priced cart in one call.
+               Pass the customer's name to `place_order` so their history stays up to date.
             
             BEHAVIOR:
             - If an item isn't found, suggest something similar.
@@ -167,6 +224,23 @@ class GroceryAgent(Agent):
         )
         self.store = StoreManager()
         self.cart = {}
+        self.customer_name = ""
+
+    def _cart_summary(self):
+        summary = []
+        total = 0.0
+        for item_id, qty in self.cart.items():
+            item = self.store.items_by_id.get(item_id)
+            if item:
+                cost = item["price"] * qty
+                total += cost
+                summary.append(f"{qty}x {item['name']} (${cost:.2f})")
+        return summary, total
+
+    def _add_items(self, items: dict):
+        for item_id, qty in items.items():
+            if item_id in self.store.items_by_id:
+                self.cart[item_id] = self.cart.get(item_id, 0) + qty
 
     @function_tool
     async def get_catalog_items(self, ctx: RunContext):
@@ -239,30 +313,56 @@ class GroceryAgent(Agent):
         """Check what is currently in the cart and the total price."""
         if not self.cart:
             return "Cart is empty."
-        
-        summary = []
-        total = 0.0
-        for item_id, qty in self.cart.items():
-            item = next((i for i in self.store.catalog if i["id"] == item_id), None)
-            if item:
-                cost = item["price"] * qty
-                total += cost
-                summary.append(f"{qty}x {item['name']} (${cost:.2f})")
-        
+
+        summary, total = self._cart_summary()
         return f"Cart: {', '.join(summary)}. Total: ${total:.2f}"
 
     @function_tool
-    async def place_order(self, ctx: RunContext):
+    async def reorder_last(
+        self,
+        ctx: RunContext,
+        customer_name: Annotated[str, "Customer's name"]
+    ):
+        """Add everything from the customer's most recent order to the cart in one step."""
+        history = self.store.get_customer_history(customer_name)
+        if not history:
+            return f"I don't have any past orders for {customer_name}."
+
+        self.customer_name = customer_name
+        self._add_items(history["last_items"])
+        summary, total = self._cart_summary()
+        return f"Added your last order. Cart: {', '.join(summary)}. Total: ${total:.2f}"
+
+    @function_tool
+    async def add_usual_items(
+        self,
+        ctx: RunContext,
+        customer_name: Annotated[str, "Customer's name"]
+    ):
+        """Add the customer's usual basket (items in at least half of their orders) to the cart in one step."""
+        history = self.store.get_customer_history(customer_name)
+        if not history or not history["usual_items"]:
+            return f"I don't have a usual basket for {customer_name} yet."
+
+        self.customer_name = customer_name
+        self._add_items(history["usual_items"])
+        summary, total = self._cart_summary()
+        return f"Added your usual items. Cart: {', '.join(summary)}. Total: ${total:.2f}"
+
+    @function_tool
+    async def place_order(
+        self,
+        ctx: RunContext,
+        customer_name: Annotated[str, "Customer's name, used for their order history"] = ""
+    ):
         """Finalize the order and save it."""
         if not self.cart:
             return "Cart is empty. Cannot place order."
-        
-        total = 0.0
-        for item_id, qty in self.cart.items():
-            item = next((i for i in self.store.catalog if i["id"] == item_id), None)
-            if item: total += item["price"] * qty
-            
-        order_id = self.store.save_order(self.cart, total)
+
+        if customer_name:
+            self.customer_name = customer_name
+        _, total = self._cart_summary()
+        order_id = self.store.save_order(self.cart, total, self.customer_name)
         self.cart = {}
         return f"Order placed! ID: {order_id}. Total: ${total:.2f}. Status: Received."
 
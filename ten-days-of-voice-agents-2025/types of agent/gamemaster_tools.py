@@ -1,113 +1,336 @@
-import json
-import random
-import logging
-import os
-
-logger = logging.getLogger("gamemaster-tools")
-
-class WorldState:
-    def __init__(self):
-        self.state = {
-            "character": {
-                "name": "mikasa",
-                "class": "Adventurer",
-                "hp": 20,
-                "max_hp": 20,
-                "inventory": ["Old Map", "Rusty Dagger", "Water Skin"],
-                "status": "Healthy"
-            },
-            "location": {
-                "name": "The Crossroads",
-                "description": "You stand at a dusty crossroads. To the north lies the Dark Forest, to the east the Village of Oakhaven.",
-                "known_paths": ["North", "East", "South"]
-            },
-            "events": [],
-            "quests": [
-                {"name": "Find the Lost Relic", "status": "Active", "description": "Rumors say a powerful relic is hidden in the Dark Forest."}
-            ]
-        }
-
-    def get_state(self) -> dict:
-        """Returns the current world state."""
-        return self.state
-
-    def update_location(self, name: str, description: str, paths: list[str]):
-        """Updates the current location."""
-        self.state["location"] = {
-            "name": name,
-            "description": description,
-            "known_paths": paths
-        }
-        logger.info(f"Location updated to: {name}")
-
-    def update_character_status(self, hp: int = None, status: str = None):
-        """Updates character HP and status."""
-        if hp is not None:
-            self.state["character"]["hp"] = hp
-        if status is not None:
-            self.state["character"]["status"] = status
-        logger.info(f"Character status updated: HP={self.state['character']['hp']}, Status={self.state['character']['status']}")
-
-    def add_inventory_item(self, item: str):
-        """Adds an item to the inventory."""
-        if item not in self.state["character"]["inventory"]:
-            self.state["character"]["inventory"].append(item)
-            logger.info(f"Added item: {item}")
-            return f"Added {item} to inventory."
-        return f"{item} is already in inventory."
-
-    def remove_inventory_item(self, item: str):
-        """Removes an item from the inventory."""
-        if item in self.state["character"]["inventory"]:
-            self.state["character"]["inventory"].remove(item)
-            logger.info(f"Removed item: {item}")
-            return f"Removed {item} from inventory."
-        return f"{item} not found in inventory."
-
-    def log_event(self, event: str):
-        """Logs a significant event."""
-        self.state["events"].append(event)
-        logger.info(f"Event logged: {event}")
-
-    def roll_dice(self, sides: int = 20) -> int:
-        """Rolls a die with the specified number of sides."""
-        result = random.randint(1, sides)
-        logger.info(f"Rolled d{sides}: {result}")
-        return result
-
-    def get_inventory_description(self) -> str:
-        """Returns a formatted string of the inventory."""
-        items = ", ".join(self.state["character"]["inventory"])
-        return f"Inventory: {items}"
-
-    def get_character_sheet(self) -> str:
-        """Returns a formatted character sheet."""
-        char = self.state["character"]
-        return (f"Name: {char['name']} ({char['class']})\n"
-                f"HP: {char['hp']}/{char['max_hp']} ({char['status']})\n"
-                f"Inventory: {', '.join(char['inventory'])}")
-
-    def save_game(self, filename: str = "gamestate.json") -> str:
-        """Saves the current world state to a JSON file."""
-        try:
-            with open(filename, 'w') as f:
-                json.dump(self.state, f, indent=2)
-            logger.info(f"Game saved to {filename}")
-            return f"Game successfully saved to {filename}."
-        except Exception as e:
-            logger.error(f"Error saving game: {e}")
-            return "Failed to save game."
-
-    def load_game(self, filename: str = "gamestate.json") -> str:
-        """Loads the world state from a JSON file."""
-        try:
-            if not os.path.exists(filename):
-                return "No saved game found."
-            
-            with open(filename, 'r') as f:
-                self.state = json.load(f)
-            logger.info(f"Game loaded from {filename}")
-            return "Game loaded successfully. Welcome back, traveler."
-        except Exception as e:
-            logger.error(f"Error loading game: {e}")
-            return "Failed to load game."
\ No newline at end of file
+import json
+import random
+import logging
+import os
+from collections import deque
+from typing import Callable, Iterable, List, Optional
+
+from save_slots import SAVES_DIR, SaveSlots
+from world_journal import WorldJournal
+
+logger = logging.getLogger("gamemaster-tools")
+
+SAVE_FILE = "gamestate.json"
+# Journal records between full snapshots
+COMPACT_EVERY = 500
+# Events kept in memory; older ones are spilled to the save's event archive
+RECENT_EVENTS = 50
+
+
+class Character:
+    __slots__ = ("name", "char_class", "hp", "max_hp", "inventory", "status")
+
+    def __init__(self, name: str, char_class: str, hp: int, max_hp: int, inventory: Iterable[str], status: str):
+        self.name = name
+        self.char_class = char_class
+        self.hp = hp
+        self.max_hp = max_hp
+        # dict keys as an insertion-ordered set: O(1) membership and removal
+        self.inventory = dict.fromkeys(inventory)
+        self.status = status
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "class": self.char_class,
+            "hp": self.hp,
+            "max_hp": self.max_hp,
+            "inventory": list(self.inventory),
+            "status": self.status
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Character":
+        return cls(data["name"], data["class"], data["hp"], data["max_hp"], data["inventory"], data["status"])
+
+
+class Location:
+    __slots__ = ("name", "description", "known_paths")
+
+    def __init__(self, name: str, description: str, known_paths: List[str]):
+        self.name = name
+        self.description = description
+        self.known_paths = known_paths
+
+    def to_dict(self) -> dict:
+        return {"name": self.name, "description": self.description, "known_paths": list(self.known_paths)}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Location":
+        return cls(data["name"], data["description"], list(data["known_paths"]))
+
+
+class Quest:
+    __slots__ = ("name", "status", "description")
+
+    def __init__(self, name: str, status: str, description: str):
+        self.name = name
+        self.status = status
+        self.description = description
+
+    def to_dict(self) -> dict:
+        return {"name": self.name, "status": self.status, "description": self.description}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Quest":
+        return cls(data["name"], data["status"], data["description"])
+
+
+def default_state() -> dict:
+    return {
+        "character": {
+            "name": "mikasa",
+            "class": "Adventurer",
+            "hp": 20,
+            "max_hp": 20,
+            "inventory": ["Old Map", "Rusty Dagger", "Water Skin"],
+            "status": "Healthy"
+        },
+        "location": {
+            "name": "The Crossroads",
+            "description": "You stand at a dusty crossroads. To the north lies the Dark Forest, to the east the Village of Oakhaven.",
+            "known_paths": ["North", "East", "South"]
+        },
+        "events": [],
+        "quests": [
+            {"name": "Find the Lost Relic", "status": "Active", "description": "Rumors say a powerful relic is hidden in the Dark Forest."}
+        ]
+    }
+
+
+class WorldState:
+    """Game master world state with journaled saves.
+
+    The first save writes a full snapshot; after that every mutation is
+    journaled and save_game only appends what changed since the last save.
+    Only the most recent events stay in memory; older ones are spilled to
+    the save's event archive. See WorldJournal for the on-disk layout.
+
+    The `state` property gives existing callers the classic nested dict.
+    for_player() keeps each player's save slots apart; pass prepare_save to
+    an Autosaver to save in the background.
+    """
+
+    __slots__ = ("character", "location", "events", "event_count", "quests", "save_path", "compact_every", "journal", "_unsaved_spill")
+
+    def __init__(self, save_path: str = SAVE_FILE, compact_every: int = COMPACT_EVERY, recent_events: int = RECENT_EVENTS):
+        self.events = deque(maxlen=recent_events)
+        self.save_path = save_path
+        self.compact_every = compact_every
+        # Bound by the first save_game/load_game; until then nothing touches disk.
+        self.journal: Optional[WorldJournal] = None
+        # Events pushed out of the ring before the first save
+        self._unsaved_spill = []
+        self._load_dict(default_state())
+
+    @classmethod
+    def for_player(cls, player: Optional[str], slot: int = 1, saves_dir: str = SAVES_DIR, **kwargs) -> "WorldState":
+        """World state saved to the given slot of the player's save directory."""
+        return cls(SaveSlots(player, saves_dir, extension=".snap").path(slot), **kwargs)
+
+    # --------------------------
+    #       STATE MODEL
+    # --------------------------
+
+    def _load_dict(self, data: dict):
+        self.character = Character.from_dict(data["character"])
+        self.location = Location.from_dict(data["location"])
+        self.quests = [Quest.from_dict(q) for q in data["quests"]]
+        self.events.clear()
+        events = data["events"]
+        self.event_count = data.get("event_count", len(events))
+        overflow = len(events) - self.events.maxlen
+        if overflow > 0:
+            # Older saves kept every event inline; archive all but the most recent
+            for event in events[:overflow]:
+                self._spill(event)
+        self.events.extend(events[max(overflow, 0):])
+
+    def to_dict(self) -> dict:
+        return {
+            "character": self.character.to_dict(),
+            "location": self.location.to_dict(),
+            "events": list(self.events),
+            "event_count": self.event_count,
+            "quests": [q.to_dict() for q in self.quests]
+        }
+
+    @property
+    def state(self) -> dict:
+        """Read-only dict copy of the state in the original nested layout."""
+        return self.to_dict()
+
+    def _spill(self, event: str):
+        if self.journal is not None:
+            self.journal.spill(event)
+        else:
+            self._unsaved_spill.append(event)
+
+    def _apply(self, op: str, args: dict):
+        """Applies one mutation. Used live and during journal replay."""
+        if op == "update_location":
+            self.location = Location(args["name"], args["description"], args["paths"])
+        elif op == "update_character_status":
+            if args.get("hp") is not None:
+                self.character.hp = args["hp"]
+            if args.get("status") is not None:
+                self.character.status = args["status"]
+        elif op == "add_inventory_item":
+            self.character.inventory[args["item"]] = None
+        elif op == "remove_inventory_item":
+            self.character.inventory.pop(args["item"], None)
+        elif op == "log_event":
+            self.events.append(args["event"])
+            self.event_count += 1
+        else:
+            raise ValueError(f"Unknown world state mutation: {op}")
+
+    def _mutate(self, op: str, **args):
+        if op == "log_event" and len(self.events) == self.events.maxlen:
+            self._spill(self.events[0])
+        self._apply(op, args)
+        if self.journal is not None:
+            self.journal.append(op, args)
+
+    def _replay(self, op: str, args: dict):
+        # Events evicted during replay were archived when they were first evicted
+        self._apply(op, args)
+
+    # --------------------------
+    #       GAME MASTER API
+    # --------------------------
+
+    def get_state(self) -> dict:
+        """Returns the current world state."""
+        return self.to_dict()
+
+    def update_location(self, name: str, description: str, paths: list[str]):
+        """Updates the current location."""
+        self._mutate("update_location", name=name, description=description, paths=list(paths))
+        logger.info(f"Location updated to: {name}")
+
+    def update_character_status(self, hp: int = None, status: str = None):
+        """Updates character HP and status."""
+        self._mutate("update_character_status", hp=hp, status=status)
+        logger.info(f"Character status updated: HP={self.character.hp}, Status={self.character.status}")
+
+    def add_inventory_item(self, item: str):
+        """Adds an item to the inventory."""
+        if item not in self.character.inventory:
+            self._mutate("add_inventory_item", item=item)
+            logger.info(f"Added item: {item}")
+            return f"Added {item} to inventory."
+        return f"{item} is already in inventory."
+
+    def remove_inventory_item(self, item: str):
+        """Removes an item from the inventory."""
+        if item in self.character.inventory:
+            self._mutate("remove_inventory_item", item=item)
+            logger.info(f"Removed item: {item}")
+            return f"Removed {item} from inventory."
+        return f"{item} not found in inventory."
+
+    def log_event(self, event: str):
+        """Logs a significant event."""
+        self._mutate("log_event", event=event)
+        logger.info(f"Event logged: {event}")
+
+    def recent_events(self, limit: Optional[int] = None) -> List[str]:
+        """Most recent events, oldest first."""
+        events = list(self.events)
+        return events[-limit:] if limit else events
+
+    def roll_dice(self, sides: int = 20) -> int:
+        """Rolls a die with the specified number of sides."""
+        result = random.randint(1, sides)
+        logger.info(f"Rolled d{sides}: {result}")
+        return result
+
+    def get_inventory_description(self) -> str:
+        """Returns a formatted string of the inventory."""
+        items = ", ".join(self.character.inventory)
+        return f"Inventory: {items}"
+
+    def get_character_sheet(self) -> str:
+        """Returns a formatted character sheet."""
+        char = self.character
+        return (f"Name: {char.name} ({char.char_class})\n"
+                f"HP: {char.hp}/{char.max_hp} ({char.status})\n"
+                f"Inventory: {', '.join(char.inventory)}")
+
+    # --------------------------
+    #       SAVE & LOAD
+    # --------------------------
+
+    def _journal_for(self, filename: str) -> WorldJournal:
+        return WorldJournal(os.path.splitext(filename)[0], self.compact_every)
+
+    def prepare_save(self) -> Optional[Callable[[], None]]:
+        """Captures the changes since the last save.
+
+        Returns a function that writes them, which is safe to run in a worker
+        thread, or None when there is nothing to save. If that function fails,
+        the changes stay queued and the next save writes them.
+        """
+        if self.journal is None:
+            os.makedirs(os.path.dirname(self.save_path) or ".", exist_ok=True)
+            self.journal = self._journal_for(self.save_path)
+            for event in self._unsaved_spill:
+                self.journal.spill(event)
+            self._unsaved_spill = []
+            snapshot = self.to_dict()
+        elif self.journal.needs_compaction():
+            snapshot = self.to_dict()
+        elif self.journal.has_pending_writes():
+            snapshot = None
+        else:
+            return None
+        journal = self.journal
+        batch = journal.take()
+        return lambda: journal.write(*batch, snapshot=snapshot)
+
+    def save_game(self, filename: Optional[str] = None) -> str:
+        """Saves the world state. Only changes since the last save are written."""
+        try:
+            if filename and filename != self.save_path:
+                # Saving under a new name starts a new journal there
+                self.save_path = filename
+                self.journal = None
+            writer = self.prepare_save()
+            if writer is not None:
+                writer()
+            logger.info(f"Game saved to {self.save_path}")
+            return f"Game successfully saved to {self.save_path}."
+        except Exception as e:
+            logger.error(f"Error saving game: {e}")
+            return "Failed to save game."
+
+    def load_game(self, filename: Optional[str] = None) -> str:
+        """Loads the world state from its snapshot and journal."""
+        try:
+            filename = filename or self.save_path
+            journal = self._journal_for(filename)
+            if self.journal is not None:
+                self.journal.close()
+            self.journal = journal
+            self._unsaved_spill = []
+            if journal.exists():
+                journal.replay(lambda snapshot: self._load_dict(snapshot or default_state()), lambda _, op, args: self._replay(op, args))
+            elif os.path.exists(filename):
+                # Saves from before journaling were a single JSON file; convert on first load
+                with open(filename, 'r') as f:
+                    self._load_dict(json.load(f))
+                journal.write_snapshot(self.to_dict())
+            else:
+                self.journal = None
+                return "No saved game found."
+
+            if journal.has_pending_writes():
+                # The save held more events than the ring; snapshot now so the overflow is archived only once
+                journal.write_snapshot(self.to_dict())
+            self.save_path = filename
+            logger.info(f"Game loaded from {filename}")
+            return "Game loaded successfully. Welcome back, traveler."
+        except Exception as e:
+            logger.error(f"Error loading game: {e}")
+            return "Failed to load game."
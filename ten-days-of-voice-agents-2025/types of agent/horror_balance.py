@@ -0,0 +1,132 @@
+"""Offline Monte Carlo balancer for the horror WorldState fear/HP rules.
+
+Simulates many playthroughs at once with NumPy. Each turn is one d20
+roll_dice() followed by one random_horror_event() check, exactly as the
+scalar rules in agent.py apply them; a player is out once HP reaches 0.
+Reports the survival curve and the fear distribution at a few checkpoints.
+
+Rules can be overridden to try a balance change, e.g.
+
+    python horror_balance.py --players 500000 --turns 200 --set panic_fear=60 --set panic_damage=1,3
+
+--check also runs a few thousand scalar WorldState playthroughs with the
+same rules and compares their survival with the vectorized estimate.
+"""
+import argparse
+import dataclasses
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from agent import DEFAULT_RULES, HorrorRules, WorldState
+
+START_HP = 100
+FEAR_BUCKETS = [0, 10, 20, 30, 40, 50, 60, 70, 80, 90, 100]
+
+
+def simulate(players: int, turns: int, rules: HorrorRules = DEFAULT_RULES, sides: int = 20, seed: int = 0) -> Dict[str, np.ndarray]:
+    """Runs every playthrough in lockstep.
+
+    Returns alive (fraction of players still alive after each turn) and
+    fear (players x turns, fear after each turn; frozen once a player dies).
+    """
+    rng = np.random.default_rng(seed)
+    hp = np.full(players, START_HP, dtype=np.int32)
+    fear = np.zeros(players, dtype=np.int32)
+    fear_history = np.empty((turns, players), dtype=np.int16)
+    alive_curve = np.empty(turns)
+
+    def draw(bounds):
+        low, high = bounds
+        return rng.integers(low, high + 1, players, dtype=np.int32)
+
+    for turn in range(turns):
+        alive = hp > 0
+
+        # roll_dice
+        roll = rng.integers(1, sides + 1, players, dtype=np.int32)
+        low = alive & (roll <= rules.low_roll)
+        high = alive & (roll >= rules.high_roll) & ~low
+        fear += low * draw(rules.low_roll_fear)
+        fear = np.where(high, np.maximum(0, fear - draw(rules.high_roll_calm)), fear)
+        hp -= (alive & (fear >= rules.panic_fear)) * draw(rules.panic_damage)
+
+        # random_horror_event
+        chance = rules.event_base_chance + fear // 10
+        event = alive & (rng.integers(1, 101, players, dtype=np.int32) <= chance)
+        fear += event * draw(rules.event_fear)
+
+        fear_history[turn] = np.minimum(fear, np.iinfo(np.int16).max)
+        alive_curve[turn] = np.count_nonzero(hp > 0) / players
+    return {"alive": alive_curve, "fear": fear_history}
+
+
+def simulate_scalar(players: int, turns: int, rules: HorrorRules = DEFAULT_RULES, sides: int = 20, seed: int = 0) -> np.ndarray:
+    """Same playthroughs through WorldState itself. Slow; used to cross-check simulate()."""
+    alive = np.zeros(turns)
+    for i in range(players):
+        world = WorldState(seed=seed + i, rules=rules)
+        for turn in range(turns):
+            world.roll_dice(sides)
+            world.random_horror_event()
+            if world.state["player"]["hp"] <= 0:
+                break
+            alive[turn] += 1
+    return alive / players
+
+
+def parse_overrides(pairs: List[str]) -> HorrorRules:
+    fields = {f.name: f for f in dataclasses.fields(HorrorRules)}
+    changes = {}
+    for pair in pairs:
+        name, _, value = pair.partition("=")
+        if name not in fields:
+            raise SystemExit(f"Unknown rule {name!r}; choose from {', '.join(fields)}")
+        parts = tuple(int(v) for v in value.split(","))
+        changes[name] = parts if isinstance(getattr(DEFAULT_RULES, name), tuple) else parts[0]
+    return dataclasses.replace(DEFAULT_RULES, **changes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--players", type=int, default=200_000)
+    parser.add_argument("--turns", type=int, default=150)
+    parser.add_argument("--sides", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--set", action="append", default=[], metavar="RULE=VALUE", help="override a HorrorRules field")
+    parser.add_argument("--check", type=int, default=0, metavar="N", help="cross-check against N scalar playthroughs")
+    args = parser.parse_args()
+
+    rules = parse_overrides(args.set)
+    start = time.perf_counter()
+    result = simulate(args.players, args.turns, rules, args.sides, args.seed)
+    elapsed = time.perf_counter() - start
+    alive, fear = result["alive"], result["fear"]
+    print(f"{args.players:,} playthroughs x {args.turns} turns in {elapsed:.2f}s  rules: {rules}")
+
+    checkpoints = sorted({t for t in (10, 25, 50, 75, 100, 150, 200, 300, args.turns) if t <= args.turns})
+    print("\nSurvival curve")
+    for t in checkpoints:
+        print(f"  turn {t:>4}: {alive[t - 1]:6.1%} alive")
+    dead = alive < 0.5
+    print(f"  median survival: {'>' + str(args.turns) if not dead.any() else int(np.argmax(dead)) + 1} turns")
+
+    print("\nFear after turn (p10 / p50 / p90, then share of players per bucket of 10)")
+    print("        " + " ".join(f"{b:>5}" for b in FEAR_BUCKETS[:-1]) + "   100+")
+    for t in checkpoints:
+        row = fear[t - 1]
+        p10, p50, p90 = np.percentile(row, [10, 50, 90])
+        shares = np.histogram(np.minimum(row, 100), bins=FEAR_BUCKETS + [np.inf])[0] / len(row)
+        print(f"  {t:>4}: " + " ".join(f"{s:5.1%}" for s in shares) + f"   p10={p10:.0f} p50={p50:.0f} p90={p90:.0f}")
+
+    if args.check:
+        start = time.perf_counter()
+        scalar = simulate_scalar(args.check, args.turns, rules, args.sides, args.seed)
+        elapsed = time.perf_counter() - start
+        gap = np.abs(scalar - alive).max()
+        print(f"\nScalar check: {args.check:,} WorldState playthroughs in {elapsed:.2f}s, max survival gap {gap:.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+import asyncio
+import gzip
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional
+
+logger = logging.getLogger("jsonl-sink")
+
+
+class _LoopState:
+    """Flush task and asyncio primitives of one event loop; they are bound to the loop that made them."""
+
+    def __init__(self):
+        self.wakeup = asyncio.Event()
+        self.flush_lock = asyncio.Lock()
+        self.task: Optional[asyncio.Task] = None
+
+
+class JsonlSink:
+    """Buffered, rotating JSON Lines writer that keeps file I/O off the event loop.
+
+    write() only appends to an in-memory batch. A background task flushes the
+    batch in a worker thread once it holds max_batch records or flush_interval
+    seconds have passed. When the file grows past max_bytes it is renamed to a
+    timestamped segment and gzip-compressed.
+
+    A sink made in prewarm is used by every job of the process, possibly on
+    different event loops, so the flush task and asyncio primitives are kept
+    per loop.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_batch: int = 256,
+        flush_interval: float = 1.0,
+        fsync: bool = False,
+        max_bytes: int = 64 * 1024 * 1024,
+        compress_rotated: bool = True,
+    ):
+        self.path = path
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.max_bytes = max_bytes
+        self.compress_rotated = compress_rotated
+
+        self._pending = []
+        self._loops: Dict[asyncio.AbstractEventLoop, _LoopState] = {}
+        self._io_lock = threading.Lock()
+        self._closed = False
+
+        self.records_written = 0
+        self.batches_written = 0
+        self.rotations = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self._total_flush_ms = 0.0
+
+    # --------------------------
+    #       PUBLIC API
+    # --------------------------
+
+    def write(self, record: dict):
+        """Queues one record. Must be called from the event loop thread."""
+        if self._closed:
+            raise RuntimeError(f"JsonlSink for {self.path} is closed")
+        self._pending.append(json.dumps(record))
+        state = self._ensure_task()
+        if len(self._pending) >= self.max_batch:
+            state.wakeup.set()
+
+    async def flush(self):
+        """Writes everything queued so far."""
+        # Serialized so batches land in the file in the order they were queued.
+        async with self._state().flush_lock:
+            batch, self._pending = self._pending, []
+            if batch:
+                try:
+                    await asyncio.to_thread(self._write_batch, batch)
+                except Exception:
+                    # Put the batch back so a later flush retries it.
+                    self._pending[:0] = batch
+                    raise
+
+    async def close(self):
+        """Flushes remaining records and stops the background task."""
+        self._closed = True
+        state = self._state()
+        if state.task:
+            state.task.cancel()
+            try:
+                await state.task
+            except asyncio.CancelledError:
+                pass
+            state.task = None
+        await self.flush()
+
+    def metrics(self) -> dict:
+        return {
+            "queue_depth": len(self._pending),
+            "records_written": self.records_written,
+            "batches_written": self.batches_written,
+            "rotations": self.rotations,
+            "last_flush_ms": round(self.last_flush_ms, 3),
+            "max_flush_ms": round(self.max_flush_ms, 3),
+            "avg_flush_ms": round(self._total_flush_ms / self.batches_written, 3) if self.batches_written else 0.0,
+        }
+
+    # --------------------------
+    #       INTERNALS
+    # --------------------------
+
+    def _state(self) -> _LoopState:
+        loop = asyncio.get_running_loop()
+        state = self._loops.get(loop)
+        if state is None:
+            # Forget loops that have been closed since, e.g. by an earlier job
+            for old in [old for old in self._loops if old.is_closed()]:
+                del self._loops[old]
+            state = self._loops[loop] = _LoopState()
+        return state
+
+    def _ensure_task(self) -> _LoopState:
+        state = self._state()
+        if state.task is None or state.task.done():
+            state.task = asyncio.get_running_loop().create_task(self._run(state))
+        return state
+
+    async def _run(self, state: _LoopState):
+        while True:
+            try:
+                await asyncio.wait_for(state.wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            state.wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Error flushing {self.path}: {e}")
+
+    def _write_batch(self, batch):
+        start = time.perf_counter()
+        data = ("\n".join(batch) + "\n").encode("utf-8")
+        with self._io_lock:
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                offset = os.lseek(fd, 0, os.SEEK_END)
+                try:
+                    view = memoryview(data)
+                    while view:
+                        view = view[os.write(fd, view):]
+                    if self.fsync:
+                        os.fsync(fd)
+                except BaseException:
+                    # Cut off a partly written batch, so the retry does not duplicate its first lines
+                    os.ftruncate(fd, offset)
+                    raise
+            finally:
+                os.close(fd)
+            size = offset + len(data)
+            if size >= self.max_bytes:
+                # The batch is on disk whatever happens here; a failed rotation is retried by the next batch
+                try:
+                    self._rotate()
+                except OSError as e:
+                    logger.error(f"Error rotating {self.path}: {e}")
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.records_written += len(batch)
+        self.batches_written += 1
+        self.last_flush_ms = elapsed_ms
+        self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+        self._total_flush_ms += elapsed_ms
+
+    def _rotate(self):
+        stem, ext = os.path.splitext(self.path)
+        segment = f"{stem}.{datetime.now().strftime('%Y%m%dT%H%M%S%f')}{ext}"
+        os.replace(self.path, segment)
+        if self.compress_rotated:
+            with open(segment, "rb") as src, gzip.open(segment + ".gz", "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            os.remove(segment)
+        self.rotations += 1
+        logger.info(f"Rotated {self.path} to {segment}")
@@ -0,0 +1,254 @@
+"""Per-learner concept mastery that outlives a session.
+
+MasteryStore keeps every learner's mastery in SQLite, spread over
+MASTERY_STORE_SHARDS database files by a hash of the learner's
+participant identity, so workers serving different learners rarely wait
+on the same write lock. The files are in WAL mode and shared by every
+worker on the host.
+
+LearnerMastery is one session's read-through cache of one learner. It is
+read once when the learner joins, updated in memory by tools, and written
+back by flush(), which agents call at turn boundaries: everything changed
+during the turn goes out in one transaction, in a worker thread. Concepts
+are also kept in score buckets, so weakest() does not get slower as a
+learner practices more concepts.
+
+A concept row holds a score between 0 and 1 plus free-form JSON data.
+The tutor and the active recall coach share rows: each keeps its own keys
+in data, and whichever graded the learner last sets the score.
+"""
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger("mastery-store")
+
+MASTERY_DIR = os.getenv("MASTERY_STORE_DIR", "mastery")
+SHARD_COUNT = int(os.getenv("MASTERY_STORE_SHARDS", "16"))
+# weakest() ranks by bucket; scores within 1 / SCORE_BUCKETS of each other count as tied
+SCORE_BUCKETS = 20
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS mastery (
+    learner TEXT NOT NULL,
+    concept_id TEXT NOT NULL,
+    score REAL,
+    data TEXT NOT NULL DEFAULT '{}',
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (learner, concept_id)
+) WITHOUT ROWID;
+"""
+
+
+class MasteryStore:
+    """Mastery rows of every learner, sharded over SQLite files by learner identity.
+
+    Learners are keyed by their exact identity; the hash only picks the
+    shard. Methods block on SQLite; LearnerMastery calls them from worker
+    threads.
+    """
+
+    def __init__(self, directory: str = MASTERY_DIR, shards: int = SHARD_COUNT):
+        self.directory = directory
+        self.shards = shards
+        self._conns: Dict[int, sqlite3.Connection] = {}
+        # A connection is only ever used by one thread at a time
+        self._locks = [threading.Lock() for _ in range(shards)]
+
+    def shard(self, learner: str) -> int:
+        return zlib.crc32(learner.encode("utf-8")) % self.shards
+
+    def path(self, shard: int) -> str:
+        return os.path.join(self.directory, f"mastery-{shard:02d}.db")
+
+    def _conn(self, shard: int) -> sqlite3.Connection:
+        # Called with the shard's lock held
+        conn = self._conns.get(shard)
+        if conn is None:
+            os.makedirs(self.directory, exist_ok=True)
+            conn = sqlite3.connect(self.path(shard), timeout=10.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._conns[shard] = conn
+        return conn
+
+    def read(self, learner: str) -> Dict[str, Tuple[Optional[float], dict]]:
+        """Every concept row of a learner, as concept id -> (score, data)."""
+        shard = self.shard(learner)
+        with self._locks[shard]:
+            rows = self._conn(shard).execute(
+                "SELECT concept_id, score, data FROM mastery WHERE learner = ?", (learner,)
+            ).fetchall()
+        return {concept_id: (score, json.loads(data)) for concept_id, score, data in rows}
+
+    def write(self, learner: str, rows: Dict[str, Tuple[Optional[float], str]]) -> int:
+        """Upserts concept id -> (score, data JSON) rows of one learner in one transaction."""
+        shard = self.shard(learner)
+        now = time.time()
+        params = [(learner, concept_id, score, data, now) for concept_id, (score, data) in rows.items()]
+        with self._locks[shard]:
+            conn = self._conn(shard)
+            with conn:
+                conn.execute("BEGIN")
+                conn.executemany(
+                    "INSERT INTO mastery (learner, concept_id, score, data, updated_at) VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT (learner, concept_id) DO UPDATE SET "
+                    "score = excluded.score, data = excluded.data, updated_at = excluded.updated_at",
+                    params,
+                )
+        return len(params)
+
+    def close(self):
+        for shard, conn in list(self._conns.items()):
+            with self._locks[shard]:
+                conn.close()
+        self._conns.clear()
+
+
+class LearnerMastery:
+    """One learner's mastery for the length of a session."""
+
+    def __init__(self, store: MasteryStore, learner: str, rows: Optional[Dict[str, Tuple[Optional[float], dict]]] = None):
+        self.store = store
+        self.learner = learner
+        self._scores: Dict[str, Optional[float]] = {}
+        self._data: Dict[str, dict] = {}
+        # Bucket i holds the scored concepts with score in [i / SCORE_BUCKETS, (i + 1) / SCORE_BUCKETS),
+        # least recently updated first; dicts are used as ordered sets
+        self._buckets: List[Dict[str, None]] = [{} for _ in range(SCORE_BUCKETS + 1)]
+        self._dirty: Dict[str, None] = {}
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+
+        self.flushes = 0
+        self.rows_written = 0
+        self.last_flush_ms = 0.0
+        for concept_id, (score, data) in (rows or {}).items():
+            self._data[concept_id] = data
+            self._set_score(concept_id, score)
+
+    @classmethod
+    async def open(cls, store: MasteryStore, learner: str) -> "LearnerMastery":
+        """Reads the learner's rows in a worker thread."""
+        start = time.perf_counter()
+        rows = await asyncio.to_thread(store.read, learner)
+        mastery = cls(store, learner, rows)
+        logger.info(
+            f"Loaded {len(rows)} concept(s) for learner {mastery.learner!r} "
+            f"in {(time.perf_counter() - start) * 1000:.1f} ms"
+        )
+        return mastery
+
+    # --------------------------
+    #       READS
+    # --------------------------
+
+    def __contains__(self, concept_id: str) -> bool:
+        return concept_id in self._data
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def score(self, concept_id: str) -> Optional[float]:
+        return self._scores.get(concept_id)
+
+    def scores(self) -> Dict[str, float]:
+        """Concept id -> score, for concepts that have been graded."""
+        return {c: s for c, s in self._scores.items() if s is not None}
+
+    def data(self, concept_id: str) -> dict:
+        return dict(self._data.get(concept_id, {}))
+
+    def weakest(self, k: int = 3) -> List[Tuple[str, float]]:
+        """Up to k (concept id, score) pairs, lowest score first.
+
+        Walks the score buckets from the bottom, so the cost is bounded by
+        SCORE_BUCKETS + k rather than by the number of concepts.
+        """
+        found = []
+        for bucket in self._buckets:
+            for concept_id in bucket:
+                found.append((concept_id, self._scores[concept_id]))
+                if len(found) >= k:
+                    return found
+        return found
+
+    # --------------------------
+    #       WRITES
+    # --------------------------
+
+    def update(self, concept_id: str, data: Optional[dict] = None, score: Optional[float] = None):
+        """Merges data keys into a concept and sets its score; None keeps the current score.
+
+        Only touches memory; the change is written by the next flush().
+        """
+        self._data.setdefault(concept_id, {}).update(data or {})
+        if score is not None:
+            self._set_score(concept_id, max(0.0, min(1.0, float(score))))
+        elif concept_id not in self._scores:
+            self._scores[concept_id] = None
+        self._dirty[concept_id] = None
+
+    def _set_score(self, concept_id: str, score: Optional[float]):
+        old = self._scores.get(concept_id)
+        if old is not None:
+            del self._buckets[self._bucket(old)][concept_id]
+        self._scores[concept_id] = score
+        if score is not None:
+            self._buckets[self._bucket(score)][concept_id] = None
+
+    @staticmethod
+    def _bucket(score: float) -> int:
+        return min(SCORE_BUCKETS, max(0, int(score * SCORE_BUCKETS)))
+
+    def flush_soon(self):
+        """Starts a background flush if anything changed. Must be called from the event loop thread."""
+        if self._dirty and (self._task is None or self._task.done()):
+            self._task = asyncio.get_running_loop().create_task(self.flush())
+
+    async def flush(self):
+        """Writes every concept changed since the last flush in one transaction."""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        async with self._flush_lock:
+            if not self._dirty:
+                return
+            changed, self._dirty = self._dirty, {}
+            rows = {c: (self._scores.get(c), json.dumps(self._data[c], separators=(",", ":"))) for c in changed}
+            start = time.perf_counter()
+            try:
+                await asyncio.to_thread(self.store.write, self.learner, rows)
+            except Exception as e:
+                logger.error(f"Error saving mastery for learner {self.learner!r}: {e}")
+                # Retry with the next flush, keeping anything changed in the meantime
+                changed.update(self._dirty)
+                self._dirty = changed
+                return
+            self.last_flush_ms = (time.perf_counter() - start) * 1000
+            self.flushes += 1
+            self.rows_written += len(rows)
+
+    async def close(self):
+        if self._task is not None:
+            await asyncio.gather(self._task, return_exceptions=True)
+        await self.flush()
+
+    def metrics(self) -> dict:
+        return {
+            "learner": self.learner,
+            "concepts": len(self._data),
+            "flushes": self.flushes,
+            "rows_written": self.rows_written,
+            "pending": len(self._dirty),
+            "last_flush_ms": round(self.last_flush_ms, 3),
+        }
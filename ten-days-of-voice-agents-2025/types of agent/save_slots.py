@@ -0,0 +1,148 @@
+"""Per-player, per-slot save files and background autosave.
+
+Saves live under <saves_dir>/<player>/slot<N>.sav as a small binary header
+followed by zlib-compressed compact JSON. Writes go to a temp file that is
+then renamed over the slot, so a crash never leaves a half-written save.
+
+Autosaver runs a save every interval seconds. The state is captured on the
+event loop and the encoding and file I/O run in a worker thread.
+"""
+import asyncio
+import json
+import logging
+import os
+import re
+import struct
+import time
+import zlib
+from typing import Callable, List, Optional
+
+logger = logging.getLogger("save-slots")
+
+SAVES_DIR = "saves"
+AUTOSAVE_INTERVAL = float(os.getenv("AUTOSAVE_INTERVAL_SECONDS", "30"))
+
+SAVE_MAGIC = b"WSAV"
+SAVE_VERSION = 1
+# magic, format version, saved-at unix time, crc32 of the compressed body
+SAVE_HEADER = struct.Struct(">4sBdI")
+
+
+def player_key(name: Optional[str]) -> str:
+    """File-safe key for a player name, e.g. 'Mary Jane!' -> 'mary-jane'."""
+    return re.sub(r"[^a-z0-9]+", "-", (name or "").lower()).strip("-") or "guest"
+
+
+def dump_state(state: dict) -> str:
+    """Compact JSON for a state; cheap enough to take on the event loop as a consistent copy."""
+    return json.dumps(state, separators=(",", ":"))
+
+
+def encode_save(state_json: str) -> bytes:
+    body = zlib.compress(state_json.encode("utf-8"), 6)
+    return SAVE_HEADER.pack(SAVE_MAGIC, SAVE_VERSION, time.time(), zlib.crc32(body)) + body
+
+
+def decode_save(data: bytes) -> dict:
+    magic, version, _, crc = SAVE_HEADER.unpack_from(data)
+    body = data[SAVE_HEADER.size:]
+    if magic != SAVE_MAGIC or version != SAVE_VERSION:
+        raise ValueError(f"Not a version {SAVE_VERSION} save file")
+    if zlib.crc32(body) != crc:
+        raise ValueError("Save file is corrupt (checksum mismatch)")
+    return json.loads(zlib.decompress(body))
+
+
+class SaveSlots:
+    """The numbered save slots of one player."""
+
+    def __init__(self, player: Optional[str], saves_dir: str = SAVES_DIR, extension: str = ".sav"):
+        self.player = player_key(player)
+        self.directory = os.path.join(saves_dir, self.player)
+        self.extension = extension
+
+    def path(self, slot: int) -> str:
+        return os.path.join(self.directory, f"slot{slot}{self.extension}")
+
+    def exists(self, slot: int) -> bool:
+        return os.path.exists(self.path(slot))
+
+    def write(self, slot: int, state: dict) -> int:
+        """Atomically writes a slot. Returns the file size in bytes."""
+        return self.write_json(slot, dump_state(state))
+
+    def write_json(self, slot: int, state_json: str) -> int:
+        """Like write(), for a state already serialized with dump_state()."""
+        os.makedirs(self.directory, exist_ok=True)
+        data = encode_save(state_json)
+        path = self.path(slot)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        return len(data)
+
+    def read(self, slot: int) -> dict:
+        with open(self.path(slot), "rb") as f:
+            return decode_save(f.read())
+
+    def list(self) -> List[dict]:
+        """Slots that have a save, with their save time and size."""
+        slots = []
+        if not os.path.isdir(self.directory):
+            return slots
+        for name in sorted(os.listdir(self.directory)):
+            match = re.fullmatch(rf"slot(\d+){re.escape(self.extension)}", name)
+            if match:
+                path = os.path.join(self.directory, name)
+                slots.append({"slot": int(match.group(1)), "saved_at": os.path.getmtime(path), "bytes": os.path.getsize(path)})
+        return slots
+
+
+class Autosaver:
+    """Saves a world state in the background every interval seconds.
+
+    prepare() runs on the event loop and captures what needs saving. It
+    returns a blocking function that does the writing, or None when there is
+    nothing new to save. That function runs in a worker thread.
+    """
+
+    def __init__(self, prepare: Callable[[], Optional[Callable[[], object]]], interval: float = AUTOSAVE_INTERVAL):
+        self.prepare = prepare
+        self.interval = interval
+        self.saves = 0
+        self._task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Cancels the timer and makes one last save."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.save_now()
+
+    async def save_now(self) -> bool:
+        async with self._lock:
+            writer = self.prepare()
+            if writer is None:
+                return False
+            await asyncio.to_thread(writer)
+            self.saves += 1
+            return True
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.save_now()
+            except Exception as e:
+                # Keep autosaving; the next interval may succeed
+                logger.error(f"Autosave failed: {e}")
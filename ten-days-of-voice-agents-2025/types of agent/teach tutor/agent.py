@@ -2,9 +2,10 @@
 import json
 import logging
 import os
-from dataclasses import dataclass, field
+import sys
+from dataclasses import asdict, dataclass, field
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, Optional, Set, Tuple
 
 from dotenv import load_dotenv
 from livekit.agents import (
@@ -22,9 +23,18 @@ from livekit.agents import (
     metrics,
     tokenize,
 )
+from livekit.agents.llm import StopResponse
 from livekit.plugins import murf, silero, google, deepgram, noise_cancellation
 from livekit.plugins.turn_detector.multilingual import MultilingualModel
 
+from scheduler import DAY, ReviewScheduler
+from tts_personas import PersonaTTS
+from tutor_content import TutorConcept, TutorContentLibrary
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from answer_grader import AnswerGrader, FastPathStats
+from mastery_store import LearnerMastery, MasteryStore
+
 logger = logging.getLogger("agent")
 
 load_dotenv(".env.local")
@@ -52,69 +62,22 @@ VOICE_PERSONAS = {
     },
 }
 
+# "0" falls back to one TTS engine whose voice is switched with update_options
+TTS_PERSONA_POOL = os.getenv("TUTOR_TTS_PERSONA_POOL", "1") != "0"
 
-TUTOR_CONCEPTS_DATA = [
-    {
-        "id": "variables",
-        "title": "Variables",
-        "summary": "Variables store values so you can reuse them later, much like a labeled box you put information into. For example, if you store the number 10 in a variable named 'age', you can refer to that value simply by saying 'age'. This is essential for writing code that can adapt and remember information.",
-        "sample_question": "What is a variable and why is it useful? Focus on the reusability aspect.",
-        "teach_back_prompt": "Explain what a variable is and why it's useful in your own words."
-    },
-    {
-        "id": "loops",
-        "title": "Loops",
-        "summary": "Loops let you repeat an action multiple times without having to write the same code over and over. Think of it like setting an alarm to go off every morning at 7 a.m.—the loop keeps repeating the action. The two main types are 'for' loops, which run a set number of times, and 'while' loops, which run as long as a certain condition is true.",
-        "sample_question": "What is the difference between a for loop and a while loop?",
-        "teach_back_prompt": "Explain the difference between a for loop and a while loop in detail."
-    },
-    {
-        "id": "function",
-        "title": "Functions",
-        "summary": "Functions are blocks of organized, reusable code that perform a single, related action. They allow you to modularize your code, making it easier to read, test, and debug. When you need to perform an action multiple times, you simply call the function instead of writing the code repeatedly.",
-        "sample_question": "Explain how functions help with code organization and reusability.",
-        "teach_back_prompt": "Teach me back the concept of a function and its main benefits."
-    },
-    {
-        "id": "if_else",
-        "title": "If-Else Statements",
-        "summary": "If-Else statements are the fundamental way to control the flow of a program. They allow your code to make decisions based on whether a condition is true or false. If the condition is true, the code in the 'if' block runs; otherwise, the code in the 'else' block runs.",
-        "sample_question": "Describe a real-world scenario where an If-Else statement would be necessary in a program.",
-        "teach_back_prompt": "Explain how if-else statements control program flow and give an example."
-    },
-    {
-        "id": "data_types",
-        "title": "Data Types",
-        "summary": "Data types define the kind of value a variable can hold, such as numbers, text, or boolean (true/false) values. Common types include integers, floats, strings, and booleans. Using the correct data type is crucial for performing accurate operations and managing memory efficiently.",
-        "sample_question": "What is a Data Type and what's the difference between an integer and a string?",
-        "teach_back_prompt": "Teach me the difference between an integer, a string, and a boolean."
-    },
-    {
-        "id": "operators",
-        "title": "Operators",
-        "summary": "Operators are special symbols that perform operations on variables and values. They are categorized into arithmetic (like +, -), comparison (like ==, >), and logical (like AND, OR) operators. They are the tools you use to manipulate data and create conditions in your code.",
-        "sample_question": "Explain the difference between the assignment operator (=) and the comparison operator (==).",
-        "teach_back_prompt": "Explain the three main categories of operators and give an example of one."
-    },
-    {
-        "id": "oop",
-        "title": "OOP (Object-Oriented Programming)",
-        "summary": "Object-Oriented Programming is a paradigm based on the concept of 'objects,' which can contain data and code. The main principles are encapsulation, inheritance, and polymorphism. It helps manage complexity by modeling real-world entities and their interactions in code.",
-        "sample_question": "Summarize the core principles of Object-Oriented Programming (OOP).",
-        "teach_back_prompt": "Explain the core idea behind Object-Oriented Programming."
-    }
-]
 
+def build_persona_tts(pooled: bool = TTS_PERSONA_POOL) -> PersonaTTS:
+    """Murf TTS for every persona in VOICE_PERSONAS, starting with learn mode's voice."""
 
-@dataclass
-class TutorConcept:
-    """Structured representation of one concept."""
+    def murf_tts(persona: dict) -> murf.TTS:
+        return murf.TTS(
+            voice=persona["voice"],
+            style=persona["style"],
+            tokenizer=tokenize.basic.SentenceTokenizer(min_sentence_len=2),
+            text_pacing=True,
+        )
 
-    id: str
-    title: str
-    summary: str
-    sample_question: str
-    teach_back_prompt: str
+    return PersonaTTS(VOICE_PERSONAS, murf_tts, initial="learn", pooled=pooled)
 
 
 @dataclass
@@ -135,56 +98,55 @@ class TutorSessionState:
     current_mode: Optional[str] = None
     current_concept_id: Optional[str] = None
     mastery: Dict[str, ConceptMastery] = field(default_factory=dict)
+    # Spaced-repetition queue that picks the next concept to practice
+    reviews: Optional[ReviewScheduler] = None
+    # The learner's stored mastery from earlier sessions, kept up to date turn by turn
+    learner: Optional[LearnerMastery] = None
+    # Concepts used since the last save_turn()
+    touched: Set[str] = field(default_factory=set)
+    # (concept id, mode) of the quiz or teach-back prompt the learner's next reply answers
+    pending_answer: Optional[Tuple[str, str]] = None
+
+    @classmethod
+    def restore(cls, content: TutorContentLibrary, learner: Optional[LearnerMastery] = None) -> "TutorSessionState":
+        """Session state for a learner, picking up their counters and review cards from earlier sessions."""
+        mastery, cards = {}, []
+        known = set(content.ids())
+        for concept_id in learner or ():
+            if concept_id not in known:
+                continue
+            data = learner.data(concept_id)
+            if "tutor" in data:
+                mastery[concept_id] = ConceptMastery(**data["tutor"])
+            if "card" in data:
+                cards.append(data["card"])
+        return cls(
+            current_concept_id=content.list_concepts()[0].id,
+            mastery=mastery,
+            reviews=ReviewScheduler(content.ids(), cards=cards),
+            learner=learner,
+        )
 
     def ensure_mastery(self, concept_id: str) -> ConceptMastery:
+        self.touched.add(concept_id)
         if concept_id not in self.mastery:
             self.mastery[concept_id] = ConceptMastery()
         return self.mastery[concept_id]
 
-
-class TutorContentLibrary:
-    """Loads and serves concept content from in-memory data."""
-
-    def __init__(self, concepts: List[TutorConcept]):
-        if not concepts:
-            raise ValueError("TutorContentLibrary requires at least one concept.")
-        self._concepts: Dict[str, TutorConcept] = {c.id: c for c in concepts}
-        self._order: List[str] = [c.id for c in concepts]
-
-    @classmethod
-    def from_data(cls, data: List[Dict]) -> "TutorContentLibrary":
-        """Loads content from the hardcoded list of dictionaries."""
-        concepts = [TutorConcept(**item) for item in data]
-        return cls(concepts)
-
-    @classmethod
-    def from_env(cls) -> "TutorContentLibrary":
-        """Loads content from the global TUTOR_CONCEPTS_DATA."""
-        global TUTOR_CONCEPTS_DATA
-        return cls.from_data(TUTOR_CONCEPTS_DATA)
-    
-    def list_concepts(self) -> List[TutorConcept]:
-        return [self._concepts[cid] for cid in self._order]
-
-    def get(self, concept_id: Optional[str]) -> TutorConcept:
-        target_id = concept_id or self._order[0]
-        if target_id not in self._concepts:
-            normalized_id = target_id.lower().replace(' ', '_').replace('-', '_')
-            if normalized_id.endswith('s'):
-                normalized_id = normalized_id[:-1]
-                if normalized_id in self._concepts:
-                     return self._concepts[normalized_id]
-            raise KeyError(f"Unknown concept id: {target_id}")
-        return self._concepts[target_id]
-
-    def next_concept_id(self, current_id: Optional[str]) -> str:
-        if current_id is None:
-            return self._order[0]
-        try:
-            idx = self._order.index(current_id)
-        except ValueError:
-            return self._order[0]
-        return self._order[(idx + 1) % len(self._order)]
+    def save_turn(self):
+        """Copies the concepts used this turn into the learner's store and flushes them in the background."""
+        if self.learner is None or not self.touched:
+            return
+        for concept_id in self.touched:
+            mastery = self.mastery[concept_id]
+            data = {"tutor": asdict(mastery)}
+            card = self.reviews.cards.get(concept_id) if self.reviews else None
+            if card is not None:
+                data["card"] = card.to_dict()
+            score = None if mastery.last_score is None else mastery.last_score / 5
+            self.learner.update(concept_id, data, score=score)
+        self.touched.clear()
+        self.learner.flush_soon()
 
 
 @dataclass
@@ -193,6 +155,8 @@ class Userdata:
 
     state: TutorSessionState
     content: TutorContentLibrary
+    grader: Optional[AnswerGrader] = None
+    grading_stats: FastPathStats = field(default_factory=FastPathStats)
 
 
 class TeachTheTutorAgent(Agent):
@@ -207,14 +171,36 @@ Key behaviors:
 - The default current concept is **variables**.
 - Whenever the learner asks to switch mode OR concept, **IMMEDIATELY** call the `set_learning_mode` tool or `set_focus_concept` tool.
 - When the mode changes, use the output of `set_learning_mode` to introduce the new voice (Matthew for learn, Alicia for quiz, Ken for teach_back) and then call the corresponding content tool (`describe_current_concept`, `get_quiz_prompt`, or `get_teach_back_prompt`).
-- When the user answers a quiz or teach-back prompt, give brief, positive, qualitative feedback.
+- When the user answers a quiz or teach-back prompt, give brief, positive, qualitative feedback and call `record_answer_grade` with how well they did. A plain "I don't know", and an answer that clearly makes every key point about the right thing, are graded before they reach you; every other answer comes with a "Local grader" note listing the key points it touches and misses. Judge it yourself: the note only shows keywords, not whether each point is said about the right thing.
+- When the learner is ready to move on without naming a concept, call `choose_next_concept` to pick the one most due for review.
+- At the start of the conversation, call `get_learner_progress`. For a returning learner, skip what they already know and offer to work on their weakest concepts instead of starting from scratch.
 - Keep responses concise, use plain conversational language, and explain any jargon.
 - Always mention that Murf Falcon provides the fast voices powering the experience at least once per conversation.
 
-Concepts available for the `set_focus_concept` tool: {', '.join(userdata.content._order)}
+Concepts available for the `set_focus_concept` tool: {', '.join(userdata.content.ids())}
 """
         super().__init__(instructions=instructions)
 
+    async def on_user_turn_completed(self, turn_ctx, new_message):
+        """Grades clear passes and plain "I don't know"s locally; every other answer is left for the LLM to judge, with the grader's note."""
+        userdata: Userdata = self.session.userdata
+        state = userdata.state
+        pending, state.pending_answer = state.pending_answer, None
+        if pending is None or userdata.grader is None or pending[0] != state.current_concept_id:
+            return
+        concept_id, mode = pending
+        result = userdata.grader.grade(concept_id, mode, new_message.text_content)
+        userdata.grading_stats.record(result)
+        if not result.is_clear:
+            turn_ctx.add_message(role="system", content=result.summary())
+            return
+        concept = userdata.content.get(concept_id)
+        feedback = result.feedback(concept.title)
+        _, next_title = self._record_grade(userdata, concept, result.grade, feedback)
+        logger.info(f"Graded {mode} answer for {concept_id} locally: {result.verdict} in {result.elapsed_ms:.2f} ms")
+        self.session.say(f"{feedback} Whenever you're ready, we can move on to {next_title}.")
+        raise StopResponse()
+
     def _apply_voice_persona(self, ctx: RunContext[Userdata], mode: str) -> None:
         persona = VOICE_PERSONAS[mode]
         tts_engine = ctx.session.tts
@@ -222,6 +208,12 @@ Concepts available for the `set_focus_concept` tool: {', '.join(userdata.content
             logger.warning("Cannot switch voices: session has no TTS engine configured.")
             return
 
+        if isinstance(tts_engine, PersonaTTS):
+            # Each persona has its own warm engine; the next utterance is just routed to it
+            tts_engine.use(mode)
+            logger.info("Switched Murf voice to %s for %s mode.", persona["display"], mode)
+            return
+
         update_cb = getattr(tts_engine, "update_options", None)
         if not callable(update_cb):
             logger.warning(
@@ -245,8 +237,11 @@ Concepts available for the `set_focus_concept` tool: {', '.join(userdata.content
 
     @function_tool
     async def set_focus_concept(self, ctx: RunContext[Userdata], concept_id: str) -> str:
-        """Set the active concept that the session should focus on."""
-        concept = ctx.userdata.content.get(concept_id) 
+        """Set the active concept that the session should focus on. Loose names like "OOP" or "for loops" are fine."""
+        try:
+            concept = ctx.userdata.content.get(concept_id)
+        except KeyError as exc:
+            raise ToolError(str(exc)) from exc
         ctx.userdata.state.current_concept_id = concept.id
         ctx.userdata.state.ensure_mastery(concept.id)
         return f"Concept locked: {concept.title}. You're clear to continue working on {concept.title}."
@@ -265,6 +260,7 @@ Concepts available for the `set_focus_concept` tool: {', '.join(userdata.content
         concept = self._require_concept(ctx)
         mastery = ctx.userdata.state.ensure_mastery(concept.id)
         mastery.times_quizzed += 1
+        ctx.userdata.state.pending_answer = (concept.id, "quiz")
         return f"Quiz question for {concept.title}: {concept.sample_question}"
 
     @function_tool
@@ -273,8 +269,61 @@ Concepts available for the `set_focus_concept` tool: {', '.join(userdata.content
         concept = self._require_concept(ctx)
         mastery = ctx.userdata.state.ensure_mastery(concept.id)
         mastery.times_taught_back += 1
+        ctx.userdata.state.pending_answer = (concept.id, "teach_back")
         return f"Teach-back prompt for {concept.title}: {concept.teach_back_prompt}"
     
+    @function_tool
+    async def record_answer_grade(self, ctx: RunContext[Userdata], grade: int, feedback: str = "") -> str:
+        """Record how well the learner answered the current quiz or teach-back prompt.
+
+        Args:
+            grade: 0 (no recall) to 5 (complete and confident); 3 or more is a pass
+            feedback: One-line summary of what was right or missing
+        """
+        concept = self._require_concept(ctx)
+        card, next_title = self._record_grade(ctx.userdata, concept, grade, feedback)
+        when = "later in this session" if card.interval < DAY else f"in {card.interval / DAY:.0f} day(s)"
+        return f"Recorded grade {card.last_grade}/5 for {concept.title}; review it again {when}. Suggested next concept: {next_title}."
+
+    def _record_grade(self, userdata: Userdata, concept: TutorConcept, grade: int, feedback: str):
+        """Reschedules the concept after a graded answer. Returns its review card and the suggested next concept's title."""
+        state = userdata.state
+        mastery = state.ensure_mastery(concept.id)
+        card = state.reviews.review(concept.id, grade)
+        mastery.last_score = card.last_grade
+        mastery.last_feedback = feedback or None
+        next_id = state.reviews.next_concept_id(exclude=concept.id)
+        return card, userdata.content.get(next_id).title
+
+    @function_tool
+    async def choose_next_concept(self, ctx: RunContext[Userdata]) -> str:
+        """Move to the concept most due for review and make it the current concept."""
+        state = ctx.userdata.state
+        concept = ctx.userdata.content.get(state.reviews.next_concept_id(exclude=state.current_concept_id))
+        state.current_concept_id = concept.id
+        state.ensure_mastery(concept.id)
+        return f"Next concept: {concept.title}. Continue in the current mode with the matching content tool."
+
+    @function_tool
+    async def get_learner_progress(self, ctx: RunContext[Userdata]) -> str:
+        """Summarize what this learner practiced in earlier sessions and which concepts are weakest."""
+        state = ctx.userdata.state
+        learner = state.learner
+        if learner is None or not len(learner):
+            return "This is a new learner with no earlier sessions."
+        content = ctx.userdata.content
+        known = set(content.ids())
+        weakest = [
+            f"{content.get(concept_id).title} ({score * 5:.0f}/5)"
+            for concept_id, score in learner.weakest(3)
+            if concept_id in known
+        ]
+        practiced = sum(1 for concept_id in learner if concept_id in known)
+        summary = f"Returning learner: practiced {practiced} of {len(content.ids())} concepts before."
+        if weakest:
+            summary += f" Weakest so far: {', '.join(weakest)}."
+        return summary
+
     @function_tool
     async def set_learning_mode(self, ctx: RunContext[Userdata], mode: str) -> str:
         """Switch to one of the supported modes: learn, quiz, teach_back."""
@@ -305,6 +354,10 @@ def prewarm(proc: JobProcess):
     """Prewarm models and load tutor content."""
     proc.userdata["vad"] = silero.VAD.load()
     proc.userdata["tutor_content"] = TutorContentLibrary.from_env()
+    proc.userdata["answer_grader"] = AnswerGrader.from_concepts(
+        {"id": c.id, "rubric": c.rubric} for c in proc.userdata["tutor_content"].list_concepts()
+    )
+    proc.userdata["mastery_store"] = MasteryStore()
 
 
 async def entrypoint(ctx: JobContext):
@@ -315,19 +368,19 @@ async def entrypoint(ctx: JobContext):
     }
 
     content = ctx.proc.userdata["tutor_content"]
-    state = TutorSessionState(current_concept_id=content.list_concepts()[0].id)
-    userdata = Userdata(state=state, content=content)
+    # The learner's mastery from earlier sessions has to be loaded before the first turn
+    await ctx.connect()
+    participant = await ctx.wait_for_participant()
+    learner = await LearnerMastery.open(ctx.proc.userdata["mastery_store"], participant.identity)
+    state = TutorSessionState.restore(content, learner)
+    userdata = Userdata(state=state, content=content, grader=ctx.proc.userdata["answer_grader"])
 
+    persona_tts = build_persona_tts()
     session = AgentSession[Userdata](
         userdata=userdata,
         stt=deepgram.STT(model="nova-3"),
         llm=google.LLM(model="gemini-2.5-flash"),
-        tts=murf.TTS(
-            voice=VOICE_PERSONAS["learn"]["voice"],
-            style=VOICE_PERSONAS["learn"]["style"],
-            tokenizer=tokenize.basic.SentenceTokenizer(min_sentence_len=2),
-            text_pacing=True,
-        ),
+        tts=persona_tts,
         turn_detection=MultilingualModel(),
         vad=ctx.proc.userdata["vad"],
         preemptive_generation=True,
@@ -339,12 +392,29 @@ async def entrypoint(ctx: JobContext):
     def _on_metrics_collected(ev: MetricsCollectedEvent):
         metrics.log_metrics(ev.metrics)
         usage_collector.collect(ev.metrics)
+        if isinstance(ev.metrics, metrics.LLMMetrics):
+            # What a locally graded answer saves is roughly one LLM reply's time to first token
+            userdata.grading_stats.observe_llm(ev.metrics.ttft)
+
+    @session.on("conversation_item_added")
+    def _on_item_added(ev):
+        # The agent's reply ends the turn; save what its tools changed in one batch
+        if getattr(ev.item, "role", None) == "assistant":
+            state.save_turn()
 
     async def log_usage():
         summary = usage_collector.get_summary()
         logger.info(f"Usage: {summary}")
+        logger.info(f"Voice switch latency: {persona_tts.report()}")
+        logger.info(f"Answers graded without the LLM: {userdata.grading_stats.report()}")
+
+    async def save_mastery():
+        state.save_turn()
+        await learner.close()
+        logger.info(f"Mastery store: {learner.metrics()}")
 
     ctx.add_shutdown_callback(log_usage)
+    ctx.add_shutdown_callback(save_mastery)
 
     agent = TeachTheTutorAgent(userdata=userdata)
 
@@ -356,7 +426,6 @@ async def entrypoint(ctx: JobContext):
         ),
     )
 
-    await ctx.connect()
     logger.info("Day 4 Teach-the-Tutor agent is live and listening.")
 
 
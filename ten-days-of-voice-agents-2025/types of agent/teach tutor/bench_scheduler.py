@@ -0,0 +1,118 @@
+"""Simulated learners: round-robin concept order vs ReviewScheduler.
+
+Each synthetic learner has a hidden memory of every concept: recall
+probability 0.9 ** (elapsed / stability), so stability is the gap at which
+recall drops to 90%. A review succeeds with that probability; success
+multiplies stability, failure relearns it from a short stability. Learners
+do one session a day with a fixed number of reviews, picked either by
+walking the curriculum round-robin (the old next_concept_id) or by the
+scheduler. Reported: share of reviews recalled and mean retention of the
+whole curriculum at the end.
+
+Part 2 times pick + review on a single learner with very large curricula,
+against finding the due-soonest concept by scanning every card.
+
+Usage: python bench_scheduler.py [learners] [concepts] [days] [reviews_per_day]
+"""
+import random
+import sys
+import time
+
+from scheduler import DAY, ReviewScheduler, sm2
+
+REVIEW_GAP = 60.0
+
+
+def grade_for(p: float, recalled: bool) -> int:
+    if not recalled:
+        return 1
+    return 5 if p > 0.9 else 4 if p > 0.7 else 3
+
+
+def simulate(policy: str, learners: int, concepts: int, days: int, per_day: int, seed: int = 0):
+    rng = random.Random(seed)
+    recalled_total = reviews_total = 0
+    retention = 0.0
+    for _ in range(learners):
+        ability = rng.lognormvariate(0, 0.4)
+        stability = [0.0] * concepts
+        last_seen = [None] * concepts
+        ids = [f"c{i}" for i in range(concepts)]
+        scheduler = ReviewScheduler(ids)
+        cursor = 0
+        now = 0.0
+        for day in range(days):
+            now = day * DAY
+            for _ in range(per_day):
+                if policy == "round_robin":
+                    c = cursor % concepts
+                    cursor += 1
+                else:
+                    c = int(scheduler.next_concept_id(now)[1:])
+                if last_seen[c] is None:
+                    # First contact is a learn step: memory starts here
+                    recalled, p = False, 0.0
+                else:
+                    p = 0.9 ** ((now - last_seen[c]) / stability[c])
+                    recalled = rng.random() < p
+                    reviews_total += 1
+                    recalled_total += recalled
+                if recalled:
+                    stability[c] *= rng.uniform(2.5, 4.0)
+                else:
+                    stability[c] = (DAY if last_seen[c] is None else 0.5 * DAY) * ability
+                last_seen[c] = now
+                scheduler.review(ids[c], grade_for(p, recalled), now)
+                now += REVIEW_GAP
+        end = days * DAY
+        retention += sum(0.9 ** ((end - t) / s) for t, s in zip(last_seen, stability) if t is not None) / concepts
+    return recalled_total / max(1, reviews_total), retention / learners
+
+
+def time_large(size: int, ops: int = 20_000):
+    rng = random.Random(1)
+    ids = [f"c{i}" for i in range(size)]
+    scheduler = ReviewScheduler(ids)
+    # Every concept seen once, at spread-out times, so picks come from the heap
+    for i, concept_id in enumerate(ids):
+        scheduler.review(concept_id, rng.randint(1, 5), -rng.uniform(0, 30 * DAY))
+    start = time.perf_counter()
+    now = 0.0
+    for _ in range(ops):
+        concept_id = scheduler.next_concept_id(now)
+        scheduler.review(concept_id, rng.randint(1, 5), now)
+        now += REVIEW_GAP
+    heap_us = (time.perf_counter() - start) / ops * 1e6
+
+    cards = {c: card for c, card in scheduler.cards.items()}
+    scan_ops = max(20, ops // max(1, size // 1_000))
+    start = time.perf_counter()
+    for _ in range(scan_ops):
+        concept_id = min(cards.values(), key=lambda card: card.due).concept_id
+        sm2(cards[concept_id], rng.randint(1, 5), now)
+        now += REVIEW_GAP
+    scan_us = (time.perf_counter() - start) / scan_ops * 1e6
+    return heap_us, scan_us
+
+
+def main():
+    learners = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    concepts = int(sys.argv[2]) if len(sys.argv) > 2 else 60
+    days = int(sys.argv[3]) if len(sys.argv) > 3 else 30
+    per_day = int(sys.argv[4]) if len(sys.argv) > 4 else 20
+    print(f"{learners} learners, {concepts} concepts, {days} days x {per_day} reviews")
+    for policy in ("round_robin", "scheduler"):
+        start = time.perf_counter()
+        recall, retention = simulate(policy, learners, concepts, days, per_day)
+        elapsed = time.perf_counter() - start
+        print(f"  {policy:<12} recalled {recall:6.1%} of reviews, end retention {retention:6.1%}  ({elapsed:.1f}s)")
+
+    print("\nPick + review cost on one learner (us per operation)")
+    print(f"  {'concepts':>9} {'heap':>8} {'scan':>10}")
+    for size in (100, 10_000, 100_000):
+        heap_us, scan_us = time_large(size)
+        print(f"  {size:>9,} {heap_us:>8.1f} {scan_us:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Latency from a persona switch to the first audio byte, single engine vs pool.
+
+Talks to Murf for real (MURF_API_KEY from .env.local). For each strategy it
+prewarms, then cycles learn -> quiz -> teach_back, switching persona and
+immediately synthesizing a short line, and times switch -> first audio
+frame. The same line spoken again without a switch gives the steady-state
+baseline.
+
+With --logs it reads tutor logs instead: every session logs
+"Voice switch latency: {...}" (PersonaTTS.report()) at shutdown, and the
+medians of those are printed per strategy. Run sessions with
+TUTOR_TTS_PERSONA_POOL=0 and =1 to compare. Neither mode has been run
+against Murf yet, so no before/after figures are recorded.
+
+Usage: python bench_tts_personas.py [switches]
+       python bench_tts_personas.py --logs agent.log [more.log ...]
+"""
+import ast
+import asyncio
+import statistics
+import sys
+import time
+
+REPORT_MARKER = "Voice switch latency: "
+
+# Same personas as agent.py, without importing the agent and its models
+VOICE_PERSONAS = {
+    "learn": {"voice": "en-US-matthew", "style": "Conversation", "display": "Matthew"},
+    "quiz": {"voice": "en-US-alicia", "style": "Conversation", "display": "Alicia"},
+    "teach_back": {"voice": "en-US-ken", "style": "Conversation", "display": "Ken"},
+}
+LINE = "Great, let's switch it up. Here is your next question."
+
+
+def from_logs(paths):
+    """Median of each session's report() medians, per strategy."""
+    sessions = {}
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if REPORT_MARKER in line:
+                    # The report dict is flat, so it ends at the first "}" (also inside JSON-formatted logs)
+                    report = ast.literal_eval(line.split(REPORT_MARKER, 1)[1].split("}", 1)[0] + "}")
+                    if report["switches"]:
+                        sessions.setdefault(report["strategy"], []).append(report)
+    if not sessions:
+        print("No sessions with persona switches found")
+    for strategy, reports in sorted(sessions.items()):
+        print(f"{strategy} ({len(reports)} sessions, {sum(r['switches'] for r in reports)} switches)")
+        for key in ("switch_ttfb_ms", "switch_to_audio_ms", "steady_ttfb_ms"):
+            values = [r[key] for r in reports if r[key] is not None]
+            if values:
+                print(f"  {key:<20} median {statistics.median(values):7.1f} ms")
+
+
+async def first_audio(engine, started: float) -> float:
+    stream = engine.stream()
+    stream.push_text(LINE)
+    stream.end_input()
+    try:
+        async for _ in stream:
+            return time.perf_counter() - started
+    finally:
+        await stream.aclose()
+    raise RuntimeError("TTS returned no audio")
+
+
+async def measure(pooled: bool, switches: int, http_session) -> dict:
+    from livekit.agents import tokenize
+    from livekit.plugins import murf
+
+    from tts_personas import PersonaTTS
+
+    def murf_tts(persona: dict) -> murf.TTS:
+        return murf.TTS(
+            voice=persona["voice"],
+            style=persona["style"],
+            tokenizer=tokenize.basic.SentenceTokenizer(min_sentence_len=2),
+            http_session=http_session,
+        )
+
+    engine = PersonaTTS(VOICE_PERSONAS, murf_tts, initial="learn", pooled=pooled)
+    engine.prewarm()
+    await asyncio.sleep(2)
+    modes = list(VOICE_PERSONAS)
+    switched, steady = [], []
+    try:
+        for i in range(switches):
+            started = time.perf_counter()
+            engine.use(modes[(i + 1) % len(modes)])
+            switched.append(await first_audio(engine, started))
+            steady.append(await first_audio(engine, time.perf_counter()))
+    finally:
+        await engine.aclose()
+    return {"switched": switched, "steady": steady}
+
+
+def summary(values) -> str:
+    values = sorted(values)
+    return f"p50 {statistics.median(values) * 1000:6.0f} ms  p95 {values[int(len(values) * 0.95)] * 1000:6.0f} ms"
+
+
+async def main():
+    # Imported here so --logs works without livekit installed
+    import aiohttp
+    from dotenv import load_dotenv
+
+    load_dotenv(".env.local")
+    switches = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+    async with aiohttp.ClientSession() as http_session:
+        for label, pooled in (("single engine + update_options", False), ("PersonaTTS pool", True)):
+            result = await measure(pooled, switches, http_session)
+            print(f"{label} ({switches} switches)")
+            print(f"  switch -> first audio  {summary(result['switched'])}")
+            print(f"  no switch              {summary(result['steady'])}")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--logs"]:
+        from_logs(sys.argv[2:])
+    else:
+        asyncio.run(main())
@@ -0,0 +1,112 @@
+"""Concept-name resolution: the old get() normalization vs ConceptResolver.
+
+Part 1 resolves names learners and the LLM actually use against the shipped
+content packs. Part 2 builds synthetic libraries of increasing size and
+times exact names, loose names (plural, acronym) and misspelled names, to
+show resolution cost does not grow with the library.
+
+Usage: python bench_tutor_content.py [largest_library]
+"""
+import random
+import statistics
+import sys
+import time
+
+from tutor_content import TutorConcept, TutorContentLibrary
+
+LABELLED = [
+    ("variables", "variables"), ("variable", "variables"), ("loops", "loops"), ("for loops", "loops"),
+    ("while loop", "loops"), ("iteration", "loops"), ("lops", "loops"), ("functions", "function"),
+    ("function", "function"), ("methods", "function"), ("if else", "if_else"), ("if-else", "if_else"),
+    ("if statements", "if_else"), ("data types", "data_types"), ("datatypes", "data_types"),
+    ("strings", "data_types"), ("operators", "operators"), ("opertors", "operators"), ("OOP", "oop"),
+    ("object oriented", "oop"), ("object oriented programming", "oop"), ("classes and objects", "oop"),
+    ("conditionals", "conditionals"), ("conditional statements", "conditionals"), ("lists", "lists"),
+    ("arrays", "lists"), ("varaibles", "variables"),
+]
+OFF_TOPIC = ["weather", "recipes", "football scores", "jazz"]
+
+SYLLABLES = ["ka", "lo", "mi", "ne", "su", "ta", "ri", "po", "ve", "do", "gra", "phi", "sto", "lin", "mer", "qua", "zen", "bor"]
+
+
+def legacy_get(ids, concept_id):
+    """The previous TutorContentLibrary.get() lookup."""
+    if concept_id in ids:
+        return concept_id
+    normalized_id = concept_id.lower().replace(" ", "_").replace("-", "_")
+    if normalized_id.endswith("s"):
+        normalized_id = normalized_id[:-1]
+        if normalized_id in ids:
+            return normalized_id
+    return None
+
+
+def word(rng: random.Random) -> str:
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(3, 4)))
+
+
+def typo(text: str, rng: random.Random) -> str:
+    words = text.split()
+    i = rng.randrange(len(words))
+    w = words[i]
+    j = rng.randrange(len(w) - 1)
+    words[i] = w[:j] + w[j + 1] + w[j] + w[j + 2:]
+    return " ".join(words)
+
+
+def synthetic(size: int, rng: random.Random):
+    concepts, queries, seen = [], [], set()
+    while len(concepts) < size:
+        words = [word(rng), word(rng)]
+        cid = "_".join(words)
+        if cid in seen:
+            continue
+        seen.add(cid)
+        title = " ".join(w.capitalize() for w in words)
+        concepts.append(TutorConcept(id=cid, title=title, summary="...", sample_question="..."))
+        queries.append(("exact", cid, cid))
+        queries.append(("plural", title.lower() + "s", cid))
+        queries.append(("typo", typo(title.lower(), rng), cid))
+    return concepts, queries
+
+
+def time_queries(library: TutorContentLibrary, queries, kind: str):
+    latencies, hits = [], 0
+    for k, query, expected in queries:
+        if k != kind:
+            continue
+        start = time.perf_counter()
+        found = library.resolve(query)
+        latencies.append((time.perf_counter() - start) * 1e6)
+        hits += found == expected
+    return statistics.median(latencies), hits / len(latencies)
+
+
+def main():
+    largest = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    library = TutorContentLibrary.from_env()
+    ids = set(library.ids())
+    print(f"Shipped packs: {len(ids)} concepts")
+    for label, resolve in (("old get()", lambda q: legacy_get(ids, q)), ("ConceptResolver", library.resolve)):
+        correct = sum(resolve(q) == expected for q, expected in LABELLED)
+        wrong = sum(resolve(q) not in (None, expected) for q, expected in LABELLED)
+        off = sum(resolve(q) is not None for q in OFF_TOPIC)
+        print(f"  {label:<16} resolved {correct}/{len(LABELLED)}  wrong {wrong}  off-topic resolved {off}/{len(OFF_TOPIC)}")
+
+    print("\nSynthetic libraries (median us per name, share resolved correctly)")
+    print(f"  {'concepts':>8} {'build':>9} {'exact':>14} {'plural':>14} {'typo':>14}")
+    rng = random.Random(3)
+    size = 100
+    while size <= largest:
+        concepts, queries = synthetic(size, rng)
+        queries = rng.sample(queries, min(len(queries), 6_000))
+        start = time.perf_counter()
+        library = TutorContentLibrary(concepts)
+        build_ms = (time.perf_counter() - start) * 1000
+        cells = [time_queries(library, queries, kind) for kind in ("exact", "plural", "typo")]
+        print(f"  {size:>8,} {build_ms:>7.0f}ms " + " ".join(f"{us:>6.1f} {share:>6.1%}" for us, share in cells))
+        size *= 10
+
+
+if __name__ == "__main__":
+    main()
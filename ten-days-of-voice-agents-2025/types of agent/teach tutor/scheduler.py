@@ -0,0 +1,145 @@
+"""Spaced-repetition scheduling of tutor concepts (SM-2).
+
+Every concept a learner studies has a review card with an ease factor, an
+interval and a due time. Quiz and teach-back answers are graded 0-5; a
+grade of 3 or more counts as recalled and stretches the interval (1 day,
+then 6, then interval x ease), a lower grade resets it to RELEARN_INTERVAL
+and lowers the ease. The next concept is the most overdue review; when
+nothing is due, the next unseen concept in curriculum order; when the
+whole curriculum has been seen, the review due soonest.
+
+Seen cards sit in a min-heap keyed by due time. A review pushes a fresh
+entry and bumps the card's version instead of searching the heap; stale
+entries are dropped when they reach the top. Picking and reviewing are
+O(log n), so large curricula are as cheap as the seven core concepts.
+"""
+import heapq
+import itertools
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+DAY = 86400.0
+MIN_EASE = 1.3
+DEFAULT_EASE = 2.5
+PASS_GRADE = 3
+# A failed card comes back after this many seconds, still in the same session
+RELEARN_INTERVAL = 600.0
+
+
+@dataclass
+class ReviewCard:
+    concept_id: str
+    due: float
+    ease: float = DEFAULT_EASE
+    interval: float = 0.0
+    repetitions: int = 0
+    lapses: int = 0
+    reviews: int = 0
+    last_grade: Optional[int] = None
+    version: int = 0
+
+    def to_dict(self) -> dict:
+        return {k: v for k, v in self.__dict__.items() if k != "version"}
+
+
+def sm2(card: ReviewCard, grade: int, now: float):
+    """Applies one SM-2 review with grade 0-5 to card."""
+    grade = max(0, min(5, int(grade)))
+    card.reviews += 1
+    card.last_grade = grade
+    if grade >= PASS_GRADE:
+        if card.repetitions == 0:
+            card.interval = DAY
+        elif card.repetitions == 1:
+            card.interval = 6 * DAY
+        else:
+            card.interval = card.interval * card.ease
+        card.repetitions += 1
+    else:
+        card.repetitions = 0
+        card.lapses += 1
+        card.interval = RELEARN_INTERVAL
+    card.ease = max(MIN_EASE, card.ease + 0.1 - (5 - grade) * (0.08 + (5 - grade) * 0.02))
+    card.due = now + card.interval
+
+
+class ReviewScheduler:
+    """One learner's review queue over a curriculum."""
+
+    def __init__(self, concept_ids: Iterable[str], cards: Iterable[dict] = ()):
+        # Cards of concepts reviewed at least once, by concept id
+        self.cards: Dict[str, ReviewCard] = {}
+        self._heap: List[Tuple[float, int, str, int]] = []
+        self._tiebreak = itertools.count()
+        for data in cards:
+            card = self.cards[data["concept_id"]] = ReviewCard(**data)
+            self._push(card)
+        self._unseen = deque(c for c in dict.fromkeys(concept_ids) if c not in self.cards)
+
+    def _push(self, card: ReviewCard):
+        card.version += 1
+        heapq.heappush(self._heap, (card.due, next(self._tiebreak), card.concept_id, card.version))
+
+    def _top(self) -> Optional[ReviewCard]:
+        heap = self._heap
+        while heap:
+            _, _, concept_id, version = heap[0]
+            card = self.cards.get(concept_id)
+            if card is not None and card.version == version:
+                return card
+            heapq.heappop(heap)
+        return None
+
+    def add(self, concept_id: str):
+        """Appends a concept to the end of the curriculum."""
+        if concept_id not in self.cards and concept_id not in self._unseen:
+            self._unseen.append(concept_id)
+
+    def review(self, concept_id: str, grade: int, now: Optional[float] = None) -> ReviewCard:
+        """Records a graded quiz or teach-back answer and reschedules the concept."""
+        now = time.time() if now is None else now
+        card = self.cards.get(concept_id)
+        if card is None:
+            card = self.cards[concept_id] = ReviewCard(concept_id, due=now)
+            if self._unseen and self._unseen[0] == concept_id:
+                self._unseen.popleft()
+            elif concept_id in self._unseen:
+                # O(n), but only when the learner jumps ahead of the curriculum
+                self._unseen.remove(concept_id)
+        sm2(card, grade, now)
+        self._push(card)
+        # Keep stale entries from outnumbering live ones on long sessions
+        if len(self._heap) > 2 * len(self.cards) + 64:
+            self._compact()
+        return card
+
+    def next_concept_id(self, now: Optional[float] = None, exclude: Optional[str] = None) -> Optional[str]:
+        """Most overdue review, else the next unseen concept, else the review due soonest.
+
+        exclude skips one concept (usually the current one) unless it is the only choice.
+        """
+        now = time.time() if now is None else now
+        card = self._top()
+        if card is not None and card.concept_id == exclude:
+            # Look one card further without disturbing the heap
+            heapq.heappop(self._heap)
+            following = self._top()
+            heapq.heappush(self._heap, (card.due, next(self._tiebreak), card.concept_id, card.version))
+            card = following or card
+        if card is not None and card.due <= now and card.concept_id != exclude:
+            return card.concept_id
+        for concept_id in itertools.islice(self._unseen, 2):
+            if concept_id != exclude:
+                return concept_id
+        if card is not None:
+            return card.concept_id
+        return self._unseen[0] if self._unseen else None
+
+    def _compact(self):
+        self._heap = [(c.due, next(self._tiebreak), c.concept_id, c.version) for c in self.cards.values()]
+        heapq.heapify(self._heap)
+
+    def to_list(self) -> List[dict]:
+        return [card.to_dict() for card in self.cards.values()]
@@ -0,0 +1,127 @@
+"""One warm TTS engine per tutor persona, switched by routing.
+
+Calling update_options(voice=...) on the session's single TTS makes the
+first utterance after a mode change pay for a reconnect or voice warm-up,
+which is heard as a gap when Matthew hands off to Alicia or Ken. PersonaTTS
+builds one engine per VOICE_PERSONAS entry, prewarms all of them when the
+session starts and routes each synthesis request to the active persona, so
+switching is just changing which engine gets the next request.
+
+Both strategies are measured the same way: for the first utterance after a
+switch it records the time to first audio byte (TTS ttfb) and the time from
+the switch itself to that first byte. pooled=False keeps the old
+single-engine behavior so the two can be compared in the logs.
+"""
+import logging
+import statistics
+import time
+from functools import partial
+from typing import Callable, Dict, List, Optional
+
+from livekit.agents import DEFAULT_API_CONNECT_OPTIONS, APIConnectOptions, tts
+
+logger = logging.getLogger("tts-personas")
+
+
+class PersonaTTS(tts.TTS):
+    """TTS that speaks with the voice of the active persona."""
+
+    def __init__(self, personas: Dict[str, dict], factory: Callable[[dict], tts.TTS], initial: str, pooled: bool = True):
+        self._personas = personas
+        self.pooled = pooled
+        if pooled:
+            self._engines = {name: factory(persona) for name, persona in personas.items()}
+        else:
+            engine = factory(personas[initial])
+            self._engines = {name: engine for name in personas}
+        first = self._engines[initial]
+        super().__init__(capabilities=first.capabilities, sample_rate=first.sample_rate, num_channels=first.num_channels)
+        self.active = initial
+
+        # Switch being measured: (persona, switched at, first request at)
+        self._pending_switch: Optional[list] = None
+        self.switch_ttfb: List[float] = []
+        self.switch_to_audio: List[float] = []
+        self.steady_ttfb: List[float] = []
+
+        for engine in set(self._engines.values()):
+            engine.on("metrics_collected", partial(self._on_metrics, engine))
+            engine.on("error", lambda error: self.emit("error", error))
+
+    @property
+    def model(self) -> str:
+        return self._engines[self.active].model
+
+    @property
+    def provider(self) -> str:
+        return self._engines[self.active].provider
+
+    # --------------------------
+    #       ROUTING
+    # --------------------------
+
+    def use(self, persona: str):
+        """Routes the following synthesis requests to persona's voice."""
+        if persona == self.active:
+            return
+        if not self.pooled:
+            options = self._personas[persona]
+            self._engines[persona].update_options(voice=options["voice"], style=options["style"])
+        self.active = persona
+        self._pending_switch = [persona, time.perf_counter(), None]
+
+    def prewarm(self) -> None:
+        for engine in set(self._engines.values()):
+            engine.prewarm()
+
+    def synthesize(self, text: str, *, conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS) -> tts.ChunkedStream:
+        self._mark_request()
+        return self._engines[self.active].synthesize(text, conn_options=conn_options)
+
+    def stream(self, *, conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS) -> tts.SynthesizeStream:
+        self._mark_request()
+        return self._engines[self.active].stream(conn_options=conn_options)
+
+    async def aclose(self) -> None:
+        for engine in set(self._engines.values()):
+            await engine.aclose()
+
+    # --------------------------
+    #       MEASUREMENT
+    # --------------------------
+
+    def _mark_request(self):
+        if self._pending_switch is not None and self._pending_switch[2] is None:
+            self._pending_switch[2] = time.perf_counter()
+
+    def _on_metrics(self, engine: tts.TTS, metrics):
+        self.emit("metrics_collected", metrics)
+        if engine is not self._engines[self.active] or metrics.ttfb is None or metrics.ttfb < 0:
+            return
+        switch = self._pending_switch
+        if switch is None or switch[2] is None:
+            self.steady_ttfb.append(metrics.ttfb)
+            return
+        persona, switched_at, requested_at = switch
+        self._pending_switch = None
+        # The stream was opened requested_at - switched_at after the switch (LLM time) and spoke ttfb later
+        to_audio = requested_at - switched_at + metrics.ttfb
+        self.switch_ttfb.append(metrics.ttfb)
+        self.switch_to_audio.append(to_audio)
+        logger.info(
+            "First audio as %s: ttfb %.0f ms, %.0f ms after the switch (%s)",
+            self._personas[persona]["display"], metrics.ttfb * 1000, to_audio * 1000, "pooled" if self.pooled else "single engine",
+        )
+
+    def report(self) -> dict:
+        """Median latencies in ms; switch_* cover the first utterance after each persona switch."""
+        def median_ms(values: List[float]) -> Optional[float]:
+            return round(statistics.median(values) * 1000, 1) if values else None
+
+        return {
+            "strategy": "pooled" if self.pooled else "single engine",
+            "switches": len(self.switch_ttfb),
+            "switch_ttfb_ms": median_ms(self.switch_ttfb),
+            "switch_to_audio_ms": median_ms(self.switch_to_audio),
+            "steady_ttfb_ms": median_ms(self.steady_ttfb),
+        }
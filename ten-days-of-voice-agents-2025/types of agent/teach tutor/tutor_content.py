@@ -0,0 +1,257 @@
+"""Tutor concepts loaded from content packs, with a precomputed name resolver.
+
+A pack is a JSON file, either a bare list of concepts or
+{"pack": name, "concepts": [...]}. A concept needs "id", "title", "summary"
+and "sample_question"; "teach_back_prompt", "aliases" and "rubric" (key
+points for local answer grading, see answer_grader.py) are optional.
+Packs are read from content_packs/ plus the shared Day 4 content, and from
+any extra files or directories listed in TUTOR_CONTENT_PATHS. When two
+packs define the same concept (e.g. "function" and "functions"), the first
+one loaded wins.
+
+Learners and the LLM name concepts loosely ("OOP", "object oriented", "for
+loops", "functions", "lops"). ConceptResolver builds three lookups once at
+load: normalized names and aliases, a token index, and a table of
+single-letter deletions (SymSpell) that corrects one typo per word (a
+missing, extra, wrong or swapped letter). Resolving a name touches only its
+own tokens, so the cost does not grow with the number of concepts.
+"""
+import glob
+import json
+import logging
+import math
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set
+
+logger = logging.getLogger("tutor-content")
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PACKS_DIR = os.path.join(SCRIPT_DIR, "content_packs")
+SHARED_CONTENT = os.path.join(SCRIPT_DIR, "..", "..", "Agent type", "Coeffe", "shared-data", "day4_tutor_content.json")
+CONTENT_PATHS_ENV = "TUTOR_CONTENT_PATHS"
+
+STOPWORDS = {"a", "an", "the", "of", "and", "in", "on", "about", "concept", "concepts", "topic", "programming", "statement", "statements"}
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+# Tokens shorter than this are only matched exactly
+MIN_FUZZY_LEN = 3
+
+
+def _stem(token: str) -> str:
+    if len(token) > 3 and token.endswith("ies"):
+        return token[:-3] + "y"
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def tokens(text: str) -> List[str]:
+    return [_stem(t) for t in TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+def name_key(text: str) -> str:
+    """'For-Loops' and 'for loop' both give 'for_loop'."""
+    return "_".join(tokens(text))
+
+
+def _variants(token: str) -> Set[str]:
+    """The token and every way of dropping one letter from it."""
+    return {token} | {token[:i] + token[i + 1:] for i in range(len(token))}
+
+
+def edit_distance(a: str, b: str) -> int:
+    """Damerau-Levenshtein (optimal string alignment) distance."""
+    previous2, previous = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+@dataclass
+class TutorConcept:
+    """Structured representation of one concept."""
+
+    id: str
+    title: str
+    summary: str
+    sample_question: str
+    teach_back_prompt: str = ""
+    aliases: List[str] = field(default_factory=list)
+    # Mode -> key points for grading answers locally
+    rubric: Dict[str, List[dict]] = field(default_factory=dict)
+    pack: str = ""
+
+    def __post_init__(self):
+        if not self.teach_back_prompt:
+            self.teach_back_prompt = f"Explain {self.title} in your own words, as if teaching it to a friend."
+
+
+class ConceptResolver:
+    """Maps loose concept names to concept ids using indexes built once."""
+
+    def __init__(self, concepts: Iterable[TutorConcept]):
+        # name key -> concept id, or None when two concepts claim the same name
+        self._names: Dict[str, Optional[str]] = {}
+        self._postings: Dict[str, Set[str]] = {}
+        self._deletions: Dict[str, Set[str]] = {}
+        self._idf: Dict[str, float] = {}
+        for concept in concepts:
+            self.add(concept)
+        self.finish()
+
+    def add(self, concept: TutorConcept):
+        names = [concept.id.replace("_", " "), concept.title, *concept.aliases]
+        # "OOP (Object-Oriented Programming)": the part in brackets and its acronym are names too
+        for inner in re.findall(r"\(([^)]*)\)", concept.title):
+            names.append(inner)
+            words = TOKEN_RE.findall(inner.lower())
+            if len(words) > 1:
+                names.append("".join(w[0] for w in words))
+        names.append(re.sub(r"\([^)]*\)", " ", concept.title))
+        for name in names:
+            key = name_key(name)
+            if not key:
+                continue
+            # "datatypes" and "ifelse" are said (and transcribed) as one word too
+            for variant in {key, key.replace("_", "")}:
+                self._names[variant] = concept.id if self._names.get(variant, concept.id) == concept.id else None
+            for token in key.split("_"):
+                self._postings.setdefault(token, set()).add(concept.id)
+
+    def finish(self):
+        """Rebuilds the token weights and the deletion table after concepts are added."""
+        concepts = {cid for ids in self._postings.values() for cid in ids}
+        total = max(1, len(concepts))
+        self._idf = {t: math.log(1 + total / len(ids)) for t, ids in self._postings.items()}
+        self._deletions = {}
+        for token in self._postings:
+            if len(token) < MIN_FUZZY_LEN:
+                continue
+            for variant in _variants(token):
+                self._deletions.setdefault(variant, set()).add(token)
+
+    def _correct(self, token: str) -> Optional[str]:
+        if token in self._postings:
+            return token
+        if len(token) < MIN_FUZZY_LEN:
+            return None
+        candidates = set()
+        for variant in _variants(token):
+            candidates.update(self._deletions.get(variant, ()))
+        # Tokens sharing a deletion can still be two edits apart: 'abc' and 'bcd' both give 'bc'
+        scored = sorted((edit_distance(token, c), -self._idf[c], c) for c in candidates)
+        scored = [s for s in scored if s[0] <= 1]
+        return scored[0][2] if scored else None
+
+    def lookup(self, name: str) -> Optional[str]:
+        """Concept whose id, title or alias normalizes to the same name; no fuzzy matching."""
+        return self._names.get(name_key(name))
+
+    def resolve(self, name: str) -> Optional[str]:
+        key = name_key(name)
+        if not key:
+            return None
+        if key in self._names:
+            return self._names[key]
+        scores: Dict[str, float] = {}
+        for token in key.split("_"):
+            corrected = self._correct(token)
+            if corrected is None:
+                continue
+            for cid in self._postings[corrected]:
+                scores[cid] = scores.get(cid, 0.0) + self._idf[corrected]
+        if not scores:
+            return None
+        ranked = sorted(scores.items(), key=lambda item: -item[1])
+        if len(ranked) > 1 and ranked[1][1] == ranked[0][1]:
+            # Tied between concepts: better to ask than to guess
+            return None
+        return ranked[0][0]
+
+
+class TutorContentLibrary:
+    """Serves concept content loaded from content packs."""
+
+    def __init__(self, concepts: List[TutorConcept]):
+        if not concepts:
+            raise ValueError("TutorContentLibrary requires at least one concept.")
+        self._concepts: Dict[str, TutorConcept] = {}
+        self._order: List[str] = []
+        resolver = ConceptResolver(())
+        for concept in concepts:
+            existing = concept.id if concept.id in self._concepts else resolver.lookup(concept.id)
+            if existing:
+                logger.info(f"Skipping concept {concept.id!r} from pack {concept.pack!r}: same as {existing!r}")
+                continue
+            self._concepts[concept.id] = concept
+            self._order.append(concept.id)
+            resolver.add(concept)
+        resolver.finish()
+        self.resolver = resolver
+
+    @classmethod
+    def from_data(cls, data: List[Dict], pack: str = "") -> "TutorContentLibrary":
+        return cls([TutorConcept(**item, pack=pack) for item in data])
+
+    @classmethod
+    def from_packs(cls, paths: Iterable[str]) -> "TutorContentLibrary":
+        """Loads every pack file in paths; directories contribute their *.json files."""
+        concepts = []
+        for path in paths:
+            files = sorted(glob.glob(os.path.join(path, "*.json"))) if os.path.isdir(path) else [path]
+            for file in files:
+                concepts.extend(load_pack(file))
+        return cls(concepts)
+
+    @classmethod
+    def from_env(cls) -> "TutorContentLibrary":
+        """Loads the default packs plus any listed in TUTOR_CONTENT_PATHS (os.pathsep separated)."""
+        paths = [PACKS_DIR]
+        if os.path.exists(SHARED_CONTENT):
+            paths.append(SHARED_CONTENT)
+        paths += [p for p in os.getenv(CONTENT_PATHS_ENV, "").split(os.pathsep) if p]
+        return cls.from_packs(paths)
+
+    def list_concepts(self) -> List[TutorConcept]:
+        return [self._concepts[cid] for cid in self._order]
+
+    def ids(self) -> List[str]:
+        return list(self._order)
+
+    def resolve(self, name: Optional[str]) -> Optional[str]:
+        if not name:
+            return None
+        if name in self._concepts:
+            return name
+        return self.resolver.resolve(name)
+
+    def get(self, concept_id: Optional[str]) -> TutorConcept:
+        target_id = concept_id or self._order[0]
+        resolved = self.resolve(target_id)
+        if resolved is None:
+            raise KeyError(f"Unknown concept: {target_id}. Available concepts: {', '.join(self._order)}")
+        return self._concepts[resolved]
+
+
+def load_pack(path: str) -> List[TutorConcept]:
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, list):
+        name, items = os.path.splitext(os.path.basename(path))[0], data
+    else:
+        name, items = data.get("pack") or os.path.splitext(os.path.basename(path))[0], data.get("concepts", [])
+    return [
+        TutorConcept(
+            id=item["id"], title=item["title"], summary=item["summary"], sample_question=item["sample_question"],
+            teach_back_prompt=item.get("teach_back_prompt", ""), aliases=item.get("aliases", []),
+            rubric=item.get("rubric", {}), pack=name,
+        )
+        for item in items
+    ]
@@ -0,0 +1,91 @@
+"""WorldContext.inject across turns, with a stand-in for livekit's Agent and ChatContext.
+
+As in livekit, each turn's turn_ctx is a copy of the agent's chat context,
+so only what inject() hands to update_chat_ctx survives into the next turn.
+
+Run with: python -m pytest test_world_context.py
+"""
+import asyncio
+import itertools
+
+from gamemaster_tools import WorldState
+from world_context import WorldContext
+
+_ids = itertools.count()
+
+
+class FakeMessage:
+    def __init__(self, role: str, content: str):
+        self.id = f"item_{next(_ids)}"
+        self.role = role
+        self.content = content
+
+
+class FakeChatContext:
+    def __init__(self, items=None):
+        self.items = list(items or [])
+
+    def copy(self) -> "FakeChatContext":
+        return FakeChatContext(self.items)
+
+    def add_message(self, role: str, content: str) -> FakeMessage:
+        message = FakeMessage(role, content)
+        self.items.append(message)
+        return message
+
+
+class FakeAgent:
+    def __init__(self):
+        self.chat_ctx = FakeChatContext()
+
+    async def update_chat_ctx(self, chat_ctx: FakeChatContext):
+        self.chat_ctx = chat_ctx.copy()
+
+
+def play_turn(agent: FakeAgent, context: WorldContext, said: str):
+    """One user turn: inject into a fresh turn_ctx, then record the user message and the reply."""
+    turn_ctx = agent.chat_ctx.copy()
+    injected = asyncio.run(context.inject(turn_ctx, agent))
+    agent.chat_ctx.add_message("user", said)
+    agent.chat_ctx.add_message("assistant", "What do you do next?")
+    return injected
+
+
+def test_second_turn_sends_only_the_diff():
+    world = WorldState()
+    agent = FakeAgent()
+    context = WorldContext(world)
+
+    first = play_turn(agent, context, "Where am I?")
+    world.add_inventory_item("Rope")
+    second = play_turn(agent, context, "I pick up the rope.")
+    third = play_turn(agent, context, "I wait.")
+
+    assert first.startswith("World state (full):")
+    assert second == "World update: inventory +Rope"
+    assert third is None
+    system = [item.content for item in agent.chat_ctx.items if item.role == "system"]
+    assert system == [first, second]
+
+
+def test_update_reaches_this_turns_reply():
+    agent = FakeAgent()
+    context = WorldContext(WorldState())
+    turn_ctx = agent.chat_ctx.copy()
+
+    text = asyncio.run(context.inject(turn_ctx, agent))
+
+    assert [item.content for item in turn_ctx.items] == [text]
+
+
+def test_compaction_triggers_a_full_refresh():
+    world = WorldState()
+    agent = FakeAgent()
+    context = WorldContext(world)
+
+    play_turn(agent, context, "Where am I?")
+    # Compaction drops the oldest messages, including the full state block
+    agent.chat_ctx.items = agent.chat_ctx.items[1:]
+    world.update_character_status(hp=5)
+
+    assert play_turn(agent, context, "Ouch.").startswith("World state (full):")
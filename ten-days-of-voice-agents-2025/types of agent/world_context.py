@@ -0,0 +1,147 @@
+"""Incremental world-state context for the game master LLM.
+
+Rather than putting the whole world state into the prompt every turn,
+WorldContext remembers what it last showed the model and injects only the
+fields that changed since then. The first injection, and any injection after
+the chat context was compacted, is a full refresh.
+
+Wiring it into a LiveKit agent:
+
+    async def on_user_turn_completed(self, turn_ctx, new_message):
+        await self.world_context.inject(turn_ctx, self)
+
+turn_ctx is a copy made for this one reply, so inject() also adds the
+update to the agent's own chat context; otherwise the next turn would not
+find it and would send a full refresh again.
+"""
+import logging
+from typing import List, Optional, Tuple
+
+from gamemaster_tools import WorldState
+
+logger = logging.getLogger("world-context")
+
+# Events included in a full refresh
+FULL_REFRESH_EVENTS = 10
+
+
+def _view(world: WorldState) -> dict:
+    """Flat, comparable view of the fields the model needs to know about."""
+    char = world.character
+    loc = world.location
+    return {
+        "character": f"{char.name} ({char.char_class})",
+        "hp": f"{char.hp}/{char.max_hp}",
+        "status": char.status,
+        "location": loc.name,
+        "description": loc.description,
+        "paths": tuple(loc.known_paths),
+        "inventory": tuple(char.inventory),
+        "quests": tuple((q.name, q.status, q.description) for q in world.quests),
+    }
+
+
+def _quest_line(quest: Tuple[str, str, str]) -> str:
+    return f"{quest[0]} [{quest[1]}]: {quest[2]}"
+
+
+class WorldContext:
+    """Tracks what the LLM has seen of a WorldState and renders updates.
+
+    update() returns the text to inject this turn: a full state block, a
+    compact diff, or "" when nothing changed. reset() forces the next update
+    to be a full refresh; inject() calls it on its own when a message it
+    added earlier is no longer in the agent's chat context.
+    """
+
+    def __init__(self, world: WorldState, full_refresh_events: int = FULL_REFRESH_EVENTS):
+        self.world = world
+        self.full_refresh_events = full_refresh_events
+        self._seen: Optional[dict] = None
+        self._seen_events = 0
+        # Ids of messages injected since the last full refresh
+        self._injected_ids: List[str] = []
+
+    def reset(self):
+        self._seen = None
+        self._injected_ids = []
+
+    def update(self) -> str:
+        view = _view(self.world)
+        if self._seen is None:
+            text = self._render_full(view)
+        else:
+            text = self._render_diff(self._seen, view)
+        self._seen = view
+        self._seen_events = self.world.event_count
+        return text
+
+    async def inject(self, turn_ctx, agent) -> Optional[str]:
+        """Adds this turn's update to turn_ctx and to the agent's chat context.
+
+        Returns the text, or None if nothing changed.
+        """
+        if self._injected_ids:
+            present = {item.id for item in agent.chat_ctx.items}
+            if not all(msg_id in present for msg_id in self._injected_ids):
+                logger.info("World context was compacted out of the chat; sending a full refresh")
+                self.reset()
+        text = self.update()
+        if not text:
+            return None
+        message = turn_ctx.add_message(role="system", content=text)
+        chat_ctx = agent.chat_ctx.copy()
+        chat_ctx.items.append(message)
+        await agent.update_chat_ctx(chat_ctx)
+        self._injected_ids.append(message.id)
+        return text
+
+    # --------------------------
+    #       RENDERING
+    # --------------------------
+
+    def _new_events(self, limit: int) -> Tuple[List[str], int]:
+        """Events logged since the last update (at most limit), and how many were left out."""
+        unseen = self.world.event_count - self._seen_events
+        events = self.world.recent_events(min(unseen, limit)) if unseen > 0 else []
+        return events, max(0, unseen - len(events))
+
+    def _render_full(self, view: dict) -> str:
+        lines = [
+            "World state (full):",
+            f"Character: {view['character']}, HP {view['hp']}, {view['status']}",
+            f"Inventory: {', '.join(view['inventory']) or 'empty'}",
+            f"Location: {view['location']} - {view['description']}",
+            f"Paths: {', '.join(view['paths'])}",
+        ]
+        lines += [f"Quest: {_quest_line(q)}" for q in view["quests"]]
+        self._seen_events = 0
+        events, _ = self._new_events(self.full_refresh_events)
+        if events:
+            lines.append("Recent events: " + " | ".join(events))
+        return "\n".join(lines)
+
+    def _render_diff(self, old: dict, new: dict) -> str:
+        parts = []
+        for key in ("character", "hp", "status"):
+            if old[key] != new[key]:
+                parts.append(f"{key} {new[key]}")
+        if old["location"] != new["location"] or old["description"] != new["description"]:
+            parts.append(f"location {new['location']} - {new['description']}")
+        if old["paths"] != new["paths"]:
+            parts.append(f"paths {', '.join(new['paths'])}")
+        if old["inventory"] != new["inventory"]:
+            before, after = set(old["inventory"]), set(new["inventory"])
+            changes = [f"+{i}" for i in new["inventory"] if i not in before]
+            changes += [f"-{i}" for i in old["inventory"] if i not in after]
+            parts.append("inventory " + " ".join(changes))
+        if old["quests"] != new["quests"]:
+            seen = set(old["quests"])
+            parts += [f"quest {_quest_line(q)}" for q in new["quests"] if q not in seen]
+        events, skipped = self._new_events(self.full_refresh_events)
+        if events:
+            prefix = f"(+{skipped} earlier) " if skipped else ""
+            parts.append("events: " + prefix + " | ".join(events))
+        if not parts:
+            return ""
+        return "World update: " + "; ".join(parts)
@@ -0,0 +1,249 @@
+import json
+import logging
+import os
+import struct
+import threading
+import zlib
+from typing import Any, Callable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger("world-journal")
+
+SNAPSHOT_MAGIC = b"WSNP"
+SNAPSHOT_VERSION = 1
+# magic, format version, last journal seq covered, crc32 of the compressed body
+SNAPSHOT_HEADER = struct.Struct(">4sBQI")
+
+
+class WorldJournal:
+    """Append-only mutation journal with periodic compressed snapshots.
+
+    Every state mutation becomes one JSON line with a sequence number. Lines
+    are buffered until commit(), which appends them to <base>.journal, so a
+    save only costs the records made since the previous save. Once
+    compact_every records have piled up, the full state is written to
+    <base>.snap and the journal is truncated. Loading reads the snapshot and
+    replays the journal records that came after it.
+
+    Records that no longer belong in live state (such as old events pushed
+    out of a bounded buffer) can be spilled to <base>.events.jsonl, which is
+    never compacted.
+
+    Saving can be split across threads: take() runs where the state is
+    mutated and hands back everything buffered so far; write() does the file
+    work and may run in a worker thread. commit() and write_snapshot() do
+    both in one go. A write that fails puts its records back in front of
+    anything buffered since, so the next save retries them; only one write
+    may be in flight at a time.
+    """
+
+    def __init__(self, base_path: str, compact_every: int = 500, fsync: bool = False):
+        self.base_path = base_path
+        self.journal_path = f"{base_path}.journal"
+        self.snapshot_path = f"{base_path}.snap"
+        self.archive_path = f"{base_path}.events.jsonl"
+        self.compact_every = compact_every
+        self.fsync = fsync
+        self.seq = 0
+        self.snapshot_seq = 0
+        self._buffer = []
+        self._spilled = []
+        self._file = None
+        self._torn_at: Optional[int] = None
+        # Set when a snapshot write failed; the next save must write one
+        self._snapshot_due = False
+        # Serializes file work when write() runs in a worker thread
+        self._lock = threading.Lock()
+
+    # --------------------------
+    #       WRITING
+    # --------------------------
+
+    def append(self, op: str, args: dict):
+        """Buffers one mutation record until the next commit()."""
+        self.seq += 1
+        self._buffer.append(json.dumps({"seq": self.seq, "op": op, "args": args}, separators=(",", ":")))
+
+    def spill(self, record: Any):
+        """Buffers a record for the archive; written with the next commit()."""
+        self._spilled.append(json.dumps(record, separators=(",", ":")))
+
+    def pending(self) -> int:
+        """Records written since the last snapshot."""
+        return self.seq - self.snapshot_seq
+
+    def needs_compaction(self) -> bool:
+        return self._snapshot_due or self.pending() >= self.compact_every
+
+    def has_pending_writes(self) -> bool:
+        return bool(self._buffer or self._spilled)
+
+    def take(self) -> Tuple[int, List[str], List[str]]:
+        """Detaches everything buffered so far: (seq, journal records, spilled records)."""
+        records, self._buffer = self._buffer, []
+        spilled, self._spilled = self._spilled, []
+        return self.seq, records, spilled
+
+    def write(self, seq: int, records: List[str], spilled: List[str], snapshot: Optional[dict] = None):
+        """Writes what take() returned.
+
+        With a snapshot (the state as of seq) the records are dropped, since
+        the snapshot already contains their effect, and the journal is
+        truncated. Spilled records are always archived first.
+        """
+        with self._lock:
+            if spilled:
+                # Archive first: a spilled record must be on disk before the journal moves past it.
+                try:
+                    with open(self.archive_path, "a", encoding="utf-8") as f:
+                        f.write("\n".join(spilled) + "\n")
+                except BaseException:
+                    self._requeue(records, spilled)
+                    raise
+            if snapshot is not None:
+                try:
+                    self._write_snapshot(snapshot, seq)
+                except BaseException:
+                    self._requeue(records, [])
+                    self._snapshot_due = True
+                    raise
+            elif records:
+                try:
+                    self._append(records)
+                except BaseException:
+                    self._requeue(records, [])
+                    raise
+
+    def _append(self, records: List[str]):
+        # Called with the lock held
+        if self._file is None:
+            self._file = open(self.journal_path, "a", encoding="utf-8")
+        offset = self._file.tell()
+        try:
+            self._file.write("\n".join(records) + "\n")
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+        except BaseException:
+            # Drop whatever part of the batch reached the file, so the retry does not repeat records
+            try:
+                self._file.close()
+            except OSError:
+                pass
+            self._file = None
+            os.truncate(self.journal_path, offset)
+            raise
+
+    def _requeue(self, records: List[str], spilled: List[str]):
+        # Slice assignment is atomic under the GIL, so this is safe against append() on the loop thread
+        self._buffer[:0] = records
+        self._spilled[:0] = spilled
+
+    def commit(self):
+        """Appends buffered records to the journal in one write."""
+        self.write(*self.take())
+
+    def write_snapshot(self, state: dict):
+        """Writes the full state as a snapshot covering every record so far, then truncates the journal."""
+        self.write(*self.take(), snapshot=state)
+
+    def _write_snapshot(self, state: dict, seq: int):
+        body = zlib.compress(json.dumps(state, separators=(",", ":")).encode("utf-8"), 6)
+        header = SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, seq, zlib.crc32(body))
+        tmp_path = f"{self.snapshot_path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(header + body)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+        self.snapshot_seq = seq
+        self._snapshot_due = False
+
+        # A crash before this point is harmless: replay skips records the snapshot covers.
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        open(self.journal_path, "w").close()
+        logger.info(f"Compacted {self.base_path} at seq {seq}")
+
+    def close(self):
+        """Closes the journal file. Records not yet committed are discarded."""
+        self._buffer = []
+        self._spilled = []
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    # --------------------------
+    #       READING
+    # --------------------------
+
+    def exists(self) -> bool:
+        return os.path.exists(self.snapshot_path) or os.path.exists(self.journal_path)
+
+    def read_snapshot(self) -> Tuple[Optional[dict], int]:
+        """Returns (state, seq) from the snapshot, or (None, 0) when there is none."""
+        if not os.path.exists(self.snapshot_path):
+            return None, 0
+        with open(self.snapshot_path, "rb") as f:
+            data = f.read()
+        magic, version, seq, crc = SNAPSHOT_HEADER.unpack_from(data)
+        body = data[SNAPSHOT_HEADER.size:]
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+            raise ValueError(f"{self.snapshot_path} is not a version {SNAPSHOT_VERSION} world snapshot")
+        if zlib.crc32(body) != crc:
+            raise ValueError(f"{self.snapshot_path} is corrupt (checksum mismatch)")
+        return json.loads(zlib.decompress(body)), seq
+
+    def records(self, after_seq: int = 0) -> Iterator[dict]:
+        """Yields journal records with seq > after_seq. A torn final line is ignored."""
+        self._torn_at = None
+        if not os.path.exists(self.journal_path):
+            return
+        offset = 0
+        with open(self.journal_path, "rb") as f:
+            for line in f:
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError("unterminated record")
+                    record = json.loads(line)
+                except ValueError:
+                    logger.warning(f"Ignoring torn record at the end of {self.journal_path}")
+                    self._torn_at = offset
+                    break
+                offset += len(line)
+                if record["seq"] > after_seq:
+                    yield record
+
+    def archived(self) -> Iterator[Any]:
+        """Yields spilled records, oldest first."""
+        if not os.path.exists(self.archive_path):
+            return
+        with open(self.archive_path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.endswith("\n"):
+                    yield json.loads(line)
+
+    def replay(self, build: Callable[[Optional[dict]], Any], apply: Callable[[Any, str, dict], None]) -> Any:
+        """Rebuilds state from the snapshot plus the journal tail.
+
+        build(snapshot) turns the snapshot dict (None when there is no
+        snapshot yet) into a state object; apply(state, op, args) must
+        perform one mutation without journaling it.
+        """
+        snapshot, snapshot_seq = self.read_snapshot()
+        state = build(snapshot)
+        seq = snapshot_seq
+        for record in self.records(after_seq=snapshot_seq):
+            if record["seq"] <= seq:
+                # Already applied: a batch that was retried after a failed write
+                continue
+            apply(state, record["op"], record["args"])
+            seq = record["seq"]
+        self.close()
+        if self._torn_at is not None:
+            # Cut the torn tail so later commits do not land behind it.
+            os.truncate(self.journal_path, self._torn_at)
+        self.seq = seq
+        self.snapshot_seq = snapshot_seq
+        return state